@@ -0,0 +1,288 @@
+"""
+ユーチュラ → YouTube URL 取得（非同期HTTP版）
+
+ブラウザを使わず、asyncio + aiohttp でチャンネルページを並行取得します。
+同時接続数の上限と、ホストごとのトークンバケットによる秒間リクエスト数の
+上限を設けているため、並行取得してもサイトへの負荷は一定に抑えられます。
+YouTube URLの抽出は undetected_scraper.py と同じ処理を使います。
+
+※ Cloudflareのチェックが有効な期間は弾かれることがあります。
+  その場合は undetected_scraper.py を使ってください。
+
+インストール:
+pip install aiohttp
+
+使い方:
+python async_fetcher.py
+
+ローカルでの動作確認・速度計測:
+1. python local_yutura_server.py を起動
+2. 設定の base_url を 'http://127.0.0.1:8765' にして python async_fetcher.py
+"""
+
+from collections import defaultdict
+from urllib.parse import urlsplit, urlunsplit
+import asyncio
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+import metrics
+import page_archive
+from rate_limiter import TokenBucket
+import result_journal
+from undetected_scraper import (
+    FETCH_ERROR,
+    apply_fetch_result,
+    extract_youtube_url,
+    load_channels,
+    load_existing_results,
+    make_result_recorder,
+    needs_fetch,
+    print_progress_summary,
+    save_results,
+    select_targets,
+    time_is_up,
+)
+import url_cache
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36')
+
+# 再試行するHTTPステータス
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def rewrite_url(url, base_url=None):
+    """base_url が指定されていれば、URLのスキーム・ホストを置き換える（ローカルサーバー用）"""
+    if not base_url:
+        return url
+    base = urlsplit(base_url)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, parts.fragment))
+
+async def fetch_page(session, url, buckets, retries=2):
+    """ページを取得してHTMLを返す（取得できなければNone）"""
+    bucket = buckets[urlsplit(url).netloc]
+
+    for attempt in range(retries + 1):
+        await bucket.acquire_async()
+        start = time.perf_counter()
+        try:
+            async with session.get(url) as response:
+                if response.status == 200:
+                    html = await response.text()
+                    metrics.observe('page_load', time.perf_counter() - start)
+                    return html
+                if response.status not in RETRY_STATUSES:
+                    metrics.incr('fetch_errors')
+                    print(f"  ⚠ HTTP {response.status}: {url}")
+                    return None
+                error = f"HTTP {response.status}"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = str(e) or type(e).__name__
+
+        if attempt < retries:
+            metrics.incr('retries')
+            await asyncio.sleep(2 ** attempt)
+
+    metrics.incr('fetch_errors')
+    print(f"  ⚠ エラー: {error} ({url})")
+    return None
+
+def _record_error(i, total, channel, stats, on_result):
+    """取得に失敗したチャンネルを記録（N/A にもキャッシュにもせず、次回また取得する）"""
+    stats['errors'] += 1
+    apply_fetch_result(channel, FETCH_ERROR)
+    print(f"[{i}/{total}] {channel['チャンネル名']}\n  ⚠ 取得に失敗しました（次回また取得します）")
+    on_result(channel, FETCH_ERROR)
+
+async def _worker(queue, session, buckets, total, backend, base_url, retries, stats, on_result, deadline, archive):
+    """キューからチャンネルを取り出して YouTube URL を取得"""
+    while True:
+        i, channel = await queue.get()
+        try:
+            if time_is_up(deadline):
+                # 制限時間を過ぎたら、残りは取得せずにキューを空にする
+                stats['skipped'] += 1
+                continue
+            html = await fetch_page(session, rewrite_url(channel['チャンネルURL'], base_url), buckets, retries)
+            if html is None:
+                # HTTPエラー・時間切れは「リンクのないページ」ではないので、N/A にもキャッシュにもしない
+                _record_error(i, total, channel, stats, on_result)
+                continue
+            with metrics.timer('extract'):
+                youtube_url = extract_youtube_url(html, backend)
+            if archive is not None:
+                # 保存（圧縮・ディスクへの書き込み）の間もほかのチャンネルの取得が進むよう、別スレッドで行う
+                await asyncio.to_thread(page_archive.archive_page, archive, channel['チャンネルURL'], html)
+
+            stats['done'] += 1
+            metrics.incr('fetched_pages')
+            apply_fetch_result(channel, youtube_url)
+            if youtube_url:
+                stats['found'] += 1
+                metrics.incr('found')
+                print(f"[{i}/{total}] {channel['チャンネル名']}\n  ✓ YouTube URL: {youtube_url}")
+            else:
+                print(f"[{i}/{total}] {channel['チャンネル名']}\n  ✗ YouTube URLが見つかりませんでした")
+            on_result(channel, youtube_url)
+            if stats['done'] % 10 == 0:
+                print(metrics.summary_line('fetched_pages'))
+        except Exception as e:
+            # 想定外のエラー（抽出処理の例外など）も1件の取得失敗として扱い、ワーカーは止めない
+            # （ワーカーが止まると残りのチャンネルの task_done() が呼ばれず、queue.join() が終わらない）
+            metrics.incr('fetch_errors')
+            print(f"  ⚠ エラー: {type(e).__name__}: {e} ({channel['チャンネルURL']})")
+            _record_error(i, total, channel, stats, on_result)
+        finally:
+            queue.task_done()
+
+async def resolve_channels(channels, concurrency=8, rate=2.0, burst=2, base_url=None,
+                           backend='auto', retries=2, timeout=30, on_result=None, targets=None, deadline=None,
+                           archive=None):
+    """未取得のチャンネルの YouTube URL を並行取得（channels を直接更新）
+
+    concurrency: 同時接続数の上限
+    rate:        ホストごとの秒間リクエスト数の上限
+    burst:       トークンバケットに溜められる最大リクエスト数
+    base_url:    取得先を置き換える場合のURL（例: 'http://127.0.0.1:8765'）
+    on_result:   1件処理するごとに on_result(チャンネル, YouTube URL / None / FETCH_ERROR) の形で呼ばれる関数
+    targets:     処理する (番号, チャンネル) のリスト（この順に取得。None=未取得のものすべて）
+    deadline:    制限時間（time.monotonic() の値。過ぎたら残りは取得しない。None=制限なし）
+    archive:     page_archive.PageArchive を渡すと、取得したページのHTMLを保存する
+
+    取得件数などの統計を返す
+    """
+    if aiohttp is None:
+        raise ImportError("aiohttp がインストールされていません（pip install aiohttp）")
+
+    if targets is None:
+        targets = [(i, ch) for i, ch in enumerate(channels, 1) if needs_fetch(ch)]
+    stats = {'done': 0, 'found': 0, 'errors': 0, 'skipped': 0, 'elapsed': 0.0}
+    on_result = on_result or (lambda channel, youtube_url: None)
+    if not targets:
+        return stats
+
+    queue = asyncio.Queue()
+    for item in targets:
+        queue.put_nowait(item)
+
+    buckets = defaultdict(lambda: TokenBucket(rate, burst))
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    start = time.perf_counter()
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout,
+                                     headers={'User-Agent': USER_AGENT}) as session:
+        workers = [
+            asyncio.create_task(_worker(queue, session, buckets, len(channels),
+                                        backend, base_url, retries, stats, on_result, deadline, archive))
+            for _ in range(min(concurrency, len(targets)))
+        ]
+        try:
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            stats['elapsed'] = time.perf_counter() - start
+
+    return stats
+
+def process_csv(input_csv, output_csv, concurrency=8, rate=2.0, burst=2, base_url=None, backend='auto',
+                cache_path=url_cache.DEFAULT_CACHE_PATH, ttl_days=90, negative_ttl_days=7,
+                max_minutes=None, max_fetch_attempts=5, archive_dir=page_archive.DEFAULT_ARCHIVE_DIR):
+    """CSVファイルを処理してYouTube URLを追加（非同期HTTP版）
+
+    cache_path 以降の引数は undetected_scraper.process_csv と同じ
+    """
+    print("=" * 60)
+    print("YouTube URL 取得開始（非同期HTTP版）")
+    print("=" * 60)
+    print(f"入力ファイル: {input_csv}")
+    print(f"出力ファイル: {output_csv}")
+    print(f"同時接続数: {concurrency} / 上限 {rate}件/秒")
+    if base_url:
+        print(f"取得先: {base_url}")
+    print("=" * 60)
+    print()
+
+    # 既存の出力ファイルをチェック（途中再開用）
+    existing_data = load_existing_results(output_csv)
+    channels = load_channels(input_csv, existing_data)
+    if channels is None:
+        return
+
+    print_progress_summary(channels, existing_data is not None)
+
+    # 他のタグ・過去の実行で取得済みのチャンネルはキャッシュから埋める
+    cache = url_cache.open_url_cache(cache_path) if cache_path else None
+    if cache is not None:
+        url_cache.seed(cache, channels)
+    targets = select_targets(channels, cache, ttl_days, negative_ttl_days, max_fetch_attempts)
+    deadline = time.monotonic() + max_minutes * 60 if max_minutes else None
+
+    stats = None
+    journal = result_journal.open_journal(result_journal.journal_path(output_csv))
+    archive = page_archive.open_archive(archive_dir) if targets else None
+    try:
+        # 取得結果は1件ごとにジャーナル・キャッシュへ記録
+        stats = asyncio.run(resolve_channels(
+            channels, concurrency, rate, burst, base_url, backend,
+            on_result=make_result_recorder(journal, cache, negative_ttl_days), targets=targets,
+            deadline=deadline, archive=archive
+        ))
+    except KeyboardInterrupt:
+        print("\n⚠ ユーザーによって中断されました")
+        print(f"💾 途中経過を保存します...")
+    finally:
+        journal.close()
+        if cache is not None:
+            cache.close()
+        if archive is not None:
+            archive.close()
+
+    # 結果を保存（出力CSVは最後に1回だけ書き出す）
+    save_results(channels, output_csv)
+
+    if stats and stats['done']:
+        print(f"\n⏱ {stats['done']}件を{stats['elapsed']:.1f}秒で取得 "
+              f"（{stats['done'] / stats['elapsed']:.2f}件/秒）")
+    if stats and stats['errors']:
+        print(f"⚠ {stats['errors']}件は取得に失敗しました（N/A にはせず、次回また取得します）")
+    if stats and stats['skipped']:
+        print(f"⏰ 制限時間に達したため、残り{stats['skipped']}件は次回に回します")
+    print(metrics.summary_line('fetched_pages'))
+
+    print("\n" + "=" * 60)
+    print("処理完了")
+    print("=" * 60)
+
+def main():
+    """メイン処理"""
+    # ========================================
+    # 設定
+    # ========================================
+    input_csv = '../data/output/yutura_batch_channels.csv'       # 入力CSVファイル
+    output_csv = '../data/output/yutura_with_youtube_urls.csv'   # 出力CSVファイル
+    concurrency = 8                                              # 同時接続数の上限
+    rate = 2.0                                                   # 秒間リクエスト数の上限（ホストごと）
+    burst = 2                                                    # 連続で送れるリクエスト数
+    base_url = None                                              # ローカルサーバーで試す場合は 'http://127.0.0.1:8765'
+    backend = 'auto'                                             # HTMLパーサー（auto / selectolax / lxml / bs4）
+    cache_path = '../data/cache/youtube_url_cache.sqlite'        # 全実行共通のYouTube URLキャッシュ（None=使わない）
+    max_minutes = None                                           # 取得に使う時間の上限（分。None=制限なし。優先度の高い順に取得）
+    archive_dir = '../data/archive'                              # 取得したページの保存先（None=保存しない。page_archive.py で再抽出）
+    metrics_file = '../data/metrics/async_fetcher.json'          # 処理時間・件数の記録（.prom も出力。None=保存しない）
+    # ========================================
+
+    process_csv(input_csv, output_csv, concurrency, rate, burst, base_url, backend, cache_path,
+                max_minutes=max_minutes, archive_dir=archive_dir)
+    if metrics_file:
+        metrics.write_metrics(metrics_file)
+
+if __name__ == '__main__':
+    main()
@@ -10,137 +10,445 @@ Cloudflareなどのブロックを完全に回避できます。
 3. すべて選択してコピー（Ctrl+A → Ctrl+C）
 4. html_files/ フォルダに page1.html, page2.html... として保存
 5. python batch_html_parser.py を実行
+
+複数のタグをまとめて処理する場合は、html_files/ 以下の manifest.csv に
+タグID・ページ番号・取得元URL・保存ファイル・取得日時を記録します（crawl_manifest.py 参照）。
 """
 
-from bs4 import BeautifulSoup
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
 import csv
+import io
+import itertools
 import os
 import glob
 
-def extract_channels(html_content):
-    """HTMLコンテンツからチャンネル情報を抽出"""
-    soup = BeautifulSoup(html_content, 'html.parser')
+import crawl_manifest
+import metrics
+import parse_cache
+import parser_backends
+
+# 各行には、どのタグ・ページから抽出したか（crawl_manifest.SOURCE_FIELDNAMES）も記録する
+CSV_FIELDNAMES = ['チャンネル名', 'チャンネルURL', 'チャンネル登録者数', 'チャンネル登録者数_数値',
+                  *crawl_manifest.SOURCE_FIELDNAMES]
+
+# Parquet で保存するときの列の型（登録者数で並べ替え・絞り込みしやすいよう数値は整数型）
+PARQUET_DTYPES = {
+    'チャンネル名': 'string',
+    'チャンネルURL': 'string',
+    'チャンネル登録者数': 'string',
+    'チャンネル登録者数_数値': 'Int64',
+    'タグID': 'string',
+    'ページ番号': 'Int64',
+    '取得元URL': 'string',
+    '保存ファイル': 'string',
+    '取得日時': 'string',
+}
+
+# 重複を除いたチャンネルの出現ページの記録（provenance_path 参照）の列
+PROVENANCE_FIELDNAMES = ['チャンネルURL', '出現回数', '出現ページ']
+
+def extract_channels(html_content, backend='auto'):
+    """HTMLコンテンツからチャンネル情報を抽出
+
+    backend: 'auto' / 'selectolax' / 'lxml' / 'bs4'（parser_backends.py 参照）
+    """
+    return parser_backends.extract_channels(html_content, backend)
+
+def parse_html_file(html_file, backend='auto'):
+    """HTMLファイル1件を読み込んでチャンネル情報を抽出
+
+    並列処理のワーカーからも呼ばれるため、例外は投げずに
+    (ファイル名, チャンネル一覧, エラー) の形で返す
+    """
+    try:
+        with metrics.timer('file_read'):
+            with open(html_file, 'r', encoding='utf-8') as f:
+                html_content = f.read()
+        with metrics.timer('parse'):
+            channels = extract_channels(html_content, backend)
+        return html_file, channels, None
+    except Exception as e:
+        return html_file, [], e
+
+def parse_html_chunk(html_files, backend='auto'):
+    """複数のHTMLファイルをまとめて解析（ワーカーへの受け渡し回数を減らすため）
+
+    (結果一覧, ワーカーで計測した値) を返す
+    """
+    results = [parse_html_file(html_file, backend) for html_file in html_files]
+    return results, metrics.drain()
+
+def _chunk_results(future):
+    """チャンクの解析結果を取り出し、ワーカーの計測値を親プロセスに足し込む"""
+    results, worker_metrics = future.result()
+    metrics.merge(worker_metrics)
+    return results
+
+def _iter_parallel(html_files, workers, backend):
+    """プロセスプールで解析し、元のファイル順で結果を返す
+
+    同時に投入するチャンク数を workers * 2 までに抑えるため、
+    ファイル数が増えても未出力の結果がメモリに溜まらない
+    """
+    # ファイル一覧をワーカー数に応じたチャンクに分割して処理
+    chunksize = max(1, min(16, len(html_files) // (workers * 4)))
+    chunks = (html_files[i:i + chunksize] for i in range(0, len(html_files), chunksize))
+    pending = deque()
+    # fork で起動したワーカーが親プロセスの計測値を引き継いで二重に数えないよう、起動時に消す
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=metrics.reset)
+    try:
+        for chunk in chunks:
+            pending.append(executor.submit(parse_html_chunk, chunk, backend))
+            if len(pending) >= workers * 2:
+                yield from _chunk_results(pending.popleft())
+        while pending:
+            yield from _chunk_results(pending.popleft())
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+def iter_parsed_files(html_files, workers=None, backend='auto', cache=None, digests=None):
+    """HTMLファイルを解析し、元のファイル順で結果を返すジェネレータ
+
+    workers: 並列プロセス数（None=CPUコア数、1=逐次処理）
+    backend: HTMLパーサーバックエンド
+    cache:   parse_cache.open_cache() の接続（None=キャッシュを使わない）
+    digests: {ファイル: 内容のハッシュ}。取り込み済みの索引などで分かっているファイルはハッシュを計算しない
+             （計算したハッシュもこの辞書に追加する）
+
+    (ファイル名, チャンネル一覧, エラー, キャッシュ利用有無) を返す
+    """
+    backend = parser_backends.resolve_backend(backend)
     
-    channel_list = soup.find('ul', class_='channel-list')
+    # キャッシュと内容ハッシュを照合し、新規・変更ファイルだけを解析対象にする
+    if digests is None:
+        digests = {}
+    hits = set()
+    if cache is not None:
+        cached_digests = parse_cache.load_digests(cache, backend)
+        for html_file in html_files:
+            if html_file not in digests:
+                try:
+                    digests[html_file] = parse_cache.file_digest(html_file)
+                except OSError:
+                    continue
+            if cached_digests.get(parse_cache.cache_key(html_file)) == digests[html_file]:
+                hits.add(html_file)
+    to_parse = [f for f in html_files if f not in hits]
     
-    if not channel_list:
-        return []
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(to_parse)))
     
-    channels = []
+    if workers == 1:
+        parsed = (parse_html_file(f, backend) for f in to_parse)
+    else:
+        parsed = _iter_parallel(to_parse, workers, backend)
     
-    for li in channel_list.find_all('li'):
-        try:
-            # チャンネル名
-            title_elem = li.find('p', class_='title')
-            channel_name = title_elem.text.strip() if title_elem else 'N/A'
-            
-            # チャンネルURL
-            more_link = li.find('a', href=True)
-            channel_id = more_link['href'] if more_link else 'N/A'
-            channel_url = f"https://yutura.net{channel_id}" if channel_id != 'N/A' else 'N/A'
-            
-            # チャンネル登録者数
-            people_icon = li.find('i', title='チャンネル登録者数')
-            subscribers = 'N/A'
-            if people_icon:
-                p_tag = people_icon.parent
-                if p_tag:
-                    icon_copy = people_icon.extract()
-                    subscribers = p_tag.get_text(strip=True)
-                    p_tag.insert(0, icon_copy)
+    try:
+        for html_file in html_files:
+            if html_file in hits:
+                with metrics.timer('cache_read'):
+                    rows = parse_cache.get_rows(cache, html_file, digests[html_file], backend)
+                metrics.incr('parsed_pages')
+                metrics.incr('cache_hits')
+                yield html_file, rows, None, True
+                continue
             
-            channels.append({
-                'チャンネル名': channel_name,
-                'チャンネルURL': channel_url,
-                'チャンネル登録者数': subscribers
-            })
-            
-        except Exception as e:
-            print(f"⚠ チャンネル情報の抽出中にエラー: {e}")
+            html_file, channels, error = next(parsed)
+            metrics.incr('parsed_pages')
+            if error is not None:
+                metrics.incr('parse_errors')
+            if cache is not None and error is None and html_file in digests:
+                with metrics.timer('cache_write'):
+                    parse_cache.put_rows(cache, html_file, digests[html_file], channels, backend)
+                    cache.commit()
+            yield html_file, channels, error, False
+    finally:
+        parsed.close()
+
+def channel_key(channel_url):
+    """重複判定用のキー（スキーム・www.・大文字小文字・クエリ・末尾のスラッシュの違いは無視）
+
+    URLがない（N/A）チャンネルは None（重複判定しない）
+    """
+    if not channel_url or channel_url == 'N/A':
+        return None
+    parts = urlsplit(channel_url.strip())
+    host = parts.netloc.lower().removeprefix('www.')
+    return host + parts.path.rstrip('/')
+
+def dedupe_channels(channels, source, provenance):
+    """provenance に記録済みのチャンネルを除き、初めて出てきたチャンネルだけを返す
+
+    provenance: {重複判定用のキー: {'チャンネルURL': 最初のURL, 'sources': [出現ページ, ...]}}
+                （複数のページにまたがって使い回す）
+    source:     channels を抽出したページ（ファイル名など）
+    """
+    unique = []
+    for channel in channels:
+        key = channel_key(channel['チャンネルURL'])
+        if key is None:
+            unique.append(channel)
             continue
-    
-    return channels
+        entry = provenance.get(key)
+        if entry is None:
+            provenance[key] = {'チャンネルURL': channel['チャンネルURL'], 'sources': [source]}
+            unique.append(channel)
+        else:
+            entry['sources'].append(source)
+    return unique
 
-def process_html_files(html_dir='../html_files'):
-    """HTMLファイルを一括処理"""
-    print("=" * 60)
-    print("ユーチュラ 複数HTML一括処理")
-    print("=" * 60)
-    print(f"HTMLフォルダ: {html_dir}")
-    print("=" * 60)
-    print()
-    
+def provenance_path(csv_file):
+    """チャンネルの出現ページの記録先（例: yutura_batch_channels.sources.csv）"""
+    return os.path.splitext(csv_file)[0] + '.sources.csv'
+
+def save_provenance(provenance, filename):
+    """各チャンネルがどのページに出てきたかを保存（出現ページは ; 区切り）"""
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    with open(filename, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(PROVENANCE_FIELDNAMES)
+        for entry in provenance.values():
+            sources = entry['sources']
+            writer.writerow([entry['チャンネルURL'], len(sources), ';'.join(dict.fromkeys(sources))])
+    print(f"✓ チャンネルの出現ページを {filename} に保存しました")
+
+def find_html_files(html_dir):
+    """処理対象のHTMLファイル一覧を取得（見つからなければ空リスト）"""
     # HTMLフォルダの存在確認
     if not os.path.exists(html_dir):
         print(f"✗ フォルダ '{html_dir}' が見つかりません。")
         print(f"  フォルダを作成してHTMLファイルを配置してください。")
         return []
     
-    # HTMLファイルを検索（page1.html, page2.html などの順番で）
-    html_files = sorted(glob.glob(os.path.join(html_dir, 'page*.html')))
+    # HTMLファイルを検索（page1.html, page2.html … page10.html の順番で）
+    html_files = sorted(glob.glob(os.path.join(html_dir, 'page*.html')), key=crawl_manifest.natural_key)
     
     if not html_files:
         # page*.html が見つからない場合、すべての.htmlファイルを対象
-        html_files = sorted(glob.glob(os.path.join(html_dir, '*.html')))
+        html_files = sorted(glob.glob(os.path.join(html_dir, '*.html')), key=crawl_manifest.natural_key)
     
     if not html_files:
         print(f"✗ HTMLファイルが見つかりません。")
         print(f"  {html_dir}/ フォルダに page1.html, page2.html... を配置してください。")
         return []
     
+    return html_files
+
+def find_crawl_entries(html_dir):
+    """処理するページ（crawl_manifest のエントリ）を処理する順に返す
+
+    html_dir 以下に manifest.csv があれば記録されたページ（複数タグ可）、なければ page*.html
+    """
+    manifests = crawl_manifest.find_manifests(html_dir) if os.path.isdir(html_dir) else []
+    if not manifests:
+        return crawl_manifest.entries_from_files(find_html_files(html_dir))
+    
+    entries = []
+    for entry in crawl_manifest.load_manifests(manifests):
+        if os.path.exists(entry['file']):
+            entries.append(entry)
+        else:
+            print(f"⚠ マニフェストに記録されたファイルが見つかりません: {entry['file']}")
+    tags = dict.fromkeys(entry['tag_id'] for entry in entries)
+    print(f"📂 マニフェスト{len(manifests)}件: {len(tags)}タグ・{len(entries)}ページ")
+    return entries
+
+def iter_html_channels(html_dir='../html_files', workers=None, backend='auto',
+                       cache_path=parse_cache.DEFAULT_CACHE_PATH, rebuild_cache=False,
+                       provenance=None, summary_every=50):
+    """HTMLファイルを一括処理し、チャンネル情報を1件ずつ返すジェネレータ
+
+    全件をリストに溜めないため、ページ数が増えてもメモリに残るのは重複判定用の記録（チャンネル数分）だけ
+    summary_every ファイルごとに処理速度のサマリーを1行表示する
+    それ以外の引数は process_html_files と同じ
+    """
+    print("=" * 60)
+    print("ユーチュラ 複数HTML一括処理")
+    print("=" * 60)
+    print(f"HTMLフォルダ: {html_dir}")
+    print(f"パーサー: {parser_backends.resolve_backend(backend)}")
+    print("=" * 60)
+    print()
+    
+    entries = find_crawl_entries(html_dir)
+    if not entries:
+        return
+    html_files = [entry['file'] for entry in entries]
+    
     print(f"✓ {len(html_files)}個のHTMLファイルを検出しました")
     print()
     
-    all_channels = []
+    total = 0
+    duplicates = 0
+    cache = parse_cache.open_cache(cache_path, rebuild_cache) if cache_path else None
+    cache_hits = 0
+    if provenance is None:
+        provenance = {}
     
-    for i, html_file in enumerate(html_files, 1):
-        filename = os.path.basename(html_file)
-        print(f"[{i}/{len(html_files)}] {filename}")
-        print("-" * 60)
-        
-        try:
-            # HTMLファイルを読み込み
-            with open(html_file, 'r', encoding='utf-8') as f:
-                html_content = f.read()
+    # 取り込み済みの索引にあるページは、ファイルを読まずに前回のハッシュを使う（辞書を引くだけ）
+    digests = {}
+    index = {}
+    if cache is not None:
+        # （索引はハッシュの計算を省くだけで、解析結果はキャッシュにある同じハッシュのものだけを使う）
+        index = crawl_manifest.load_index(cache)
+        for entry in entries:
+            digest = crawl_manifest.known_digest(index, entry)
+            if digest is not None:
+                digests[entry['file']] = digest
+        metrics.incr('index_hits', len(digests))
+    indexed = len(digests)
+    
+    try:
+        parsed = iter_parsed_files(html_files, workers, backend, cache, digests)
+        for i, (entry, (html_file, channels, error, cached)) in enumerate(zip(entries, parsed), 1):
+            filename = os.path.basename(html_file)
+            if summary_every and i % summary_every == 0:
+                print(metrics.summary_line('parsed_pages'))
+            label = f"タグ{entry['tag_id']} p{entry['page']} " if entry['tag_id'] else ""
+            print(f"[{i}/{len(html_files)}] {label}{filename}")
+            print("-" * 60)
             
-            # チャンネル情報を抽出
-            channels = extract_channels(html_content)
+            if error:
+                print(f"✗ エラー: {error}")
+                print()
+                continue
+            
+            if cached:
+                cache_hits += 1
+            if cache is not None and html_file in digests and crawl_manifest.entry_key(entry) not in index:
+                crawl_manifest.mark_ingested(cache, entry, digests[html_file])
+                cache.commit()
             
             if not channels:
                 print(f"⚠ チャンネル情報が見つかりませんでした")
             else:
-                print(f"✓ {len(channels)}件のチャンネル情報を抽出")
-                all_channels.extend(channels)
-                print(f"✓ 累計: {len(all_channels)}件")
+                source = "（キャッシュ）" if cached else ""
+                print(f"✓ {len(channels)}件のチャンネル情報を抽出{source}")
+                # 他のページ（他のタグ）で既に出てきたチャンネルは除く
+                extracted = len(channels)
+                channels = dedupe_channels(channels, crawl_manifest.source_label(entry), provenance)
+                # 各行に取得元（タグ・ページ・URL・ファイル・取得日時）を付ける
+                columns = crawl_manifest.source_columns(entry)
+                channels = [{**channel, **columns} for channel in channels]
+                if len(channels) < extracted:
+                    duplicates += extracted - len(channels)
+                    print(f"🔁 {extracted - len(channels)}件は他のページと重複しているため除きました")
+                total += len(channels)
+                metrics.incr('channels', len(channels))
+                metrics.incr('duplicates', extracted - len(channels))
+                print(f"✓ 累計: {total}件")
             
             print()
-            
-        except Exception as e:
-            print(f"✗ エラー: {e}")
-            print()
-            continue
+            yield from channels
+    finally:
+        if cache is not None:
+            cache.close()
+    
+    if cache is not None:
+        print(f"💾 キャッシュ: {cache_hits}件は変更なし（うち{indexed}件は取り込み済みの索引で判定） / "
+              f"{len(html_files) - cache_hits}件を解析")
+    
+    if duplicates:
+        print(f"🔁 重複: {duplicates}件を除きました（チャンネルURLで判定）")
     
     print("=" * 60)
-    print(f"処理完了: 全{len(html_files)}ファイル、合計{len(all_channels)}件")
+    print(f"処理完了: 全{len(html_files)}ファイル、合計{total}件")
+    print(metrics.summary_line('parsed_pages'))
     print("=" * 60)
-    
-    return all_channels
 
-def save_to_csv(channels, filename='../data/output/yutura_batch_channels.csv'):
-    """CSVファイルに保存"""
-    if not channels:
+def process_html_files(html_dir='../html_files', workers=None, backend='auto',
+                       cache_path=parse_cache.DEFAULT_CACHE_PATH, rebuild_cache=False, provenance=None):
+    """HTMLファイルを一括処理（複数のページに出てくるチャンネルは最初の1件だけ）
+
+    workers:       並列プロセス数（None=CPUコア数、1=逐次処理）
+    backend:       HTMLパーサーバックエンド（'auto'=bs4。'selectolax' / 'lxml' で高速化）
+    cache_path:    解析結果キャッシュのパス（None=キャッシュを使わない）
+    rebuild_cache: True の場合はキャッシュを破棄してすべて再解析
+    provenance:    空の辞書を渡すと、各チャンネルの出現ページを記録する（dedupe_channels 参照）
+    """
+    return list(iter_html_channels(html_dir, workers, backend, cache_path, rebuild_cache, provenance))
+
+def _flush_buffer(f, buffer):
+    """バッファに溜まった行をファイルへ書き出し、ディスクに反映させる"""
+    with metrics.timer('csv_write'):
+        f.write(buffer.getvalue())
+        buffer.seek(0)
+        buffer.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+
+def save_to_csv(channels, filename='../data/output/yutura_batch_channels.csv', flush_every=100):
+    """CSVファイルに保存
+
+    channels はリストでもジェネレータでもよく、受け取った行から順に書き込む
+    flush_every 件ごとにディスクへ書き出すので、途中で処理が止まっても
+    それまでの行は有効なCSVとして残る
+
+    保存した件数を返す
+    """
+    rows = iter(channels)
+    first = next(rows, None)
+    if first is None:
         print("\n保存するデータがありません")
-        return
+        return 0
     
     # 出力ディレクトリが存在しない場合は作成
     os.makedirs(os.path.dirname(filename), exist_ok=True)
     
+    count = 0
     with open(filename, 'w', encoding='utf-8-sig', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=['チャンネル名', 'チャンネルURL', 'チャンネル登録者数'])
+        # 行単位でバッファに書き、まとめてファイルへ書き出す（行の途中で途切れないように）
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDNAMES)
         writer.writeheader()
-        writer.writerows(channels)
+        try:
+            for row in itertools.chain([first], rows):
+                writer.writerow(row)
+                count += 1
+                if count % flush_every == 0:
+                    _flush_buffer(f, buffer)
+        finally:
+            _flush_buffer(f, buffer)
     
-    print(f"\n✓ {len(channels)}件のデータを {filename} に保存しました")
+    print(f"\n✓ {count}件のデータを {filename} に保存しました")
+    return count
+
+def save_to_parquet(csv_file, parquet_file):
+    """保存したCSVを、列の型つきの Parquet 形式でも保存（pyarrow が必要）
+
+    保存できた場合は True を返す
+    """
+    # 解析処理（ワーカープロセス）では使わないので、ここで読み込む
+    import pandas as pd
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("⚠ pyarrow がインストールされていないため、Parquet は保存しません（pip install pyarrow）")
+        return False
+    
+    df = pd.read_csv(csv_file, encoding='utf-8-sig', dtype='string', keep_default_na=False)
+    for column, dtype in PARQUET_DTYPES.items():
+        if column not in df.columns:
+            continue
+        if dtype == 'Int64':
+            df[column] = pd.to_numeric(df[column].replace('', pd.NA)).astype('Int64')
+        else:
+            df[column] = df[column].astype(dtype)
+    
+    os.makedirs(os.path.dirname(parquet_file) or '.', exist_ok=True)
+    df.to_parquet(parquet_file, index=False)
+    print(f"✓ {len(df)}件のデータを {parquet_file} に保存しました（Parquet）")
+    return True
+
+def _keep_head(rows, head, n=5):
+    """rows をそのまま流しつつ、先頭 n 件を head に控える"""
+    for row in rows:
+        if len(head) < n:
+            head.append(row)
+        yield row
 
 def main():
     """メイン処理"""
@@ -154,26 +462,39 @@ def main():
     # ========================================
     html_dir = '../html_files'                                  # HTMLファイルを配置するフォルダ
     output_filename = '../data/output/yutura_batch_channels.csv'  # 出力ファイル名
+    workers = None                                              # 並列プロセス数（None=CPUコア数、1=逐次処理）
+    backend = 'bs4'                                             # HTMLパーサー（bs4=従来と同じ結果 / selectolax / lxml は高速だが入れ子の壊れたページで結果が変わる）
+    cache_path = '../data/cache/parse_cache.sqlite'             # 解析結果キャッシュ（None=使わない）
+    rebuild_cache = False                                       # True=キャッシュを破棄してすべて再解析
+    flush_every = 100                                           # 何件ごとにCSVをディスクへ書き出すか
+    metrics_file = '../data/metrics/batch_html_parser.json'     # 処理時間・件数の記録（.prom も出力。None=保存しない）
+    parquet_filename = None                                     # Parquet でも保存する場合のパス（例: '../data/output/yutura_batch_channels.parquet'。pyarrow が必要）
     # ========================================
     
-    # HTMLファイルを処理
-    all_channels = process_html_files(html_dir)
+    # HTMLファイルを処理しながらCSVに書き込み（重複したチャンネルは除き、出現ページを記録）
+    provenance = {}
+    channels = iter_html_channels(html_dir, workers, backend, cache_path, rebuild_cache, provenance)
+    head = []
+    saved_count = save_to_csv(_keep_head(channels, head), output_filename, flush_every)
+    if saved_count:
+        save_provenance(provenance, provenance_path(output_filename))
+    if saved_count and parquet_filename:
+        save_to_parquet(output_filename, parquet_filename)
+    if metrics_file:
+        metrics.write_metrics(metrics_file)
     
     # 結果を表示
-    if all_channels:
+    if saved_count:
         print(f"\n{'=' * 60}")
         print("取得したチャンネル情報（最初の5件）")
         print('=' * 60)
-        for i, channel in enumerate(all_channels[:5], 1):
+        for i, channel in enumerate(head, 1):
             print(f"\n{i}. {channel['チャンネル名']}")
             print(f"   URL: {channel['チャンネルURL']}")
             print(f"   登録者数: {channel['チャンネル登録者数']}")
         
-        if len(all_channels) > 5:
-            print(f"\n... 他 {len(all_channels) - 5}件")
-        
-        # CSVに保存
-        save_to_csv(all_channels, output_filename)
+        if saved_count > 5:
+            print(f"\n... 他 {saved_count - 5}件")
         
         print(f"\n{'=' * 60}")
         print("すべての処理が完了しました！")
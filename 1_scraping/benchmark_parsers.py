@@ -0,0 +1,66 @@
+"""
+HTMLパーサー速度比較スクリプト
+
+html_files/ に保存したページを使って、利用可能なパーサーバックエンドごとに
+extract_channels の処理時間を計測し、bs4（従来の処理）との速度差を表示します。
+あわせて、抽出結果が bs4 と完全に一致するかも確認します。
+
+使い方:
+python benchmark_parsers.py
+"""
+
+import glob
+import os
+import time
+
+import parser_backends
+
+def benchmark_backend(pages, backend, repeat=3):
+    """全ページの解析を repeat 回行い、最速の1回の (秒/ページ, 抽出結果) を返す"""
+    best = None
+    results = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [parser_backends.extract_channels(html, backend) for html in pages]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(pages), results
+
+def main():
+    """メイン処理"""
+    # ========================================
+    # 設定
+    # ========================================
+    html_dir = '../html_files'  # 計測に使うHTMLファイルのフォルダ
+    repeat = 3                  # 計測回数（最速の値を採用）
+    # ========================================
+
+    html_files = sorted(glob.glob(os.path.join(html_dir, '*.html')))
+    pages = []
+    for html_file in html_files:
+        with open(html_file, 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+
+    if not pages:
+        print(f"✗ {html_dir}/ にHTMLファイルがありません")
+        return
+
+    print("=" * 60)
+    print("HTMLパーサー速度比較")
+    print("=" * 60)
+    print(f"対象: {len(pages)}ページ / 計測{repeat}回")
+    print()
+
+    baseline, expected = benchmark_backend(pages, 'bs4', repeat)
+
+    for backend in parser_backends.available_backends():
+        per_page, results = benchmark_backend(pages, backend, repeat)
+        same = '✓ 一致' if results == expected else '✗ 不一致'
+        print(f"{backend:<11} {per_page * 1000:8.2f} ms/ページ  "
+              f"x{baseline / per_page:5.1f}  {same}")
+
+    print()
+    print("=" * 60)
+
+if __name__ == '__main__':
+    main()
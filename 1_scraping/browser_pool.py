@@ -0,0 +1,149 @@
+"""
+ブラウザワーカープール
+
+複数のブラウザ（undetected-chromedriver）を同時に動かし、共有キューから
+チャンネルURLを1件ずつ取り出して YouTube URL を取得します。
+
+- ブラウザが落ちた・固まった場合は、そのブラウザを起動し直して
+  処理中だったチャンネルをキューに戻します（max_attempts 回まで）
+- 全ワーカー合計のリクエスト数は max_rate 件/秒 以下に抑えます
+- deadline（制限時間）を過ぎたら、キューに残ったチャンネルは取得せずに終えます
+
+undetected_scraper.process_csv(workers=N) から使われます。
+"""
+
+import queue
+import threading
+import time
+
+import metrics
+from rate_limiter import TokenBucket
+from undetected_scraper import FETCH_ERROR, apply_fetch_result, fetch_youtube_url, setup_driver, time_is_up
+
+def _quit_driver(driver):
+    """ブラウザを閉じる（既に落ちている場合のエラーは無視）"""
+    if driver is None:
+        return
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+def _start_driver(page_load_timeout):
+    """ブラウザを起動し、読み込みのタイムアウトを設定する"""
+    driver = setup_driver()
+    # 応答のないページで固まらないよう、読み込みに上限を設ける
+    driver.set_page_load_timeout(page_load_timeout)
+    driver.set_script_timeout(page_load_timeout)
+    return driver
+
+def _worker(worker_id, work_queue, bucket, stop, lock, options, on_result):
+    """キューからチャンネルを取り出して処理するワーカー"""
+    driver = None
+    try:
+        while not stop.is_set():
+            try:
+                i, total, channel, attempts = work_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            if time_is_up(options['deadline']):
+                # 制限時間を過ぎたら、残りは取得せずにキューを空にする
+                with lock:
+                    options['skipped'] += 1
+                work_queue.task_done()
+                continue
+
+            try:
+                if driver is None:
+                    driver = _start_driver(options['page_load_timeout'])
+
+                bucket.acquire()
+                youtube_url = fetch_youtube_url(driver, channel['チャンネルURL'], options['wait_time'],
+                                                options['backend'], options['timings'], options['archive'])
+            except Exception as e:
+                # ブラウザが落ちた・固まった → 起動し直して、このチャンネルはキューに戻す
+                metrics.incr('fetch_errors')
+                with lock:
+                    print(f"  ⚠ [ワーカー{worker_id}] エラー: {e}")
+                _quit_driver(driver)
+                driver = None
+                if attempts + 1 < options['max_attempts']:
+                    with lock:
+                        print(f"  💡 [ワーカー{worker_id}] ブラウザを再起動して再試行します")
+                    metrics.incr('retries')
+                    work_queue.put((i, total, channel, attempts + 1))
+                else:
+                    # 取得できなかっただけなので N/A にはせず、次回また取得する
+                    apply_fetch_result(channel, FETCH_ERROR)
+                    with lock:
+                        print(f"[{i}/{total}] {channel['チャンネル名']}\n  ⚠ {options['max_attempts']}回失敗したためスキップします")
+                        on_result(channel, FETCH_ERROR)
+                work_queue.task_done()
+                continue
+
+            apply_fetch_result(channel, youtube_url)
+            with lock:
+                if youtube_url:
+                    print(f"[{i}/{total}] {channel['チャンネル名']}\n  ✓ YouTube URL: {youtube_url}")
+                else:
+                    print(f"[{i}/{total}] {channel['チャンネル名']}\n  ✗ YouTube URLが見つかりませんでした")
+                on_result(channel, youtube_url)
+                if metrics.count('fetched_pages') % 10 == 0:
+                    print(metrics.summary_line('fetched_pages'))
+            work_queue.task_done()
+    finally:
+        _quit_driver(driver)
+
+def run_browser_pool(channels, targets, workers=2, max_rate=0.5, wait_time=5, backend='auto',
+                     max_attempts=3, page_load_timeout=30, timings=None, on_result=None, deadline=None,
+                     archive=None):
+    """複数のブラウザで targets の YouTube URL を取得（channels の各辞書を直接更新）
+
+    targets:      処理するチャンネルの (番号, チャンネル) のリスト（この順に取り出す）
+    workers:      同時に動かすブラウザ数
+    max_rate:     全ワーカー合計の秒間リクエスト数の上限
+    max_attempts: ブラウザのエラーで失敗したときの最大試行回数
+    on_result:    1件処理するごとに on_result(チャンネル, YouTube URL / None / FETCH_ERROR) の形で呼ばれる（ロック内）
+    deadline:     制限時間（time.monotonic() の値。None=制限なし）
+    archive:      page_archive.PageArchive を渡すと、開いたページのHTMLを保存する
+    """
+    work_queue = queue.Queue()
+    for i, channel in targets:
+        work_queue.put((i, len(channels), channel, 0))
+
+    options = {
+        'wait_time': wait_time,
+        'backend': backend,
+        'max_attempts': max_attempts,
+        'page_load_timeout': page_load_timeout,
+        'timings': timings,
+        'deadline': deadline,
+        'archive': archive,
+        'skipped': 0,
+    }
+    bucket = TokenBucket(max_rate, burst=1)
+    stop = threading.Event()
+    lock = threading.Lock()
+    on_result = on_result or (lambda channel, youtube_url: None)
+
+    threads = [
+        threading.Thread(target=_worker, args=(n, work_queue, bucket, stop, lock, options, on_result),
+                         daemon=True)
+        for n in range(1, min(workers, len(targets)) + 1)
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        # キューが空になる（またはワーカーが全滅する）まで待つ
+        while work_queue.unfinished_tasks and any(t.is_alive() for t in threads):
+            time.sleep(0.5)
+    finally:
+        # 中断時も、各ワーカーは処理中の1件を終えてからブラウザを閉じる
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    if options['skipped']:
+        print(f"⏰ 制限時間に達したため、残り{options['skipped']}件は次回に回します")
@@ -0,0 +1,266 @@
+"""
+タグ一覧ページのクロール記録（マニフェスト）
+
+保存した一覧ページ1つにつき1行、どのタグの何ページ目を、どのURLから、いつ取得して、
+どのファイルに保存したかを manifest.csv に記録します。batch_html_parser.py は
+html_files/ 以下のマニフェストをすべて読み込み、複数のタグのページを1回で処理します。
+
+manifest.csv の列:
+    tag_id      タグID（例: 4662）
+    page        ページ番号（1, 2, 3...）
+    source_url  取得元のURL（例: https://yutura.net/tag/4662/?p=2）
+    file        保存したHTMLファイル（マニフェストのあるフォルダからの相対パス）
+    fetched_at  取得日時（例: 2024-05-01T12:00:00）
+
+- ページはタグID・ページ番号の順（自然順。page10 は page2 の後）に処理します
+- 同じタグ・ページの行が複数あれば、取得日時の新しい行を使います
+- 取り込み済みの行（タグ・ページ・取得日時・ファイルが同じで、ファイルも変わっていないもの）は
+  索引（解析キャッシュと同じ SQLite の ingested_entries テーブル）で判定し、
+  ファイルを読み直さずにキャッシュの解析結果を使います
+
+マニフェストがなければ、これまでどおり html_files/page*.html を処理します。
+
+使い方（タグごとのフォルダに保存したHTMLからマニフェストを作る）:
+1. html_files/4662/page1.html, page2.html... のように、タグIDのフォルダに保存
+2. python crawl_manifest.py を実行 → html_files/manifest.csv に追記
+"""
+
+from datetime import datetime
+import csv
+import glob
+import os
+import re
+import time
+
+MANIFEST_FILENAME = 'manifest.csv'
+MANIFEST_FIELDNAMES = ['tag_id', 'page', 'source_url', 'file', 'fetched_at']
+
+# 抽出した各行に付ける取得元の列
+SOURCE_FIELDNAMES = ['タグID', 'ページ番号', '取得元URL', '保存ファイル', '取得日時']
+
+TAG_URL = 'https://yutura.net/tag/{tag_id}/'
+
+_NUMBER_RE = re.compile(r'(\d+)')
+
+def natural_key(text):
+    """自然順の並べ替えキー（'page10' は 'page2' の後）"""
+    return [int(part) if part.isdigit() else part.lower() for part in _NUMBER_RE.split(text)]
+
+def page_number(filename):
+    """ファイル名に含まれる最後の数字（page12.html → 12。なければ None）"""
+    numbers = _NUMBER_RE.findall(os.path.basename(filename))
+    return int(numbers[-1]) if numbers else None
+
+def tag_page_url(tag_id, page):
+    """タグ一覧ページのURL（1ページ目はクエリなし）"""
+    url = TAG_URL.format(tag_id=tag_id)
+    return url if page == 1 else f'{url}?p={page}'
+
+# ========================================
+# マニフェストの読み書き
+# ========================================
+
+def find_manifests(html_dir):
+    """html_dir 以下（サブフォルダも含む）の manifest.csv を自然順で返す"""
+    paths = glob.glob(os.path.join(html_dir, '**', MANIFEST_FILENAME), recursive=True)
+    return sorted(paths, key=natural_key)
+
+def load_manifest(path):
+    """マニフェストを読み込み、エントリ（辞書）のリストを返す
+
+    file はマニフェストのあるフォルダからの相対パスを解決したパスにする
+    必要な列が欠けた行・ページ番号が数字でない行は読み飛ばす
+    """
+    base_dir = os.path.dirname(path)
+    entries = []
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for line_no, row in enumerate(csv.DictReader(f), 2):
+            try:
+                page = int(row['page'])
+            except (KeyError, TypeError, ValueError):
+                page = None
+            if page is None or not row.get('file'):
+                print(f"⚠ マニフェストの{line_no}行目を読み飛ばしました（page・file が必要です）: {path}")
+                continue
+            entries.append({
+                'tag_id': (row.get('tag_id') or '').strip(),
+                'page': page,
+                'source_url': (row.get('source_url') or '').strip(),
+                'file': os.path.normpath(os.path.join(base_dir, row['file'].strip())),
+                'fetched_at': (row.get('fetched_at') or '').strip(),
+            })
+    return entries
+
+def sort_entries(entries):
+    """タグID・ページ番号の順に並べ、同じタグ・ページは取得日時の新しいものだけを残す"""
+    latest = {}
+    for entry in entries:
+        key = (entry['tag_id'], entry['page'])
+        if key not in latest or entry['fetched_at'] >= latest[key]['fetched_at']:
+            latest[key] = entry
+    return sorted(latest.values(), key=lambda e: (natural_key(e['tag_id']), e['page'], natural_key(e['file'])))
+
+def load_manifests(paths):
+    """複数のマニフェストを読み込み、処理する順に並べたエントリを返す"""
+    entries = []
+    for path in paths:
+        entries.extend(load_manifest(path))
+    return sort_entries(entries)
+
+def entries_from_files(html_files):
+    """マニフェストのない page*.html をエントリにする（タグID・取得元URLは空）"""
+    return [
+        {
+            'tag_id': '',
+            'page': page_number(html_file),
+            'source_url': '',
+            'file': html_file,
+            'fetched_at': '',
+        }
+        for html_file in html_files
+    ]
+
+def append_entries(manifest_path, entries):
+    """マニフェストにエントリを追記（ファイルがなければヘッダーを書く）
+
+    entries の file は絶対パスでもよい（マニフェストのフォルダからの相対パスにして保存）
+    """
+    base_dir = os.path.dirname(manifest_path)
+    os.makedirs(base_dir or '.', exist_ok=True)
+    write_header = not os.path.exists(manifest_path)
+    with open(manifest_path, 'a', encoding='utf-8-sig' if write_header else 'utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=MANIFEST_FIELDNAMES)
+        if write_header:
+            writer.writeheader()
+        for entry in entries:
+            writer.writerow({
+                **entry,
+                'file': os.path.relpath(entry['file'], base_dir or '.').replace(os.sep, '/'),
+                'fetched_at': entry.get('fetched_at') or datetime.now().isoformat(timespec='seconds'),
+            })
+
+# ========================================
+# 抽出した行の取得元
+# ========================================
+
+def source_columns(entry):
+    """抽出した各行に付ける取得元の列（SOURCE_FIELDNAMES）"""
+    return {
+        'タグID': entry['tag_id'],
+        'ページ番号': '' if entry['page'] is None else entry['page'],
+        '取得元URL': entry['source_url'],
+        '保存ファイル': os.path.basename(entry['file']),
+        '取得日時': entry['fetched_at'],
+    }
+
+def source_label(entry):
+    """出現ページの記録（.sources.csv）に使う名前（取得元URL、なければファイル名）"""
+    return entry['source_url'] or os.path.basename(entry['file'])
+
+# ========================================
+# 取り込み済みの索引
+# ========================================
+
+def entry_key(entry):
+    """索引のキー（タグ・ページ・取得日時・ファイルが同じなら同じ取り込み）"""
+    return '\t'.join([entry['tag_id'], str(entry['page']), entry['fetched_at'], os.path.abspath(entry['file'])])
+
+def open_index(conn):
+    """取り込み済みの索引テーブルを作成（parse_cache.open_cache() の接続に作る）"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ingested_entries (
+            entry_key TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            digest TEXT NOT NULL,
+            ingested_at REAL NOT NULL
+        )
+    ''')
+    conn.commit()
+
+def load_index(conn):
+    """{索引のキー: (ファイルサイズ, 更新日時, 内容のハッシュ)}（1回読み込めば、以降は辞書を引くだけ）"""
+    open_index(conn)
+    rows = conn.execute('SELECT entry_key, size, mtime_ns, digest FROM ingested_entries')
+    return {key: (size, mtime_ns, digest) for key, size, mtime_ns, digest in rows}
+
+def known_digest(index, entry):
+    """取り込み済みで、ファイルも変わっていなければ内容のハッシュを返す（ファイルは読まない）"""
+    indexed = index.get(entry_key(entry))
+    if indexed is None:
+        return None
+    try:
+        stat = os.stat(entry['file'])
+    except OSError:
+        return None
+    size, mtime_ns, digest = indexed
+    return digest if (stat.st_size, stat.st_mtime_ns) == (size, mtime_ns) else None
+
+def mark_ingested(conn, entry, digest):
+    """取り込んだエントリを索引に記録（コミットは呼び出し側で行う）"""
+    stat = os.stat(entry['file'])
+    conn.execute(
+        'INSERT OR REPLACE INTO ingested_entries (entry_key, size, mtime_ns, digest, ingested_at) '
+        'VALUES (?, ?, ?, ?, ?)',
+        (entry_key(entry), stat.st_size, stat.st_mtime_ns, digest, time.time())
+    )
+
+# ========================================
+# タグごとのフォルダからマニフェストを作る
+# ========================================
+
+def scan_tag_dirs(html_dir, manifest_path):
+    """html_dir/<タグID>/page*.html のうち、マニフェストにまだないものをエントリにして返す
+
+    取得日時はファイルの更新日時
+    """
+    listed = set()
+    if os.path.exists(manifest_path):
+        listed = {os.path.abspath(entry['file']) for entry in load_manifest(manifest_path)}
+
+    entries = []
+    for tag_dir in sorted(glob.glob(os.path.join(html_dir, '*', '')), key=natural_key):
+        tag_id = os.path.basename(os.path.dirname(tag_dir))
+        for html_file in sorted(glob.glob(os.path.join(tag_dir, 'page*.html')), key=natural_key):
+            page = page_number(html_file)
+            if page is None or os.path.abspath(html_file) in listed:
+                continue
+            fetched_at = datetime.fromtimestamp(os.path.getmtime(html_file)).isoformat(timespec='seconds')
+            entries.append({
+                'tag_id': tag_id,
+                'page': page,
+                'source_url': tag_page_url(tag_id, page) if tag_id.isdigit() else '',
+                'file': html_file,
+                'fetched_at': fetched_at,
+            })
+    return entries
+
+def main():
+    """メイン処理"""
+    print("\n" + "=" * 60)
+    print("クロール記録（マニフェスト）の作成")
+    print("=" * 60)
+    print()
+
+    # ========================================
+    # 設定
+    # ========================================
+    html_dir = '../html_files'                                   # タグIDごとのフォルダを置いたフォルダ
+    manifest_path = '../html_files/manifest.csv'                 # 追記するマニフェスト
+    # ========================================
+
+    entries = scan_tag_dirs(html_dir, manifest_path)
+    if not entries:
+        print("✓ マニフェストに追加するページはありません")
+        print(f"💡 {html_dir}/<タグID>/page1.html, page2.html... の形で保存してください")
+        return
+
+    append_entries(manifest_path, entries)
+    tags = dict.fromkeys(entry['tag_id'] for entry in entries)
+    print(f"✓ {len(tags)}タグ・{len(entries)}ページを {manifest_path} に追記しました")
+    for tag_id in tags:
+        pages = [entry['page'] for entry in entries if entry['tag_id'] == tag_id]
+        print(f"  タグ {tag_id}: {len(pages)}ページ（{min(pages)}〜{max(pages)}）")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+YouTube URL 取得の優先順位付け
+
+限られた時間（max_minutes）でも価値の高いチャンネルから取得できるよう、
+取得対象を次の区分の順に並べます（同じ区分の中では登録者数の多い順）。
+
+1. new     一度も取得していないチャンネル
+2. stale   取得済みだが、キャッシュの有効期限（ttl_days）が切れたチャンネル
+3. failed  前回見つからなかったチャンネル
+
+失敗したチャンネルは、失敗回数に応じて retry_base_days × 2^(失敗回数-1) 日
+（最大 max_backoff_days 日）空けてから再取得し、max_fetch_attempts 回失敗したら
+それ以上は取得しません。失敗回数と次に取得できる日時は、YouTube URL キャッシュと
+同じ SQLite ファイルの fetch_attempts テーブルに保存します。
+ここでの「失敗」は、ページを開けたのにYouTubeリンクがなかった場合だけです。
+HTTPエラー・時間切れ・ブラウザのエラーなど一時的な取得失敗は数えず
+（undetected_scraper.FETCH_ERROR）、次回の実行でまた取得します。
+
+undetected_scraper.select_targets から使われます。
+"""
+
+import time
+
+import url_cache
+
+TIERS = ('new', 'stale', 'failed')
+
+TIER_LABELS = {
+    'new': '未取得',
+    'stale': '有効期限切れ',
+    'failed': '失敗の再試行',
+}
+
+def open_schedule(conn):
+    """失敗回数を記録するテーブルを作成（url_cache.open_url_cache() の接続に作る）"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS fetch_attempts (
+            yutura_url TEXT PRIMARY KEY,
+            failures INTEGER NOT NULL,
+            last_attempt_at REAL NOT NULL,
+            next_attempt_at REAL NOT NULL
+        )
+    ''')
+    conn.commit()
+
+def backoff_seconds(failures, retry_base_days=7, max_backoff_days=180):
+    """failures 回失敗したチャンネルを、次に取得するまで空ける秒数"""
+    days = min(retry_base_days * 2 ** max(0, failures - 1), max_backoff_days)
+    return days * url_cache.DAY
+
+def load_attempts(conn):
+    """{チャンネルURL: (失敗回数, 次に取得できる日時)}"""
+    open_schedule(conn)
+    rows = conn.execute('SELECT yutura_url, failures, next_attempt_at FROM fetch_attempts')
+    return {yutura_url: (failures, next_at) for yutura_url, failures, next_at in rows}
+
+def record_attempt(conn, yutura_url, found, retry_base_days=7, max_backoff_days=180, now=None):
+    """取得結果を記録（見つかれば失敗回数を消し、見つからなければ失敗回数を1増やす）
+
+    ページを開けた場合にだけ呼ぶ（一時的な取得失敗で呼ぶと、数回で取得されなくなってしまう）
+    """
+    now = now or time.time()
+    if found:
+        conn.execute('DELETE FROM fetch_attempts WHERE yutura_url = ?', (yutura_url,))
+    else:
+        row = conn.execute('SELECT failures FROM fetch_attempts WHERE yutura_url = ?',
+                           (yutura_url,)).fetchone()
+        failures = (row[0] if row else 0) + 1
+        conn.execute(
+            'INSERT OR REPLACE INTO fetch_attempts (yutura_url, failures, last_attempt_at, next_attempt_at) '
+            'VALUES (?, ?, ?, ?)',
+            (yutura_url, failures, now, now + backoff_seconds(failures, retry_base_days, max_backoff_days))
+        )
+    conn.commit()
+
+def subscriber_count(channel):
+    """並べ替え用の登録者数（数値がない古いCSVなどは -1）"""
+    try:
+        return int(channel.get('チャンネル登録者数_数値'))
+    except (TypeError, ValueError):
+        return -1
+
+def _has_url(value):
+    return bool(value) and value != 'N/A'
+
+def plan(channels, conn=None, ttl_days=90, negative_ttl_days=7, max_fetch_attempts=5, now=None):
+    """取得対象を優先順に並べる
+
+    conn（url_cache の接続）を渡すと、未取得のチャンネルのうちキャッシュに有効な結果があるものは
+    ページを開かずにキャッシュの値で埋める。まだ再取得しない失敗チャンネルは 'N/A' で埋める
+
+    (優先順の [(番号, チャンネル, 区分)], {区分や理由: 件数}) を返す
+    """
+    now = now or time.time()
+    ttl = ttl_days * url_cache.DAY
+    negative_ttl = negative_ttl_days * url_cache.DAY
+    cached = url_cache.load_entries(conn) if conn is not None else {}
+    attempts = load_attempts(conn) if conn is not None else {}
+
+    stats = dict.fromkeys([*TIERS, 'cache_hits', 'waiting', 'exhausted'], 0)
+    scheduled = []
+
+    for i, channel in enumerate(channels, 1):
+        yutura_url = channel['チャンネルURL']
+        attempt = attempts.get(yutura_url)
+        if attempt and attempt[0] >= max_fetch_attempts:
+            # 上限まで失敗したチャンネルは取得しない
+            if not _has_url(channel.get('YouTube URL')):
+                channel['YouTube URL'] = 'N/A'
+            stats['exhausted'] += 1
+            continue
+        waiting = attempt is not None and now < attempt[1]
+
+        youtube_url, fetched_at = cached.get(yutura_url, (None, None))
+        if not _has_url(channel.get('YouTube URL')) and youtube_url:
+            # 他のタグ・過去の実行で取得済み（期限切れでも、再取得に失敗したときのために埋めておく）
+            channel['YouTube URL'] = youtube_url
+            if now - fetched_at < ttl:
+                stats['cache_hits'] += 1
+                continue
+
+        if _has_url(channel.get('YouTube URL')):
+            # 取得済み。キャッシュの有効期限が切れていれば再取得
+            if fetched_at is not None and now - fetched_at >= ttl:
+                if waiting:
+                    stats['waiting'] += 1
+                else:
+                    scheduled.append((i, channel, 'stale'))
+            continue
+
+        if waiting or (attempt is None and fetched_at is not None and now - fetched_at < negative_ttl):
+            # 前回見つからなかったチャンネルは、間隔を空けるまで再取得しない
+            # （失敗回数の記録がない古いキャッシュは negative_ttl_days 日）
+            channel['YouTube URL'] = 'N/A'
+            stats['waiting'] += 1
+        elif attempt is not None or channel.get('YouTube URL') == 'N/A' or fetched_at is not None:
+            scheduled.append((i, channel, 'failed'))
+        else:
+            scheduled.append((i, channel, 'new'))
+
+    scheduled.sort(key=lambda item: (TIERS.index(item[2]), -subscriber_count(item[1]), item[0]))
+    for _, _, tier in scheduled:
+        stats[tier] += 1
+    return scheduled, stats
@@ -0,0 +1,114 @@
+"""
+ユーチュラ チャンネルページのローカル代替サーバー
+
+記録済みのチャンネルページを yutura.net と同じURLパスで返す簡易サーバーです。
+async_fetcher.py の動作確認や速度計測を、ネットワークに出ずに行えます。
+
+ページの配置:
+  https://yutura.net/channel/12345/ → {pages_dir}/channel/12345.html
+  （記録されていないパスは404を返します）
+
+使い方:
+1. python local_yutura_server.py を実行（記録ページがなければサンプルを生成）
+2. async_fetcher.py の base_url を 'http://127.0.0.1:8765' にして実行
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+import os
+import random
+import time
+
+def page_path(pages_dir, url):
+    """URL（またはパス）に対応する記録ページのファイルパス"""
+    path = urlsplit(url).path.strip('/')
+    if not path or '..' in path.split('/'):
+        return None
+    return os.path.join(pages_dir, *path.split('/')) + '.html'
+
+def save_recorded_page(pages_dir, url, html_content):
+    """取得したページを記録ページとして保存"""
+    path = page_path(pages_dir, url)
+    if path is None:
+        return None
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html_content)
+    return path
+
+def generate_sample_pages(pages_dir, count=200, missing_rate=0.1, seed=0):
+    """動作確認用のチャンネルページを生成（missing_rate の割合でYouTubeリンクなし）"""
+    rng = random.Random(seed)
+    styles = ['channel/UC{:022d}', '@handle{}', 'c/custom{}', 'user/user{}']
+    for i in range(1, count + 1):
+        if rng.random() < missing_rate:
+            link = ''
+        else:
+            youtube_path = rng.choice(styles).format(i)
+            link = f'<a href="https://www.youtube.com/{youtube_path}" target="_blank">YouTube</a>'
+        filler = ''.join(f'<p>説明文 {i}-{j}</p>' for j in range(50))
+        html = (
+            f'<html><head><title>チャンネル{i} | ユーチュラ</title></head><body>'
+            f'<h1>チャンネル{i}</h1><div class="channel-data">{filler}{link}</div>'
+            f'</body></html>'
+        )
+        save_recorded_page(pages_dir, f'/channel/{i}/', html)
+
+def make_handler(pages_dir, latency=0.0):
+    """記録ページを返すリクエストハンドラを作成"""
+
+    class RecordedPageHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+
+            path = page_path(pages_dir, self.path)
+            if path is None or not os.path.exists(path):
+                self.send_error(404)
+                return
+
+            with open(path, 'rb') as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # アクセスログは出さない（計測の邪魔になるため）
+            pass
+
+    return RecordedPageHandler
+
+def start_server(pages_dir, host='127.0.0.1', port=8765, latency=0.0):
+    """サーバーを作成して返す（serve_forever() で起動）"""
+    return ThreadingHTTPServer((host, port), make_handler(pages_dir, latency))
+
+def main():
+    """メイン処理"""
+    # ========================================
+    # 設定
+    # ========================================
+    pages_dir = '../data/recorded_pages'  # 記録ページのフォルダ
+    host = '127.0.0.1'                    # 待ち受けアドレス
+    port = 8765                           # 待ち受けポート
+    latency = 0.2                         # 応答までの疑似遅延（秒）
+    sample_count = 200                    # 記録ページがない場合に生成するサンプル数
+    # ========================================
+
+    if not os.path.exists(pages_dir):
+        print(f"💡 記録ページがないため、サンプルを{sample_count}件生成します: {pages_dir}")
+        generate_sample_pages(pages_dir, sample_count)
+
+    server = start_server(pages_dir, host, port, latency)
+    print(f"✓ ローカルサーバー起動: http://{host}:{port}/ （Ctrl+Cで終了）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n✓ サーバーを終了しました")
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,362 @@
+"""
+取得したチャンネルページの保存（圧縮・重複排除つき）とオフライン再抽出
+
+YouTube URL 取得で開いたチャンネルページの HTML を、抽出したあとも捨てずに保存します。
+抽出ルールを変えたとき（Twitter・Instagram のリンクも取りたい、YouTube のリンクを
+すべて取りたいなど）に、ページを取得し直さずにオフラインで抽出し直せます。
+
+保存先（archive_dir）:
+- pages.pack          圧縮した HTML を後ろに追記していくだけのファイル（既存の部分は書き換えない）
+- pages.index.sqlite  内容のハッシュ → pack 内の位置、チャンネルURL → 最後に取得した内容のハッシュ
+
+同じ内容のページは1回しか保存しません（内容の SHA-256 で判定）。
+書き込むのは1つのプロセスだけにしてください（pack の末尾に追記する位置はプロセス内のロックでしか
+守っていないため、同じ保存先に2つの取得処理から同時に書き込むと pack が壊れます）。
+保存に失敗してもYouTube URLの取得は続けます（archive_page 参照）。
+圧縮は zstandard があれば zstd（pip install zstandard）、なければ標準ライブラリの zlib を使います
+（どちらで圧縮したかは1件ごとに記録するので、途中で入れ替えても読めます）。
+
+使い方（オフライン再抽出）:
+python page_archive.py
+
+設定の extractor に 'youtube_url' / 'youtube_links' / 'sns_links'、または
+'モジュール名:関数名'（HTML文字列を受け取って結果を返す関数）を指定します。
+保存済みのページを複数プロセスで読み込み、ネットワークにはアクセスしません。
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+import csv
+import hashlib
+import importlib
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+import metrics
+import parser_backends
+
+DEFAULT_ARCHIVE_DIR = '../data/archive'
+
+PACK_FILENAME = 'pages.pack'
+INDEX_FILENAME = 'pages.index.sqlite'
+
+# 圧縮レベル（zstd は 1〜22、zlib は 1〜9）
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 6
+
+# 組み込みの抽出処理（'モジュール名:関数名'）
+EXTRACTORS = {
+    'youtube_url': 'undetected_scraper:extract_youtube_url',          # これまでと同じ YouTube URL 1件
+    'youtube_links': 'undetected_scraper:extract_youtube_candidates', # ページ内の YouTube リンクすべて
+    'sns_links': 'page_archive:extract_sns_links',                    # Twitter(X)・Instagram・TikTok のリンク
+}
+
+SNS_HOSTS = ('twitter.com', 'x.com', 'instagram.com', 'tiktok.com')
+
+REEXTRACT_FIELDNAMES = ['チャンネルURL', '取得日時', '抽出結果', 'エラー']
+
+# ========================================
+# 圧縮
+# ========================================
+
+def default_codec():
+    """新しく保存するページの圧縮形式（zstandard があれば 'zstd'）"""
+    return 'zstd' if zstandard is not None else 'zlib'
+
+def compress(data, codec):
+    """bytes を圧縮"""
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return zlib.compress(data, ZLIB_LEVEL)
+
+def decompress(data, codec):
+    """compress() したものを元に戻す"""
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImportError("zstd で保存されたページを読むには zstandard が必要です（pip install zstandard）")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+def read_page(pack_file, offset, size, codec):
+    """開いた pack ファイルから1ページ分を読み込んで HTML を返す"""
+    pack_file.seek(offset)
+    return decompress(pack_file.read(size), codec).decode('utf-8')
+
+# ========================================
+# 保存
+# ========================================
+
+class PageArchive:
+    """ページの保存先（pack ファイルと索引）
+
+    ブラウザワーカープールのスレッドから put() しても安全（内部でロックする）
+    書き込めるのは1つのプロセスだけ（別プロセスからの同時書き込みは守らない）
+    """
+
+    def __init__(self, archive_dir=DEFAULT_ARCHIVE_DIR):
+        os.makedirs(archive_dir, exist_ok=True)
+        self.archive_dir = archive_dir
+        self.pack_path = os.path.join(archive_dir, PACK_FILENAME)
+        self.codec = default_codec()
+        self._lock = threading.Lock()
+        self._pack = open(self.pack_path, 'ab')
+        self._conn = sqlite3.connect(os.path.join(archive_dir, INDEX_FILENAME), check_same_thread=False)
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                offset INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                raw_size INTEGER NOT NULL,
+                codec TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+        ''')
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        with self._lock:
+            self._pack.close()
+            self._conn.close()
+
+    def put(self, url, html, fetched_at=None):
+        """ページを保存（同じ内容が保存済みなら、チャンネルURLとの対応だけを記録）
+
+        内容のハッシュを返す
+        """
+        data = html.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        with metrics.timer('archive_write'), self._lock:
+            known = self._conn.execute('SELECT 1 FROM blobs WHERE digest = ?', (digest,)).fetchone()
+            if known:
+                metrics.incr('archive_duplicates')
+            else:
+                compressed = compress(data, self.codec)
+                # pack に書き終えてから索引に記録する（途中で落ちても索引が壊れた位置を指さない）
+                offset = self._pack.seek(0, os.SEEK_END)
+                self._pack.write(compressed)
+                self._pack.flush()
+                self._conn.execute(
+                    'INSERT INTO blobs (digest, offset, size, raw_size, codec) VALUES (?, ?, ?, ?, ?)',
+                    (digest, offset, len(compressed), len(data), self.codec)
+                )
+                metrics.incr('archived_pages')
+                metrics.incr('archive_bytes', len(compressed))
+            self._conn.execute(
+                'INSERT OR REPLACE INTO pages (url, digest, fetched_at) VALUES (?, ?, ?)',
+                (url, digest, fetched_at or time.time())
+            )
+            self._conn.commit()
+        return digest
+
+    def get(self, url):
+        """チャンネルURLの最後に取得したページの HTML（保存されていなければ None）"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT b.offset, b.size, b.codec FROM pages p JOIN blobs b ON b.digest = p.digest '
+                'WHERE p.url = ?', (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        with open(self.pack_path, 'rb') as f:
+            return read_page(f, *row)
+
+    def entries(self):
+        """保存済みページの [(チャンネルURL, 取得日時, pack 内の位置, サイズ, 圧縮形式)]（pack 内の位置順）"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT p.url, p.fetched_at, b.offset, b.size, b.codec FROM pages p '
+                'JOIN blobs b ON b.digest = p.digest ORDER BY b.offset, p.url'
+            ).fetchall()
+
+    def stats(self):
+        """{'pages': チャンネル数, 'blobs': 保存した内容の数, 'raw_bytes': 元の合計, 'stored_bytes': 圧縮後の合計}"""
+        with self._lock:
+            pages = self._conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+            blobs, raw_bytes, stored_bytes = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(size), 0) FROM blobs'
+            ).fetchone()
+        return {'pages': pages, 'blobs': blobs, 'raw_bytes': raw_bytes, 'stored_bytes': stored_bytes}
+
+def open_archive(archive_dir=DEFAULT_ARCHIVE_DIR):
+    """保存先を開く（archive_dir が None なら保存しない = None を返す）"""
+    return PageArchive(archive_dir) if archive_dir else None
+
+def archive_page(archive, url, html):
+    """取得したページを保存（archive が None なら何もしない）
+
+    保存はおまけなので、失敗しても警告を表示するだけで例外は投げない
+    （ディスクがいっぱいなどで保存できなくても、取得したYouTube URLは記録する）
+    """
+    if archive is None:
+        return
+    try:
+        archive.put(url, html)
+    except Exception as e:
+        metrics.incr('archive_errors')
+        print(f"  ⚠ ページを保存できませんでした（取得は続けます）: {e}")
+
+# ========================================
+# 抽出処理
+# ========================================
+
+def extract_sns_links(html_content, backend='auto'):
+    """Twitter(X)・Instagram・TikTok のリンクを出現順・重複なしで返す"""
+    links = []
+    for href in parser_backends.find_hrefs(html_content, None, backend):
+        host = urlsplit(href).netloc.lower()
+        host = host[4:] if host.startswith('www.') else host
+        if host in SNS_HOSTS and href not in links:
+            links.append(href)
+    return links
+
+def resolve_extractor(spec):
+    """'sns_links' などの名前、または 'モジュール名:関数名' から抽出関数を取り出す"""
+    spec = EXTRACTORS.get(spec, spec)
+    module_name, sep, func_name = spec.partition(':')
+    if not sep:
+        raise ValueError(f"抽出処理は {', '.join(EXTRACTORS)} か 'モジュール名:関数名' で指定してください: {spec}")
+    return getattr(importlib.import_module(module_name), func_name)
+
+def format_result(result):
+    """抽出結果をCSVのセルに書く文字列にする（リスト・辞書は JSON）"""
+    if result is None:
+        return 'N/A'
+    if isinstance(result, (list, tuple, dict)):
+        return json.dumps(result, ensure_ascii=False)
+    return str(result)
+
+def reextract_chunk(pack_path, entries, extractor):
+    """保存済みページをまとめて読み込んで抽出（ワーカープロセスで実行）
+
+    ([(チャンネルURL, 取得日時, 抽出結果, エラー)], ワーカーで計測した値) を返す
+    """
+    extract = resolve_extractor(extractor)
+    results = []
+    with open(pack_path, 'rb') as f:
+        for url, fetched_at, offset, size, codec in entries:
+            try:
+                with metrics.timer('archive_read'):
+                    html = read_page(f, offset, size, codec)
+                with metrics.timer('extract'):
+                    result = extract(html)
+                results.append((url, fetched_at, result, None))
+            except Exception as e:
+                metrics.incr('extract_errors')
+                results.append((url, fetched_at, None, e))
+            metrics.incr('reextracted_pages')
+    return results, metrics.drain()
+
+def _chunked(items, size):
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+def iter_reextracted(archive, extractor, workers=None):
+    """保存済みの全ページに extractor を実行し、(チャンネルURL, 取得日時, 抽出結果, エラー) を返すジェネレータ
+
+    workers: 並列プロセス数（None=CPUコア数、1=逐次処理）
+    """
+    entries = archive.entries()
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(entries) < 2:
+        results, worker_metrics = reextract_chunk(archive.pack_path, entries, extractor)
+        metrics.merge(worker_metrics)
+        yield from results
+        return
+
+    chunksize = max(1, min(64, len(entries) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=metrics.reset) as executor:
+        chunk_results = executor.map(reextract_chunk, itertools.repeat(archive.pack_path),
+                                     _chunked(entries, chunksize), itertools.repeat(extractor))
+        for results, worker_metrics in chunk_results:
+            metrics.merge(worker_metrics)
+            yield from results
+
+def reextract_archive(archive_dir, extractor, output_csv, workers=None):
+    """保存済みの全ページを抽出し直してCSVに保存（ネットワークにはアクセスしない）
+
+    保存した件数を返す
+    """
+    if not os.path.exists(os.path.join(archive_dir, INDEX_FILENAME)):
+        print(f"✗ 保存済みのページがありません: {archive_dir}")
+        print("💡 undetected_scraper.py / async_fetcher.py の archive_dir を設定して取得すると保存されます")
+        return 0
+    # 抽出関数が見つからない場合は、出力CSVを作る前・ワーカーを起動する前にここでエラーにする
+    resolve_extractor(extractor)
+
+    os.makedirs(os.path.dirname(output_csv) or '.', exist_ok=True)
+    count = 0
+    with PageArchive(archive_dir) as archive, \
+            open(output_csv, 'w', encoding='utf-8-sig', newline='') as f:
+        stats = archive.stats()
+        ratio = stats['stored_bytes'] / stats['raw_bytes'] if stats['raw_bytes'] else 0
+        print(f"📂 保存済み: {stats['pages']}チャンネル / {stats['blobs']}ページ "
+              f"（{stats['raw_bytes'] / 1024:,.0f}KB → 圧縮後 {stats['stored_bytes'] / 1024:,.0f}KB、{ratio:.0%}）")
+        print(f"🔎 抽出処理: {extractor}")
+
+        writer = csv.DictWriter(f, fieldnames=REEXTRACT_FIELDNAMES)
+        writer.writeheader()
+        for url, fetched_at, result, error in iter_reextracted(archive, extractor, workers):
+            if error is not None:
+                error = str(error)[:200]
+                print(f"  ⚠ 抽出エラー: {error} ({url})")
+            writer.writerow({
+                'チャンネルURL': url,
+                '取得日時': datetime.fromtimestamp(fetched_at).isoformat(timespec='seconds'),
+                '抽出結果': '' if error is not None else format_result(result),
+                'エラー': error or '',
+            })
+            count += 1
+            if count % 1000 == 0:
+                print(metrics.summary_line('reextracted_pages'))
+
+    print(f"\n✓ {count}件の抽出結果を {output_csv} に保存しました")
+    print(metrics.summary_line('reextracted_pages'))
+    return count
+
+def main():
+    """メイン処理"""
+    print("\n" + "=" * 60)
+    print("保存済みページからの再抽出")
+    print("=" * 60)
+    print()
+
+    # ========================================
+    # 設定
+    # ========================================
+    archive_dir = '../data/archive'                               # ページの保存先
+    extractor = 'sns_links'                                       # 抽出処理（youtube_url / youtube_links / sns_links / 'モジュール名:関数名'）
+    output_csv = '../data/output/archive_extract.csv'             # 出力CSVファイル
+    workers = None                                                # 並列プロセス数（None=CPUコア数、1=逐次処理）
+    metrics_file = '../data/metrics/page_archive.json'            # 処理時間・件数の記録（.prom も出力。None=保存しない）
+    # ========================================
+
+    reextract_archive(archive_dir, extractor, output_csv, workers)
+    if metrics_file:
+        metrics.write_metrics(metrics_file)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+HTML解析結果キャッシュ
+
+html_files/ の各ファイルから抽出したチャンネル情報を SQLite に保存し、
+次回以降は内容が変わっていないファイルの解析を省略します。
+
+キーは「ファイルパス + 内容のSHA-256」です。ファイルが追加・変更された
+ときだけ再解析され、それ以外はキャッシュから読み込まれます。
+解析したパーサーバックエンドも記録し、別のバックエンドの結果は使いません
+（入れ子の壊れたページではバックエンドによって結果が変わるため）。
+抽出ルールを変更したときは PARSE_CACHE_VERSION を上げてください
+（古いバージョンのキャッシュは自動的に無視されます）。
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+# 抽出結果の形式が変わったら上げる
+PARSE_CACHE_VERSION = 2
+
+DEFAULT_CACHE_PATH = '../data/cache/parse_cache.sqlite'
+
+def file_digest(path):
+    """ファイル内容のSHA-256（16進文字列）"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def cache_key(path):
+    """キャッシュのキーにするファイルパス（実行ディレクトリに依存しない絶対パス）"""
+    return os.path.abspath(path)
+
+def open_cache(cache_path=DEFAULT_CACHE_PATH, rebuild=False):
+    """キャッシュDBを開く（rebuild=True で既存のキャッシュを全削除）"""
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(cache_path)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS parse_cache (
+            path TEXT PRIMARY KEY,
+            digest TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            rows TEXT NOT NULL,
+            parsed_at TEXT NOT NULL,
+            backend TEXT NOT NULL DEFAULT ''
+        )
+    ''')
+    # backend 列がない古いキャッシュには列を足す（どのバックエンドの結果か分からないので使われない）
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(parse_cache)')]
+    if 'backend' not in columns:
+        conn.execute("ALTER TABLE parse_cache ADD COLUMN backend TEXT NOT NULL DEFAULT ''")
+    if rebuild:
+        conn.execute('DELETE FROM parse_cache')
+    conn.commit()
+    return conn
+
+def load_digests(conn, backend):
+    """キャッシュ済みの {パス: ハッシュ} を返す（現バージョン・同じバックエンドのもののみ）"""
+    cursor = conn.execute(
+        'SELECT path, digest FROM parse_cache WHERE version = ? AND backend = ?',
+        (PARSE_CACHE_VERSION, backend)
+    )
+    return dict(cursor.fetchall())
+
+def get_rows(conn, path, digest, backend):
+    """キャッシュからチャンネル情報を取得（なければNone）"""
+    row = conn.execute(
+        'SELECT rows FROM parse_cache WHERE path = ? AND digest = ? AND version = ? AND backend = ?',
+        (cache_key(path), digest, PARSE_CACHE_VERSION, backend)
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+def put_rows(conn, path, digest, rows, backend):
+    """解析結果をキャッシュに保存（同じパスの古い結果は上書き）"""
+    conn.execute(
+        'INSERT OR REPLACE INTO parse_cache (path, digest, version, rows, parsed_at, backend) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        (cache_key(path), digest, PARSE_CACHE_VERSION,
+         json.dumps(rows, ensure_ascii=False), datetime.now().isoformat(timespec='seconds'), backend)
+    )
@@ -0,0 +1,286 @@
+"""
+HTMLパーサーバックエンド
+
+ユーチュラのHTML解析を複数のパーサーで切り替えられるようにします。
+
+- selectolax : 最速。lexborエンジン + CSSセレクタ（pip install selectolax）
+- lxml       : 高速。libxml2 + XPath（pip install lxml）
+- bs4        : BeautifulSoup + html.parser（従来の処理。追加インストール不要）
+
+'auto'（既定）は従来と同じ bs4 を使います。selectolax・lxml は backend に名前を指定したときだけ使います
+（下の※のとおり、入れ子の壊れたページでは結果が bs4 と変わるため）。
+
+チャンネル登録者数は表示どおりの文字列（例: 12.3万人）と、
+整数に変換した値（チャンネル登録者数_数値。例: 123000）の両方を返します。
+
+※ 入れ子が HTML の仕様に反するページでは、バックエンドによって結果が変わります。
+  selectolax・lxml はブラウザと同じ規則で木を組み直し、bs4（html.parser）は書かれたとおりに読むため、
+  例えば <p class="title">D<div>in</div></p> のチャンネル名は selectolax・lxml では 'D'（<div> で <p> が閉じる）、
+  bs4 では 'Din' になります。正しい入れ子のページでは3つとも同じ結果です。
+  既定の出力を従来から変えないよう 'auto' は bs4 にしています
+  （各バックエンドの結果は tests/test_parser_backends.py で固定しています）。
+"""
+
+from decimal import Decimal, InvalidOperation
+import re
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+BACKENDS = ('selectolax', 'lxml', 'bs4')
+
+SUBSCRIBER_ICON_TITLE = 'チャンネル登録者数'
+
+# 登録者数の表示（例: 12.3万人 / 1.2億人 / 5,432人）
+_SUBSCRIBER_RE = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*(万|億)?')
+_SUBSCRIBER_UNITS = {None: 1, '万': 10 ** 4, '億': 10 ** 8}
+
+# ul.channel-list を探すXPath（class属性に channel-list を含むもの）
+_CHANNEL_LIST_XPATH = "//ul[contains(concat(' ', normalize-space(@class), ' '), ' channel-list ')]"
+_TITLE_XPATH = ".//p[contains(concat(' ', normalize-space(@class), ' '), ' title ')]"
+
+def available_backends():
+    """インストール済みのバックエンド一覧（速い順）"""
+    backends = []
+    if LexborHTMLParser is not None:
+        backends.append('selectolax')
+    if lxml is not None:
+        backends.append('lxml')
+    backends.append('bs4')
+    return backends
+
+def resolve_backend(backend='auto'):
+    """バックエンド名を解決（'auto' は従来と同じ結果になる bs4）"""
+    if backend == 'auto':
+        return 'bs4'
+    if backend not in BACKENDS:
+        raise ValueError(f"不明なパーサーバックエンド: {backend}（{', '.join(BACKENDS)} のいずれか）")
+    if backend not in available_backends():
+        raise ImportError(f"パーサーバックエンド '{backend}' がインストールされていません（pip install {backend}）")
+    return backend
+
+def parse_subscriber_count(text):
+    """登録者数の表示を整数に変換（例: '12.3万人' → 123000、'1.2億人' → 120000000）
+
+    数字が含まれない場合（N/A・非公開など）は None を返す
+    """
+    if not text:
+        return None
+    match = _SUBSCRIBER_RE.search(text)
+    if not match:
+        return None
+    try:
+        # 12.3万 を float で掛けると 122999 になることがあるため Decimal で計算
+        number = Decimal(match.group(1).replace(',', ''))
+    except InvalidOperation:
+        return None
+    return int(number * _SUBSCRIBER_UNITS[match.group(2)])
+
+def _channel_row(channel_name, channel_id, subscribers):
+    """抽出結果を出力用の辞書にまとめる"""
+    channel_url = f"https://yutura.net{channel_id}" if channel_id != 'N/A' else 'N/A'
+    return {
+        'チャンネル名': channel_name,
+        'チャンネルURL': channel_url,
+        'チャンネル登録者数': subscribers,
+        'チャンネル登録者数_数値': parse_subscriber_count(subscribers),
+    }
+
+# ========================================
+# bs4（従来の処理）
+# ========================================
+
+def _extract_channels_bs4(html_content):
+    soup = BeautifulSoup(html_content, 'html.parser')
+
+    channel_list = soup.find('ul', class_='channel-list')
+
+    if not channel_list:
+        return []
+
+    channels = []
+
+    for li in channel_list.find_all('li'):
+        try:
+            # チャンネル名
+            title_elem = li.find('p', class_='title')
+            channel_name = title_elem.text.strip() if title_elem else 'N/A'
+
+            # チャンネルURL
+            more_link = li.find('a', href=True)
+            channel_id = more_link['href'] if more_link else 'N/A'
+
+            # チャンネル登録者数（アイコン内の文字列を除いた親要素のテキスト。ツリーは変更しない）
+            people_icon = li.find('i', title=SUBSCRIBER_ICON_TITLE)
+            subscribers = 'N/A'
+            if people_icon:
+                p_tag = people_icon.parent
+                if p_tag:
+                    subscribers = ''.join(
+                        text.strip() for text in p_tag.strings
+                        if not any(parent is people_icon for parent in text.parents)
+                    )
+
+            channels.append(_channel_row(channel_name, channel_id, subscribers))
+
+        except Exception as e:
+            print(f"⚠ チャンネル情報の抽出中にエラー: {e}")
+            continue
+
+    return channels
+
+def _find_hrefs_bs4(html_content, contains):
+    soup = BeautifulSoup(html_content, 'html.parser')
+    if contains:
+        links = soup.find_all('a', href=lambda x: x and contains in x)
+    else:
+        links = soup.find_all('a', href=True)
+    return [link['href'] for link in links]
+
+# ========================================
+# lxml
+# ========================================
+
+def _extract_channels_lxml(html_content):
+    root = lxml.html.fromstring(html_content)
+
+    channel_lists = root.xpath(_CHANNEL_LIST_XPATH)
+
+    if not channel_lists:
+        return []
+
+    channels = []
+
+    for li in channel_lists[0].iter('li'):
+        try:
+            # チャンネル名
+            title_elems = li.xpath(_TITLE_XPATH)
+            channel_name = title_elems[0].text_content().strip() if title_elems else 'N/A'
+
+            # チャンネルURL
+            links = li.xpath('.//a[@href]')
+            channel_id = links[0].get('href') if links else 'N/A'
+
+            # チャンネル登録者数（アイコン内の文字列を除いた親要素のテキスト）
+            icons = li.xpath('.//i[@title=$title]', title=SUBSCRIBER_ICON_TITLE)
+            subscribers = 'N/A'
+            if icons:
+                icon = icons[0]
+                p_tag = icon.getparent()
+                parts = []
+                for text in p_tag.xpath('.//text()'):
+                    owner = text.getparent()
+                    if text.is_tail:
+                        owner = owner.getparent()
+                    if owner is icon or icon in owner.iterancestors():
+                        continue
+                    parts.append(text.strip())
+                subscribers = ''.join(parts)
+
+            channels.append(_channel_row(channel_name, channel_id, subscribers))
+
+        except Exception as e:
+            print(f"⚠ チャンネル情報の抽出中にエラー: {e}")
+            continue
+
+    return channels
+
+def _find_hrefs_lxml(html_content, contains):
+    root = lxml.html.fromstring(html_content)
+    hrefs = root.xpath('//a[contains(@href, $contains)]/@href', contains=contains or '')
+    return [str(href) for href in hrefs]
+
+# ========================================
+# selectolax
+# ========================================
+
+def _collect_text_selectolax(node, skip_id, parts):
+    """node 配下の文字列を集める（skip_id の要素配下は除外）"""
+    for child in node.iter(include_text=True):
+        if child.tag == '-text':
+            parts.append(child.text_content.strip())
+        elif child.tag != '-comment' and child.mem_id != skip_id:
+            _collect_text_selectolax(child, skip_id, parts)
+
+def _extract_channels_selectolax(html_content):
+    tree = LexborHTMLParser(html_content)
+
+    channel_list = tree.css_first('ul.channel-list')
+
+    if channel_list is None:
+        return []
+
+    channels = []
+
+    for li in channel_list.css('li'):
+        try:
+            # チャンネル名
+            title_elem = li.css_first('p.title')
+            channel_name = title_elem.text(deep=True).strip() if title_elem is not None else 'N/A'
+
+            # チャンネルURL
+            more_link = li.css_first('a[href]')
+            channel_id = more_link.attributes['href'] if more_link is not None else 'N/A'
+
+            # チャンネル登録者数（アイコン内の文字列を除いた親要素のテキスト）
+            people_icon = li.css_first(f'i[title="{SUBSCRIBER_ICON_TITLE}"]')
+            subscribers = 'N/A'
+            if people_icon is not None:
+                parts = []
+                _collect_text_selectolax(people_icon.parent, people_icon.mem_id, parts)
+                subscribers = ''.join(parts)
+
+            channels.append(_channel_row(channel_name, channel_id, subscribers))
+
+        except Exception as e:
+            print(f"⚠ チャンネル情報の抽出中にエラー: {e}")
+            continue
+
+    return channels
+
+def _find_hrefs_selectolax(html_content, contains):
+    tree = LexborHTMLParser(html_content)
+    selector = f'a[href*="{contains}"]' if contains else 'a[href]'
+    return [link.attributes['href'] for link in tree.css(selector)]
+
+# ========================================
+# 公開関数
+# ========================================
+
+_EXTRACT_CHANNELS = {
+    'selectolax': _extract_channels_selectolax,
+    'lxml': _extract_channels_lxml,
+    'bs4': _extract_channels_bs4,
+}
+
+_FIND_HREFS = {
+    'selectolax': _find_hrefs_selectolax,
+    'lxml': _find_hrefs_lxml,
+    'bs4': _find_hrefs_bs4,
+}
+
+def extract_channels(html_content, backend='auto'):
+    """一覧ページのHTMLからチャンネル情報を抽出"""
+    # 空のページ（データなしで保存されたもの）は解析しない
+    if not html_content.strip():
+        return []
+    return _EXTRACT_CHANNELS[resolve_backend(backend)](html_content)
+
+def find_hrefs(html_content, contains=None, backend='auto'):
+    """ページ内のリンク（a要素のhref）を出現順にすべて返す
+
+    contains を指定すると、href にその文字列を含むものだけを返す
+    （ツリーを1回走査するだけで絞り込む）
+    """
+    if not html_content.strip():
+        return []
+    return _FIND_HREFS[resolve_backend(backend)](html_content, contains)
@@ -0,0 +1,45 @@
+"""
+トークンバケット方式のリクエスト間隔制御
+
+サイトへの負荷を抑えるため、1秒あたりのリクエスト数に上限を設けます。
+スレッドからは acquire()、asyncio からは await acquire_async() で使います。
+"""
+
+import asyncio
+import threading
+import time
+
+class TokenBucket:
+    """rate 件/秒 でトークンが補充され、最大 burst 件まで溜まるバケット"""
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError("rate は0より大きい値を指定してください")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """トークンを1つ予約し、使えるようになるまでの待ち時間（秒）を返す"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """トークンが使えるまで待つ（スレッド用）"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """トークンが使えるまで待つ（asyncio用）"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
@@ -0,0 +1,73 @@
+"""
+取得結果ジャーナル（追記専用）
+
+YouTube URLを1件取得するたびに、その結果を JSONL ファイルに1行追記します。
+途中で強制終了しても、それまでに取得した結果はすべてジャーナルに残るので、
+次回はジャーナルを読み直すだけで続きから再開できます。
+
+出力CSVは処理の最後に1回だけ書き出します
+（以前のように100件ごとにCSV全体を書き直すことはしません）。
+出力CSVをディスクに書き出した後は、内容がすべてCSVに入っているのでジャーナルを空にします
+（ジャーナルが実行のたびに伸び続けないようにするため）。
+"""
+
+from datetime import datetime
+import json
+import os
+
+def journal_path(output_csv):
+    """出力CSVに対応するジャーナルのパス（例: yutura_with_youtube_urls.journal.jsonl）"""
+    return os.path.splitext(output_csv)[0] + '.journal.jsonl'
+
+def open_journal(path):
+    """ジャーナルを追記モードで開く"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    return open(path, 'a', encoding='utf-8')
+
+def append_record(journal, channel):
+    """取得結果を1行追記し、すぐにディスクへ反映させる"""
+    record = {
+        'チャンネルURL': channel['チャンネルURL'],
+        'YouTube URL': channel['YouTube URL'],
+        'resolved_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    journal.write(json.dumps(record, ensure_ascii=False) + '\n')
+    journal.flush()
+    os.fsync(journal.fileno())
+
+def replay(path, existing_data):
+    """ジャーナルの内容を existing_data（{チャンネルURL: YouTube URL}）に反映
+
+    同じチャンネルが複数回あれば後の行が優先される
+    書き込み途中で終了した最後の行など、壊れた行は読み飛ばす
+    反映した行数を返す
+    """
+    if not os.path.exists(path):
+        return 0
+
+    count = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                existing_data[record['チャンネルURL']] = record['YouTube URL']
+            except (ValueError, KeyError):
+                continue
+            count += 1
+    return count
+
+def truncate(path):
+    """ジャーナルを空にする（出力CSVをディスクへ書き出した後にだけ呼ぶ）
+
+    空にした行数を返す
+    """
+    if not os.path.exists(path):
+        return 0
+
+    with open(path, 'r+', encoding='utf-8') as f:
+        count = sum(1 for _ in f)
+        f.seek(0)
+        f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+    return count
@@ -10,14 +10,25 @@ pip install undetected-chromedriver
 python undetected_scraper.py
 """
 
-import undetected_chromedriver as uc
-from bs4 import BeautifulSoup
 import csv
+import re
+import statistics
 import time
 import os
 
+import crawl_manifest
+import fetch_scheduler
+import metrics
+import page_archive
+import parser_backends
+import result_journal
+import url_cache
+
 def setup_driver():
     """undetected-chromedriverのセットアップ"""
+    # 抽出処理だけを他のスクリプトから使えるよう、ここで読み込む
+    import undetected_chromedriver as uc
+    
     options = uc.ChromeOptions()
     
     # 基本設定
@@ -36,64 +47,223 @@ def setup_driver():
     
     return driver
 
-def extract_youtube_url(soup):
-    """HTMLからYouTube URLを抽出"""
-    import re
+# YouTube URLの形式（上から優先）
+YOUTUBE_URL_PATTERNS = (
+    'youtube.com/channel/',  # 方法1: channel IDを含むリンク（最も確実）
+    'youtube.com/@',         # 方法2: @username形式
+    'youtube.com/c/',        # 方法3: /c/ 形式
+    'youtube.com/user/',     # 方法4: /user/ 形式
+)
+
+# ページソースに YouTube リンクらしき文字列があるかの事前チェック用
+YOUTUBE_URL_RE = re.compile(r'youtube\.com/(?:channel/|@|c/|user/)')
+
+def extract_youtube_candidates(html_content, backend='auto'):
+    """HTMLからYouTube URLの候補をすべて抽出（出現順・重複なし）
+
+    ページソースに該当する文字列がなければ、HTMLの解析自体を行わない
+    """
+    if not YOUTUBE_URL_RE.search(html_content):
+        return []
+    
+    # a要素を1回だけ走査して、いずれかの形式に当てはまるリンクを集める
+    candidates = []
+    seen = set()
+    for href in parser_backends.find_hrefs(html_content, 'youtube.com/', backend):
+        if href in seen:
+            continue
+        if any(pattern in href for pattern in YOUTUBE_URL_PATTERNS):
+            candidates.append(href)
+            seen.add(href)
+    
+    return candidates
+
+def pick_youtube_url(candidates):
+    """候補の中から YOUTUBE_URL_PATTERNS の優先順で最初に該当するURLを選ぶ"""
+    for pattern in YOUTUBE_URL_PATTERNS:
+        for href in candidates:
+            if pattern in href:
+                return href
+    return None
+
+def extract_youtube_url(html_content, backend='auto', return_candidates=False):
+    """HTMLからYouTube URLを抽出
+
+    backend: 'auto' / 'selectolax' / 'lxml' / 'bs4'（parser_backends.py 参照）
+    return_candidates: True の場合は (YouTube URL, 候補一覧) を返す
+                       （サブチャンネルなど、ページ内の他のYouTubeリンクも取得できる）
+    """
+    candidates = extract_youtube_candidates(html_content, backend)
+    youtube_url = pick_youtube_url(candidates)
+    
+    if return_candidates:
+        return youtube_url, candidates
+    return youtube_url
+
+# ページの準備ができたかを判定するスクリプト
+# - HTMLの読み込みが終わっていて（readyState が loading でない）、最優先の形式（channel ID）の
+#   YouTubeリンクがあれば 'link'（読み込み途中のページで、動画・共有リンクなど優先度の低いリンクを
+#   拾わないよう、他の形式のリンクでは待つのをやめない）
+# - 読み込みが完了していて、Cloudflareの確認画面でなければ 'ready'
+# - まだなら false（WebDriverWait が再チェックする）
+PAGE_READY_SCRIPT = """
+if (document.readyState !== 'loading'
+        && document.querySelector('a[href*="%s"]')) { return 'link'; }
+if (document.readyState === 'complete'
+        && !/Just a moment|しばらくお待ちください/.test(document.title)) { return 'ready'; }
+return false;
+""" % YOUTUBE_URL_PATTERNS[0]
+
+def wait_until_ready(driver, timeout=5, poll=0.2):
+    """ページの準備ができるまで待つ（最大 timeout 秒）
+
+    準備ができた理由（'link' / 'ready'）を返す。時間切れなら 'timeout'
+    """
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+    
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=poll).until(
+            lambda d: d.execute_script(PAGE_READY_SCRIPT)
+        )
+    except TimeoutException:
+        return 'timeout'
+
+# 取得に失敗したこと（ブラウザのエラー・HTTPエラー・時間切れ）を表す値
+# None（ページは開けたがYouTubeリンクがなかった）とは区別し、N/A やキャッシュには記録しない
+FETCH_ERROR = object()
+
+# 取得に失敗したチャンネルに付ける印（CSVには書かない。run_pipeline は取得を試みた扱いにする）
+FETCH_ERROR_FIELD = '_fetch_error'
+
+def fetch_youtube_url(driver, yutura_url, wait_time=5, backend='auto', timings=None, archive=None):
+    """ユーチュラのチャンネルページからYouTube URLを取得（ブラウザのエラーはそのまま送出）
+
+    YouTubeリンクがなければNoneを返す。時間内にページの準備ができなければ TimeoutError
+
+    wait_time: ページの準備を待つ上限（秒）。準備ができ次第すぐに抽出する
+    timings:   リストを渡すと、読み込み・待機にかかった時間を追加する
+    archive:   page_archive.PageArchive を渡すと、開いたページのHTMLを保存する（オフライン再抽出用）
+    """
+    start = time.perf_counter()
+    driver.get(yutura_url)
+    loaded = time.perf_counter()
     
-    # 方法1: channel IDを含むリンクを探す（最も確実）
-    youtube_link = soup.find('a', href=lambda x: x and 'youtube.com/channel/' in x)
-    if youtube_link:
-        return youtube_link['href']
+    # YouTubeリンクが表示される or 読み込み完了まで待つ
+    ready = wait_until_ready(driver, wait_time)
+    waited = time.perf_counter()
     
-    # 方法2: @username形式
-    youtube_link = soup.find('a', href=lambda x: x and 'youtube.com/@' in x)
-    if youtube_link:
-        return youtube_link['href']
+    html = driver.page_source
+    with metrics.timer('extract'):
+        youtube_url = extract_youtube_url(html, backend)
     
-    # 方法3: /c/ 形式
-    youtube_link = soup.find('a', href=lambda x: x and 'youtube.com/c/' in x)
-    if youtube_link:
-        return youtube_link['href']
+    metrics.observe('page_load', loaded - start)
+    metrics.observe('page_wait', waited - loaded)
+    if timings is not None:
+        timings.append({
+            'チャンネルURL': yutura_url,
+            'load_sec': round(loaded - start, 3),
+            'wait_sec': round(waited - loaded, 3),
+            'ready': ready,
+            'found': bool(youtube_url),
+        })
     
-    # 方法4: /user/ 形式
-    youtube_link = soup.find('a', href=lambda x: x and 'youtube.com/user/' in x)
-    if youtube_link:
-        return youtube_link['href']
+    # 時間切れ（Cloudflareの確認画面のまま・読み込み途中）でリンクもなければ、
+    # 「リンクのないページ」とは言えないので取得失敗にする
+    if ready == 'timeout' and not youtube_url:
+        raise TimeoutError(f"{wait_time}秒待ってもページの準備ができませんでした（確認画面・読み込み途中）")
     
-    return None
+    page_archive.archive_page(archive, yutura_url, html)
+    metrics.incr('fetched_pages')
+    if youtube_url:
+        metrics.incr('found')
+    
+    return youtube_url
 
-def get_youtube_url_from_yutura(driver, yutura_url, wait_time=5):
-    """ユーチュラのチャンネルページからYouTube URLを取得"""
+def get_youtube_url_from_yutura(driver, yutura_url, wait_time=5, backend='auto', timings=None, archive=None):
+    """ユーチュラのチャンネルページからYouTube URLを取得
+
+    引数は fetch_youtube_url と同じ。エラー時はメッセージを表示して FETCH_ERROR を返す
+    """
     try:
-        driver.get(yutura_url)
-        time.sleep(wait_time)
-        
-        # ページが読み込まれるまで少し待つ
-        time.sleep(2)
-        
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        youtube_url = extract_youtube_url(soup)
-        
-        return youtube_url
-        
+        return fetch_youtube_url(driver, yutura_url, wait_time, backend, timings, archive)
     except Exception as e:
+        metrics.incr('fetch_errors')
         print(f"  ⚠ エラー: {e}")
-        return None
+        return FETCH_ERROR
 
-def process_csv(input_csv, output_csv, wait_time=5, cool_time=3):
-    """CSVファイルを処理してYouTube URLを追加"""
-    print("=" * 60)
-    print("YouTube URL 取得開始（Cloudflare突破版）")
-    print("=" * 60)
-    print(f"入力ファイル: {input_csv}")
-    print(f"出力ファイル: {output_csv}")
-    print("=" * 60)
-    print()
+LOAD_TIME_FIELDNAMES = ['チャンネルURL', 'load_sec', 'wait_sec', 'ready', 'found']
+
+def save_load_times(timings, load_times_csv):
+    """ページ読み込み時間の記録をCSVに追記（待機時間の調整用）"""
+    if not timings:
+        return
     
-    # 既存の出力ファイルをチェック（途中再開用）
-    existing_data = {}
-    resume_mode = False
+    os.makedirs(os.path.dirname(load_times_csv), exist_ok=True)
+    write_header = not os.path.exists(load_times_csv)
+    with open(load_times_csv, 'a', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=LOAD_TIME_FIELDNAMES)
+        if write_header:
+            writer.writeheader()
+        writer.writerows(timings)
+
+def print_load_time_summary(timings):
+    """ページ読み込み・待機時間の統計を表示"""
+    if not timings:
+        return
+    
+    totals = sorted(t['load_sec'] + t['wait_sec'] for t in timings)
+    timeouts = sum(1 for t in timings if t['ready'] == 'timeout')
+    
+    def percentile(p):
+        return totals[min(len(totals) - 1, int(len(totals) * p))]
+    
+    print(f"\n⏱ ページ読み込み時間（{len(totals)}件）:")
+    print(f"  中央値: {percentile(0.5):.2f}秒 / 90%: {percentile(0.9):.2f}秒 / 最大: {totals[-1]:.2f}秒")
+    print(f"  時間切れ: {timeouts}件")
+
+def estimate_seconds_per_channel(load_times_csv, cool_time=3, workers=1, max_rate=0.5):
+    """過去の読み込み時間の記録（page_load_times.csv）から1チャンネルあたりの所要秒数を見積もる
+
+    (秒数, 記録件数) を返す。記録がなければ (None, 0)
+    """
+    if not load_times_csv or not os.path.exists(load_times_csv):
+        return None, 0
+    
+    totals = []
+    with open(load_times_csv, 'r', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            try:
+                totals.append(float(row['load_sec']) + float(row['wait_sec']))
+            except (KeyError, TypeError, ValueError):
+                continue
+    if not totals:
+        return None, 0
     
+    page_sec = statistics.median(totals)
+    if workers > 1:
+        # 並行処理では、ブラウザ数で割った時間と秒間リクエスト数の上限の遅い方
+        return max(page_sec / workers, 1 / max_rate), len(totals)
+    return page_sec + cool_time, len(totals)
+
+OUTPUT_FIELDNAMES = ['チャンネル名', 'チャンネルURL', 'チャンネル登録者数', 'チャンネル登録者数_数値', 'YouTube URL',
+                     *crawl_manifest.SOURCE_FIELDNAMES]
+
+def needs_fetch(channel):
+    """YouTube URLが未取得（空 または N/A）ならTrue"""
+    youtube_url = channel.get('YouTube URL')
+    return not youtube_url or youtube_url == 'N/A'
+
+def load_existing_results(output_csv):
+    """既存の出力ファイルとジャーナルから取得済みの結果を読み込む（途中再開用）
+
+    {チャンネルURL: YouTube URL} を返す（どちらもなければNone）
+    """
+    journal_file = result_journal.journal_path(output_csv)
+    if not os.path.exists(output_csv) and not os.path.exists(journal_file):
+        return None
+    
+    existing_data = {}
     if os.path.exists(output_csv):
         print(f"📂 既存の出力ファイルを検出: {output_csv}")
         with open(output_csv, 'r', encoding='utf-8-sig') as f:
@@ -101,33 +271,47 @@ def process_csv(input_csv, output_csv, wait_time=5, cool_time=3):
             for row in reader:
                 # チャンネルURLをキーにして保存
                 existing_data[row['チャンネルURL']] = row.get('YouTube URL', '')
-        
-        completed = sum(1 for url in existing_data.values() if url and url != 'N/A')
-        print(f"✓ 既に{completed}件のYouTube URLを取得済み")
-        print(f"💡 続きから処理を開始します")
-        resume_mode = True
-        print()
     
+    # 前回の出力CSV以降に取得した結果をジャーナルから復元
+    replayed = result_journal.replay(journal_file, existing_data)
+    if replayed:
+        print(f"📒 ジャーナルから{replayed}件の取得結果を復元: {journal_file}")
+    
+    completed = sum(1 for url in existing_data.values() if url and url != 'N/A')
+    print(f"✓ 既に{completed}件のYouTube URLを取得済み")
+    print(f"💡 続きから処理を開始します")
+    print()
+    return existing_data
+
+def apply_existing_results(channels, existing_data=None):
+    """チャンネル一覧に取得済みのYouTube URLを反映した新しいリストを返す（未取得は空欄）"""
+    existing_data = existing_data or {}
+    # チャンネルURLをキーにしてマージ
+    return [
+        {**channel, 'YouTube URL': existing_data.get(channel['チャンネルURL'], '')}
+        for channel in channels
+    ]
+
+def load_channels(input_csv, existing_data=None):
+    """入力CSVを読み込み、既存データがあればYouTube URLをマージする
+
+    入力ファイルがなければNoneを返す
+    """
     # 入力CSVファイルの存在確認
     if not os.path.exists(input_csv):
         print(f"✗ ファイル '{input_csv}' が見つかりません")
-        return
+        return None
     
     # CSVを読み込み
-    channels = []
     with open(input_csv, 'r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # 既存データがあればマージ
-            yutura_url = row['チャンネルURL']
-            if yutura_url in existing_data:
-                row['YouTube URL'] = existing_data[yutura_url]
-            else:
-                row['YouTube URL'] = ''
-            channels.append(row)
+        channels = list(csv.DictReader(f))
     
+    return apply_existing_results(channels, existing_data)
+
+def print_progress_summary(channels, resume_mode):
+    """読み込んだチャンネル数と進捗状況を表示"""
     total_count = len(channels)
-    remaining = sum(1 for ch in channels if not ch.get('YouTube URL') or ch['YouTube URL'] == 'N/A' or ch['YouTube URL'] == '')
+    remaining = sum(1 for ch in channels if needs_fetch(ch))
     
     print(f"✓ 全{total_count}件のチャンネルを読み込みました")
     
@@ -137,57 +321,206 @@ def process_csv(input_csv, output_csv, wait_time=5, cool_time=3):
         print(f"   残り: {remaining}件")
     
     print()
+
+def select_targets(channels, cache=None, ttl_days=90, negative_ttl_days=7, max_fetch_attempts=5):
+    """取得が必要なチャンネルの (番号, チャンネル) のリストを、取得する順に返す
+
+    未取得 → 有効期限切れ → 失敗の再試行 の順、それぞれ登録者数の多い順（fetch_scheduler.py 参照）
+    cache を渡すと、未取得のチャンネルのうちキャッシュに有効な結果があるものは
+    ページを開かずにキャッシュの値で埋める（見つからなかったチャンネルは、失敗回数に応じて
+    negative_ttl_days 日から倍々に間隔を空け、max_fetch_attempts 回失敗したら取得しない）
+    """
+    scheduled, stats = fetch_scheduler.plan(channels, cache, ttl_days, negative_ttl_days, max_fetch_attempts)
+    
+    metrics.incr('url_cache_hits', stats['cache_hits'])
+    metrics.incr('negative_cache_hits', stats['waiting'])
+    
+    if cache is not None:
+        print(f"🗃 キャッシュ: {stats['cache_hits']}件のYouTube URLを取得済み / "
+              f"{stats['waiting']}件は再取得の間隔を空けています / "
+              f"{stats['exhausted']}件は{max_fetch_attempts}回見つからなかったため取得しません")
+    tiers = ' / '.join(f"{fetch_scheduler.TIER_LABELS[tier]} {stats[tier]}件" for tier in fetch_scheduler.TIERS)
+    print(f"📊 取得対象: {len(scheduled)}件（{tiers}。この順に、登録者数の多いものから取得）")
+    print()
+    
+    return [(i, channel) for i, channel, _ in scheduled]
+
+def apply_fetch_result(channel, youtube_url):
+    """取得結果をチャンネルに反映（有効期限切れの再取得で見つからなかった場合は前回のURLを残す）
+
+    取得に失敗した場合（FETCH_ERROR）はURLを変えず（次回また取得する）、取得を試みた印だけ付ける
+    """
+    if youtube_url is FETCH_ERROR:
+        channel[FETCH_ERROR_FIELD] = True
+        return
+    channel.pop(FETCH_ERROR_FIELD, None)
+    if youtube_url:
+        channel['YouTube URL'] = youtube_url
+    elif needs_fetch(channel):
+        channel['YouTube URL'] = 'N/A'
+
+def make_result_recorder(journal, cache=None, retry_base_days=7):
+    """1件取得するごとに、ジャーナル・キャッシュ・失敗回数へ記録する関数を作る
+
+    作った関数は record(channel, youtube_url) の形で呼ぶ
+    （youtube_url は今回の取得結果。見つからなければ None、取得に失敗したら FETCH_ERROR）
+    取得に失敗した場合はチャンネルが変わっていないので、何も記録しない
+    """
+    if cache is not None:
+        fetch_scheduler.open_schedule(cache)
+
+    def record(channel, youtube_url):
+        if youtube_url is FETCH_ERROR:
+            return
+        # 取得結果をすぐにジャーナルへ記録
+        result_journal.append_record(journal, channel)
+        if cache is not None:
+            # 再取得で見つからず前回のURLを残した場合は、キャッシュの取得日時を更新しない
+            if youtube_url or needs_fetch(channel):
+                url_cache.store(cache, channel['チャンネルURL'], channel['YouTube URL'])
+            fetch_scheduler.record_attempt(cache, channel['チャンネルURL'], bool(youtube_url), retry_base_days)
+    return record
+
+def time_is_up(deadline):
+    """制限時間（time.monotonic() の値。None=制限なし）を過ぎたか"""
+    return deadline is not None and time.monotonic() >= deadline
+
+def write_results(channels, output_csv):
+    """チャンネル一覧を出力CSVに書き込む"""
+    # 出力ディレクトリが存在しない場合は作成
+    os.makedirs(os.path.dirname(output_csv), exist_ok=True)
+    
+    with metrics.timer('csv_write'), open(output_csv, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDNAMES, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(channels)
+        # ジャーナルを空にする前に、CSVが確実にディスクへ書かれているようにする
+        f.flush()
+        os.fsync(f.fileno())
+
+def print_result_stats(channels):
+    """取得結果の統計を表示"""
+    success_count = sum(1 for ch in channels if ch.get('YouTube URL') and ch['YouTube URL'] != 'N/A')
+    print(f"\n統計:")
+    print(f"  成功: {success_count}件")
+    print(f"  失敗: {len(channels) - success_count}件")
+
+def save_results(channels, output_csv):
+    """結果を保存して統計を表示"""
+    if not channels:
+        return
+    
+    write_results(channels, output_csv)
+    
+    print(f"\n✓ {len(channels)}件を {output_csv} に保存しました")
+    
+    # 取得結果はすべてCSVに入ったので、ジャーナルは空にする
+    cleared = result_journal.truncate(result_journal.journal_path(output_csv))
+    if cleared:
+        print(f"📒 ジャーナルの{cleared}件はCSVに反映済みのため空にしました")
     
+    # 統計を表示
+    print_result_stats(channels)
+
+def _process_with_driver(channels, targets, record, wait_time, cool_time, backend, timings, deadline=None,
+                         archive=None):
+    """1つのブラウザで targets の順に処理（deadline を過ぎたら残りは次回に回す）"""
     driver = setup_driver()
     
     try:
-        processed_count = 0
-        skipped_count = 0
-        
-        for i, channel in enumerate(channels, 1):
-            yutura_url = channel['チャンネルURL']
-            channel_name = channel['チャンネル名']
-            
-            # 既にYouTube URLがあればスキップ
-            if channel.get('YouTube URL') and channel['YouTube URL'] != 'N/A' and channel['YouTube URL'] != '':
-                skipped_count += 1
-                if skipped_count <= 3 or i % 100 == 0:  # 最初の3件と100件ごとに表示
-                    print(f"[{i}/{len(channels)}] {channel_name} - スキップ（既に取得済み）")
-                continue
+        for processed_count, (i, channel) in enumerate(targets, 1):
+            if time_is_up(deadline):
+                print(f"⏰ 制限時間に達したため、残り{len(targets) - processed_count + 1}件は次回に回します")
+                break
             
-            print(f"[{i}/{len(channels)}] {channel_name}")
-            processed_count += 1
+            print(f"[{i}/{len(channels)}] {channel['チャンネル名']}")
             
             # YouTube URLを取得
-            youtube_url = get_youtube_url_from_yutura(driver, yutura_url, wait_time)
+            youtube_url = get_youtube_url_from_yutura(driver, channel['チャンネルURL'], wait_time, backend, timings,
+                                                      archive)
+            apply_fetch_result(channel, youtube_url)
             
-            if youtube_url:
+            if youtube_url is FETCH_ERROR:
+                print(f"  ⚠ 取得に失敗しました（次回また取得します）")
+            elif youtube_url:
                 print(f"  ✓ YouTube URL: {youtube_url}")
-                channel['YouTube URL'] = youtube_url
             else:
                 print(f"  ✗ YouTube URLが見つかりませんでした")
-                channel['YouTube URL'] = 'N/A'
             
+            # 取得結果をすぐにジャーナル・キャッシュへ記録
+            record(channel, youtube_url)
+            
+            if processed_count % 10 == 0:
+                print(metrics.summary_line('fetched_pages'))
             print()
             
             # クールタイム
-            if i < len(channels):
+            if processed_count < len(targets):
                 time.sleep(cool_time)
-            
-            # 定期的に保存（100件ごと）
-            if processed_count % 100 == 0:
-                print(f"💾 途中経過を保存中... ({processed_count}件処理)")
-                # 出力ディレクトリが存在しない場合は作成
-                os.makedirs(os.path.dirname(output_csv), exist_ok=True)
-                
-                fieldnames = ['チャンネル名', 'チャンネルURL', 'チャンネル登録者数', 'YouTube URL']
-                with open(output_csv, 'w', encoding='utf-8-sig', newline='') as f:
-                    writer = csv.DictWriter(f, fieldnames=fieldnames)
-                    writer.writeheader()
-                    writer.writerows(channels)
-                print(f"✓ 保存完了")
-                print()
         
+    finally:
+        driver.quit()
+        print("✓ ブラウザを閉じました")
+
+def _process_with_pool(channels, targets, record, workers, max_rate, wait_time, backend, timings, deadline=None,
+                       archive=None):
+    """複数のブラウザで並行して処理（browser_pool.py）"""
+    from browser_pool import run_browser_pool
+    
+    print(f"🚀 {workers}個のブラウザで{len(targets)}件を処理します（上限 {max_rate}件/秒）")
+    print()
+    
+    try:
+        # 取得結果は1件ごとにジャーナル・キャッシュへ記録
+        run_browser_pool(channels, targets, workers, max_rate, wait_time, backend,
+                         timings=timings, on_result=record, deadline=deadline, archive=archive)
+    finally:
+        print("✓ ブラウザを閉じました")
+
+def resolve_youtube_urls(channels, output_csv, wait_time=5, cool_time=3, backend='auto', load_times_csv=None,
+                         workers=1, max_rate=0.5, cache_path=url_cache.DEFAULT_CACHE_PATH,
+                         ttl_days=90, negative_ttl_days=7, save_csv=True, max_minutes=None, max_fetch_attempts=5,
+                         archive_dir=page_archive.DEFAULT_ARCHIVE_DIR):
+    """チャンネル一覧（チャンネル名・チャンネルURL・チャンネル登録者数の辞書のリスト）にYouTube URLを追加
+
+    output_csv:        出力CSV。途中再開用のジャーナルもこのパスから決まる
+    save_csv:          False の場合は出力CSVを書かない（ジャーナル・キャッシュには記録する）
+    その他の引数は process_csv と同じ
+    YouTube URL列を追加した新しいリストを返す
+    """
+    if load_times_csv is None:
+        load_times_csv = os.path.join(os.path.dirname(output_csv), 'page_load_times.csv')
+    timings = []
+    deadline = time.monotonic() + max_minutes * 60 if max_minutes else None
+    
+    # 既存の出力ファイルをチェック（途中再開用）
+    existing_data = load_existing_results(output_csv)
+    resume_mode = existing_data is not None
+    channels = apply_existing_results(channels, existing_data)
+    
+    print_progress_summary(channels, resume_mode)
+    
+    # 他のタグ・過去の実行で取得済みのチャンネルはキャッシュから埋める
+    cache = url_cache.open_url_cache(cache_path) if cache_path else None
+    if cache is not None:
+        url_cache.seed(cache, channels)
+    targets = select_targets(channels, cache, ttl_days, negative_ttl_days, max_fetch_attempts)
+    if max_minutes:
+        print(f"⏰ 制限時間: {max_minutes}分（時間内に取得できなかった分は次回に回します）")
+        print()
+    
+    journal = result_journal.open_journal(result_journal.journal_path(output_csv))
+    record = make_result_recorder(journal, cache, negative_ttl_days)
+    archive = page_archive.open_archive(archive_dir) if targets else None
+    try:
+        if not targets:
+            print("✓ 取得が必要なチャンネルはありません")
+        elif workers > 1:
+            _process_with_pool(channels, targets, record, workers, max_rate, wait_time, backend, timings, deadline,
+                               archive)
+        else:
+            _process_with_driver(channels, targets, record, wait_time, cool_time, backend, timings, deadline,
+                                 archive)
     except KeyboardInterrupt:
         print("\n⚠ ユーザーによって中断されました")
         print(f"💾 途中経過を保存します...")
@@ -195,27 +528,57 @@ def process_csv(input_csv, output_csv, wait_time=5, cool_time=3):
         print(f"\n✗ エラー: {e}")
         print(f"💾 途中経過を保存します...")
     finally:
-        driver.quit()
-        print("✓ ブラウザを閉じました")
+        journal.close()
+        if cache is not None:
+            cache.close()
+        if archive is not None:
+            archive.close()
     
-    # 結果を保存
-    if channels:
-        # 出力ディレクトリが存在しない場合は作成
-        os.makedirs(os.path.dirname(output_csv), exist_ok=True)
-        
-        fieldnames = ['チャンネル名', 'チャンネルURL', 'チャンネル登録者数', 'YouTube URL']
-        with open(output_csv, 'w', encoding='utf-8-sig', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(channels)
-        
-        print(f"\n✓ {len(channels)}件を {output_csv} に保存しました")
-        
-        # 統計を表示
-        success_count = sum(1 for ch in channels if ch.get('YouTube URL') and ch['YouTube URL'] != 'N/A')
-        print(f"\n統計:")
-        print(f"  成功: {success_count}件")
-        print(f"  失敗: {len(channels) - success_count}件")
+    # 結果を保存（出力CSVは最後に1回だけ書き出す）
+    if save_csv:
+        save_results(channels, output_csv)
+    elif channels:
+        print_result_stats(channels)
+    
+    # 読み込み時間を記録
+    print_load_time_summary(timings)
+    save_load_times(timings, load_times_csv)
+    print(metrics.summary_line('fetched_pages'))
+    
+    return channels
+
+def process_csv(input_csv, output_csv, wait_time=5, cool_time=3, backend='auto', load_times_csv=None,
+                workers=1, max_rate=0.5, cache_path=url_cache.DEFAULT_CACHE_PATH,
+                ttl_days=90, negative_ttl_days=7, max_minutes=None, max_fetch_attempts=5,
+                archive_dir=page_archive.DEFAULT_ARCHIVE_DIR):
+    """CSVファイルを処理してYouTube URLを追加
+
+    wait_time:          ページの準備を待つ上限（秒）
+    workers:            同時に動かすブラウザ数（2以上でワーカープールを使用）
+    max_rate:           ワーカープール使用時の、全体の秒間リクエスト数の上限
+    load_times_csv:     ページ読み込み時間の記録先（None=出力ファイルと同じフォルダの page_load_times.csv）
+    cache_path:         全実行共通のYouTube URLキャッシュ（None=使わない）
+    ttl_days:           キャッシュしたYouTube URLの有効日数（過ぎたものは優先度を下げて再取得）
+    negative_ttl_days:  見つからなかった（N/A）チャンネルを再取得しない日数（失敗するたびに倍に延びる）
+    max_minutes:        取得に使う時間の上限（分。None=制限なし）。優先度の高いものから取得する
+    max_fetch_attempts: 見つからなかったチャンネルを取得する回数の上限
+    archive_dir:        開いたページのHTMLの保存先（None=保存しない。page_archive.py で再抽出できる）
+    """
+    print("=" * 60)
+    print("YouTube URL 取得開始（Cloudflare突破版）")
+    print("=" * 60)
+    print(f"入力ファイル: {input_csv}")
+    print(f"出力ファイル: {output_csv}")
+    print("=" * 60)
+    print()
+    
+    channels = load_channels(input_csv)
+    if channels is None:
+        return
+    
+    resolve_youtube_urls(channels, output_csv, wait_time, cool_time, backend, load_times_csv,
+                         workers, max_rate, cache_path, ttl_days, negative_ttl_days,
+                         max_minutes=max_minutes, max_fetch_attempts=max_fetch_attempts, archive_dir=archive_dir)
     
     print("\n" + "=" * 60)
     print("処理完了")
@@ -228,20 +591,41 @@ def main():
     # ========================================
     input_csv = '../data/output/yutura_batch_channels.csv'       # 入力CSVファイル
     output_csv = '../data/output/yutura_with_youtube_urls.csv'   # 出力CSVファイル
-    wait_time = 5                                                # ページ読み込み待機時間（秒）
+    wait_time = 5                                                # ページ読み込み待機の上限（秒）
     cool_time = 3                                                # リクエスト間のクールタイム（秒）
+    backend = 'auto'                                             # HTMLパーサー（auto / selectolax / lxml / bs4）
+    workers = 1                                                  # 同時に動かすブラウザ数（2以上で並行処理）
+    max_rate = 0.5                                               # 並行処理時の全体の秒間リクエスト数の上限
+    cache_path = '../data/cache/youtube_url_cache.sqlite'        # 全実行共通のYouTube URLキャッシュ（None=使わない）
+    ttl_days = 90                                                # キャッシュしたYouTube URLの有効日数
+    negative_ttl_days = 7                                        # 見つからなかったチャンネルを再取得しない日数（失敗するたびに倍）
+    max_fetch_attempts = 5                                       # 見つからなかったチャンネルを取得する回数の上限
+    max_minutes = None                                           # 取得に使う時間の上限（分。None=制限なし。優先度の高い順に取得）
+    archive_dir = '../data/archive'                              # 開いたページの保存先（None=保存しない。page_archive.py で再抽出）
+    metrics_file = '../data/metrics/undetected_scraper.json'     # 処理時間・件数の記録（.prom も出力。None=保存しない）
     # ========================================
     
+    load_times_csv = os.path.join(os.path.dirname(output_csv), 'page_load_times.csv')
+    per_channel, samples = estimate_seconds_per_channel(load_times_csv, cool_time, workers, max_rate)
+    
     print("\n⚠ 注意:")
     print("- undetected-chromedriverを使用します")
     print("- Cloudflareを回避できる可能性が高いです")
-    print("- この処理には時間がかかります（1チャンネルあたり約8秒）")
+    if per_channel is None:
+        print(f"- この処理には時間がかかります（1チャンネルあたり最大{wait_time + cool_time}秒 + ページ読み込み時間）")
+    else:
+        print(f"- この処理には時間がかかります（1チャンネルあたり約{per_channel:.1f}秒：過去{samples}件の実測から）")
     print()
     
     input("準備ができたらEnterキーを押してください...")
     print()
     
-    process_csv(input_csv, output_csv, wait_time, cool_time)
+    process_csv(input_csv, output_csv, wait_time, cool_time, backend, load_times_csv,
+                workers=workers, max_rate=max_rate, cache_path=cache_path,
+                ttl_days=ttl_days, negative_ttl_days=negative_ttl_days,
+                max_minutes=max_minutes, max_fetch_attempts=max_fetch_attempts, archive_dir=archive_dir)
+    if metrics_file:
+        metrics.write_metrics(metrics_file)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+YouTube URL キャッシュ（全実行・全入力CSV共通）
+
+ユーチュラのチャンネルURL → YouTube URL の取得結果を SQLite に保存し、
+別のタグのチャンネル一覧を処理するときも、取得済みのチャンネルは
+ページを開かずにキャッシュから埋めます。
+
+- 取得できたURLは ttl_days 日間有効
+- 見つからなかった（N/A）結果も negative_ttl_days 日間はキャッシュし、
+  その間は再取得しない（ネガティブキャッシュ）
+"""
+
+import os
+import sqlite3
+import time
+
+DEFAULT_CACHE_PATH = '../data/cache/youtube_url_cache.sqlite'
+
+DAY = 24 * 60 * 60
+
+def open_url_cache(cache_path=DEFAULT_CACHE_PATH):
+    """キャッシュDBを開く
+
+    ブラウザワーカープールのスレッドからも書き込むため check_same_thread=False で開く
+    （書き込みは呼び出し側のロック内で行うこと）
+    """
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(cache_path, check_same_thread=False)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS youtube_urls (
+            yutura_url TEXT PRIMARY KEY,
+            youtube_url TEXT,
+            fetched_at REAL NOT NULL
+        )
+    ''')
+    conn.commit()
+    return conn
+
+def lookup(conn, yutura_url, ttl_days=90, negative_ttl_days=7, now=None):
+    """キャッシュを参照
+
+    有効期限内のYouTube URLがあればそのURL、有効期限内のネガティブキャッシュなら 'N/A'、
+    キャッシュにない・期限切れなら None を返す
+    """
+    row = conn.execute(
+        'SELECT youtube_url, fetched_at FROM youtube_urls WHERE yutura_url = ?',
+        (yutura_url,)
+    ).fetchone()
+    if row is None:
+        return None
+
+    youtube_url, fetched_at = row
+    age = (now or time.time()) - fetched_at
+    if youtube_url:
+        return youtube_url if age < ttl_days * DAY else None
+    return 'N/A' if age < negative_ttl_days * DAY else None
+
+def load_entries(conn):
+    """キャッシュ全体を {チャンネルURL: (YouTube URL または None, 取得日時)} で返す（まとめて判定する用）"""
+    rows = conn.execute('SELECT yutura_url, youtube_url, fetched_at FROM youtube_urls')
+    return {yutura_url: (youtube_url, fetched_at) for yutura_url, youtube_url, fetched_at in rows}
+
+def store(conn, yutura_url, youtube_url, fetched_at=None):
+    """取得結果を保存（youtube_url が空 または 'N/A' ならネガティブキャッシュ）"""
+    if not youtube_url or youtube_url == 'N/A':
+        youtube_url = None
+    conn.execute(
+        'INSERT OR REPLACE INTO youtube_urls (yutura_url, youtube_url, fetched_at) VALUES (?, ?, ?)',
+        (yutura_url, youtube_url, fetched_at or time.time())
+    )
+    conn.commit()
+
+def seed(conn, channels):
+    """取得済みのYouTube URLのうち、キャッシュにないものを登録（既存の出力CSVの取り込み用）"""
+    rows = [
+        (ch['チャンネルURL'], ch['YouTube URL'], time.time())
+        for ch in channels
+        if ch.get('YouTube URL') and ch['YouTube URL'] != 'N/A'
+    ]
+    conn.executemany(
+        'INSERT OR IGNORE INTO youtube_urls (yutura_url, youtube_url, fetched_at) VALUES (?, ?, ?)',
+        rows
+    )
+    conn.commit()
@@ -0,0 +1,172 @@
+"""
+チャンネル名のあいまい突合
+
+URLで突合できなかったスクレイピングデータの行を、チャンネル名で
+タレントデータ（main_youtube_name, sub_youtube_name など）と突合し、
+候補を一致度つきで順位づけして出力します。
+
+- 名前の正規化: NFKC（全角英数・半角カナの統一）、小文字化、カタカナ→ひらがな、
+  記号・空白の除去、「チャンネル」「ch」「公式」などの前後の飾りの除去
+- 候補の絞り込み: 文字2-gramの転置索引で、共通する2-gramがある名前だけを比較する
+  （全組み合わせは比較しないので、両側が数万件でも現実的な時間で終わる）
+- 一致度: 2-gramのDice係数と、文字列の類似度（difflib）の平均（0〜1）
+
+merge_youtube_data.py から、URLで一致しなかった行に対して使われます。
+"""
+
+from difflib import SequenceMatcher
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# カタカナ → ひらがな（ァ〜ヶ）
+KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+# 名前の前後についていても同じチャンネルとみなす飾り（正規化後の表記）
+NAME_DECORATION_RE = re.compile(r'^(?:公式|official)+|(?:ちゃんねる|channel|ch|公式|official)+$')
+
+NON_WORD_RE = re.compile(r'[\W_]+')
+
+def normalize_name(name):
+    """チャンネル名を比較用に正規化（空・欠損なら空文字）"""
+    if not isinstance(name, str):
+        return ''
+    text = unicodedata.normalize('NFKC', name).lower().translate(KATAKANA_TO_HIRAGANA)
+    text = NON_WORD_RE.sub('', text)
+    # 飾りを外すと何も残らない場合（例: 「公式チャンネル」）はそのまま
+    stripped = NAME_DECORATION_RE.sub('', text)
+    return stripped or text
+
+def name_ngrams(normalized, n=2):
+    """正規化済みの名前の文字n-gramの集合（1文字の名前でもgramが出るよう両端に印をつける）"""
+    if not normalized:
+        return set()
+    padded = f'^{normalized}$'
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+def build_name_index(df_talent, name_columns, n=2, max_df=0.05, min_postings=100):
+    """タレントデータの名前列から n-gram の転置索引を作る
+
+    max_df: これより多くの割合の名前に出てくるgramは、絞り込みに使わない（ありふれた文字列対策）
+            ただし min_postings 件以下しか出てこないgramは常に使う
+    名前ごとの表・正規化済みの名前・gram集合と、{gram: 名前番号の配列} の索引をまとめた辞書を返す
+    """
+    parts = []
+    for column in name_columns:
+        parts.append(pd.DataFrame({
+            '_talent_row': range(len(df_talent)),
+            'name_column': column,
+            'candidate_name': df_talent[column].to_numpy(),
+        }))
+    entries = pd.concat(parts, ignore_index=True)
+    entries['_normalized'] = entries['candidate_name'].map(normalize_name)
+    entries = (entries[entries['_normalized'] != '']
+               .drop_duplicates(subset=['_talent_row', '_normalized'])
+               .reset_index(drop=True))
+
+    grams = [name_ngrams(name, n) for name in entries['_normalized']]
+    postings = {}
+    for entry_id, entry_grams in enumerate(grams):
+        for gram in entry_grams:
+            postings.setdefault(gram, []).append(entry_id)
+
+    limit = max(min_postings, int(len(entries) * max_df))
+    stop_grams = {gram for gram, ids in postings.items() if len(ids) > limit}
+    postings = {
+        gram: np.array(ids, dtype=np.int64)
+        for gram, ids in postings.items()
+        if gram not in stop_grams
+    }
+    sizes = np.array([len(g) for g in grams], dtype=np.int64)
+    return {'entries': entries, 'names': entries['_normalized'].to_numpy(),
+            'talent_rows': entries['_talent_row'].to_numpy(), 'grams': grams,
+            'postings': postings, 'stop_grams': stop_grams, 'sizes': sizes, 'n': n}
+
+def _rank_candidates(query, index, top_k, min_score, max_compare):
+    """1件の名前について、候補の (タレント行, 名前番号, 一致度) を一致度の高い順に top_k 件返す
+
+    同じタレントの名前が複数一致した場合は、一致度の最も高いものだけを残す
+    """
+    query_grams = name_ngrams(query, index['n'])
+    hits = [index['postings'][g] for g in query_grams if g in index['postings']]
+    if not hits:
+        return []
+
+    # 索引から数えた共通gram数で、Dice係数の上限を求める
+    # （絞り込みに使わないありふれたgramは、すべて共通しているとみなす）
+    # 文字列の類似度は最大1なので、(上限 + 1) / 2 が min_score に届かない候補は比較しない
+    entry_ids, shared = np.unique(np.concatenate(hits), return_counts=True)
+    sizes = index['sizes'][entry_ids]
+    shared = np.minimum(shared + len(query_grams & index['stop_grams']), sizes)
+    dice = 2 * shared / (len(query_grams) + sizes)
+    keep = dice >= 2 * min_score - 1
+    entry_ids, dice = entry_ids[keep], dice[keep]
+    # Dice係数の上限が高い順に max_compare 件まで比較する
+    order = np.argsort(-dice, kind='stable')[:max_compare]
+
+    # query 側を固定して使い回す（SequenceMatcher は seq2 側の前処理をキャッシュする）
+    matcher = SequenceMatcher(None, autojunk=False)
+    matcher.set_seq2(query)
+    best = {}
+    for entry_id, bound in zip(entry_ids[order], dice[order]):
+        # 上位 top_k 件が確定したら、それを超えられない候補は比較しない
+        floor = min_score
+        if len(best) >= top_k:
+            floor = max(floor, sorted(s for _, s in best.values())[-top_k])
+            if (bound + 1) / 2 < floor:
+                break
+        grams = index['grams'][entry_id]
+        d = 2 * len(query_grams & grams) / (len(query_grams) + len(grams))
+        matcher.set_seq1(index['names'][entry_id])
+        # 文字の重なりだけで求まる上限（quick_ratio）で足切りしてから正確な類似度を求める
+        if (d + matcher.quick_ratio()) / 2 < floor:
+            continue
+        score = (d + matcher.ratio()) / 2
+        talent_row = index['talent_rows'][entry_id]
+        if score >= min_score and score > best.get(talent_row, (None, 0))[1]:
+            best[talent_row] = (int(entry_id), score)
+
+    ranked = sorted(best.items(), key=lambda item: -item[1][1])[:top_k]
+    return [(talent_row, entry_id, score) for talent_row, (entry_id, score) in ranked]
+
+def match_channel_names(df_yutura, df_talent, name_columns=('main_youtube_name', 'sub_youtube_name'),
+                        top_k=3, min_score=0.6, max_compare=50, n=2):
+    """チャンネル名であいまい突合し、候補を順位づけして返す
+
+    name_columns: 突合するタレントデータの名前列（存在しない列は無視）
+    top_k:        1件あたりに出力する候補数（同じタレントは一致度の高い列の1件だけ）
+    min_score:    これより一致度の低い候補は出力しない
+    max_compare:  1件あたりに文字列比較する候補数の上限
+
+    スクレイピングデータの列 + name_rank, name_score, name_column, candidate_name + タレントデータの列
+    の表を返す（候補がなければ空の表）
+    """
+    name_columns = [col for col in name_columns if col in df_talent.columns]
+    if not name_columns or df_yutura.empty:
+        return pd.DataFrame()
+
+    index = build_name_index(df_talent, name_columns, n)
+    entries = index['entries']
+
+    rows = []
+    queries = df_yutura['チャンネル名'].map(normalize_name)
+    for yutura_row, query in enumerate(queries):
+        if not query:
+            continue
+        ranked = _rank_candidates(query, index, top_k, min_score, max_compare)
+        for rank, (talent_row, entry_id, score) in enumerate(ranked, 1):
+            rows.append((yutura_row, rank, round(score, 4), entry_id, talent_row))
+
+    if not rows:
+        return pd.DataFrame()
+
+    found = pd.DataFrame(rows, columns=['_yutura_row', 'name_rank', 'name_score', '_entry', '_talent_row'])
+    candidates = pd.concat([
+        df_yutura.iloc[found['_yutura_row'].to_numpy()].reset_index(drop=True),
+        found[['name_rank', 'name_score']],
+        entries.iloc[found['_entry'].to_numpy()][['name_column', 'candidate_name']].reset_index(drop=True),
+        df_talent.iloc[found['_talent_row'].to_numpy()].reset_index(drop=True),
+    ], axis=1)
+    return candidates
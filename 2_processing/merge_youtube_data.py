@@ -1,8 +1,10 @@
 """
 YouTube URL突合・データ連結スクリプト
 
-スクレイピングしたYouTube URLとtalentデータのsub_youtube_urlを突合し、
-一致するもののみを連結します。
+スクレイピングしたYouTube URLとtalentデータのURL列（main_youtube_url, sub_youtube_url など）を
+突合し、一致するもののみを連結します。どの列で一致したかは matched_column 列に記録されます。
+URLで一致しなかった行は、チャンネル名であいまい突合した候補を一致度つきで別ファイルに出力します
+（fuzzy_name_match.py 参照）。
 
 使い方:
 1. yutura_with_youtube_urls.csv を用意
@@ -11,17 +13,185 @@ YouTube URL突合・データ連結スクリプト
 """
 
 import csv
+import re
 import pandas as pd
 import os
+from urllib.parse import unquote
 
-def merge_youtube_data(yutura_csv, talent_csv, output_csv):
+from fuzzy_name_match import match_channel_names
+from talent_loader import DEFAULT_CACHE_DIR, TALENT_COLUMNS, load_talent_data
+
+# YouTubeチャンネルURLからチャンネルを特定する部分を取り出す正規表現
+# （http/https、www./m. の有無、末尾のスラッシュ・クエリ・サブページの違いは無視）
+YOUTUBE_CHANNEL_RE = re.compile(
+    r'^(?:https?://)?(?:(?:www|m)\.)?youtube\.com/'
+    r'(?:(?P<kind>channel|c|user)/(?P<name>[^/?#]+)|@(?P<handle>[^/?#]+))',
+    re.IGNORECASE
+)
+
+# 突合キーの作り方を変えたら上げる（run_pipeline.py が突合をやり直す）
+MATCH_KEY_VERSION = 2
+
+# チャンネルURLの形式でないURLを ホスト名 / パス / クエリ に分ける正規表現
+FALLBACK_URL_RE = re.compile(
+    r'^(?:https?://)?(?:(?:www|m)\.)?(?P<host>[^/?#]*)(?P<path>[^?#]*)(?:\?(?P<query>[^#]*))?',
+    re.IGNORECASE
+)
+
+# 突合では無視する計測用のクエリパラメータ（共有リンクに付く si, feature, utm_* など）
+TRACKING_PARAM_RE = re.compile(r'(?:^|&)(?:si|feature|pp|utm_[^=&]*)=[^&]*', re.IGNORECASE)
+
+def canonical_youtube_key(urls):
+    """YouTube URLを突合用の正規化キーに変換（ベクトル演算）
+
+    - https://www.youtube.com/channel/UCxxx/videos → channel:UCxxx（チャンネルIDは大文字小文字を区別）
+    - http://m.youtube.com/@Handle?si=...        → @handle
+    - youtube.com/c/Name/ , youtube.com/user/Name → c:name , user:name
+    - 上記以外のURL → スキーム・www.・計測用のクエリ（si, feature など）・#以降・末尾スラッシュを除き、
+                      ホスト名を小文字化したもの（watch?v=aaa と watch?v=zzz は別のキー）
+    - 空欄・N/A → NaN（どれとも一致しない）
+    """
+    urls = urls.astype('string').str.strip()
+    parts = urls.str.extract(YOUTUBE_CHANNEL_RE)
+    
+    # @ハンドルは %E3%81%82 のようにエンコードされている場合があるので戻す
+    handles = parts['handle']
+    encoded = handles.str.contains('%', regex=False, na=False)
+    if encoded.any():
+        handles = handles.where(~encoded, handles[encoded].map(unquote))
+    
+    kind = parts['kind'].str.lower()
+    name = parts['name']
+    keys = pd.Series(pd.NA, index=urls.index, dtype='string')
+    keys = keys.mask(kind == 'channel', 'channel:' + name)
+    keys = keys.mask(kind.isin(['c', 'user']), kind + ':' + name.str.lower())
+    keys = keys.mask(handles.notna(), '@' + handles.str.lower())
+    
+    # チャンネルURLの形式でないもの（動画・再生リストなど）も、表記ゆれだけは吸収しておく
+    # 動画IDなどはクエリにあるので、クエリは計測用のパラメータ（si, feature など）だけを除いて残す
+    # （ホスト名以外は大文字小文字を区別する）
+    rest = urls.str.extract(FALLBACK_URL_RE)
+    query = (rest['query'].fillna('')
+             .str.replace(TRACKING_PARAM_RE, '', regex=True)
+             .str.strip('&'))
+    fallback = (rest['host'].str.lower() + rest['path'].str.rstrip('/')
+                + query.mask(query != '', '?' + query))
+    keys = keys.fillna(fallback)
+    
+    return keys.mask(urls.str.lower().isin(['', 'n/a', 'nan']) | (keys == ''))
+
+def load_alias_table(alias_csv):
+    """@ハンドル等 → チャンネルID の対応表を読み込む
+
+    alias_csv の列:
+    - alias:      @ハンドル または YouTube URL（/@xxx, /c/xxx, /user/xxx）
+    - channel_id: 対応するチャンネルID（UCから始まるもの）
+    {正規化キー: channel:チャンネルID} を返す（ファイルがなければ空）
+    """
+    if not alias_csv or not os.path.exists(alias_csv):
+        return {}
+    
+    df_alias = pd.read_csv(alias_csv, encoding='utf-8-sig', dtype=str).dropna(subset=['alias', 'channel_id'])
+    aliases = df_alias['alias'].str.strip()
+    # 「@handle」だけの指定はURLの形にしてから正規化
+    aliases = aliases.where(~aliases.str.startswith('@'), 'youtube.com/' + aliases)
+    alias_keys = canonical_youtube_key(aliases)
+    channel_keys = 'channel:' + df_alias['channel_id'].str.strip()
+    
+    valid = alias_keys.notna()
+    return dict(zip(alias_keys[valid], channel_keys[valid]))
+
+def match_keys(urls, aliases=None):
+    """URLを正規化した突合キーを返す（エイリアスはチャンネルIDに寄せる）"""
+    keys = canonical_youtube_key(urls)
+    if aliases:
+        keys = keys.map(aliases).fillna(keys)
+    return keys
+
+def build_talent_url_index(df_talent, match_columns, aliases=None):
+    """タレントデータの複数のURL列から、正規化キー → タレント行 の索引を1つ作る
+
+    列ごとのキーを縦に連結した (_match_key, _talent_row, matched_column) の表を返す
+    同じタレント行が同じキーで複数の列に出てくる場合は、match_columns の先の列を残す
+    """
+    parts = []
+    for column in match_columns:
+        parts.append(pd.DataFrame({
+            '_match_key': match_keys(df_talent[column], aliases).to_numpy(),
+            '_talent_row': range(len(df_talent)),
+            'matched_column': column,
+        }))
+    
+    index = pd.concat(parts, ignore_index=True).dropna(subset=['_match_key'])
+    return index.drop_duplicates(subset=['_match_key', '_talent_row'], keep='first')
+
+def match_talent_urls(df_yutura, df_talent, match_columns, aliases=None):
+    """スクレイピングしたURLを、タレントデータの複数のURL列とまとめて突合（ハッシュ結合1回）
+
+    出力行には、どの列で一致したかを matched_column 列に記録する
+    """
+    left = df_yutura.assign(_match_key=match_keys(df_yutura['YouTube URL'], aliases))
+    index = build_talent_url_index(df_talent, match_columns, aliases)
+    
+    # 正規化キーで突合（内部結合 - 両方に存在するもののみ。URLが空のものは突合しない）
+    matched = pd.merge(
+        left.dropna(subset=['_match_key']),
+        index,
+        on='_match_key',
+        how='inner'  # 両方に存在するもののみ
+    )
+    
+    talent_rows = df_talent.iloc[matched['_talent_row'].to_numpy()].reset_index(drop=True)
+    matched = matched.drop(columns=['_match_key', '_talent_row']).reset_index(drop=True)
+    matched_column = matched.pop('matched_column')
+    
+    # pd.merge と同じく、両方にある列名には _x（スクレイピング側）・_y（タレント側）を付ける
+    overlap = matched.columns.intersection(talent_rows.columns)
+    if len(overlap):
+        matched = matched.rename(columns={column: f'{column}_x' for column in overlap})
+        talent_rows = talent_rows.rename(columns={column: f'{column}_y' for column in overlap})
+    
+    df_merged = pd.concat([matched, talent_rows], axis=1)
+    df_merged['matched_column'] = matched_column
+    return df_merged
+
+def save_name_candidates(df_yutura, df_merged, df_talent, candidates_csv, name_columns,
+                         top_k=3, min_score=0.6):
+    """URLで一致しなかった行をチャンネル名であいまい突合し、候補を保存"""
+    unmatched = df_yutura[~df_yutura['チャンネルURL'].isin(df_merged['チャンネルURL'])]
+    print(f"🔍 URLで一致しなかった{len(unmatched)}件をチャンネル名で突合中...")
+    print(f"   突合キー: チャンネル名 ⇔ {' / '.join(name_columns)}（一致度 {min_score} 以上、最大{top_k}候補）")
+    
+    candidates = match_channel_names(unmatched, df_talent, name_columns, top_k, min_score)
+    if candidates.empty:
+        print("⚠ 候補は見つかりませんでした")
+        return candidates
+    
+    os.makedirs(os.path.dirname(candidates_csv) or '.', exist_ok=True)
+    candidates.to_csv(candidates_csv, index=False, encoding='utf-8-sig')
+    found = candidates['チャンネルURL'].nunique()
+    print(f"✓ {found}件に候補が見つかりました（候補 計{len(candidates)}件）")
+    print(f"✓ {candidates_csv} に保存しました（name_score の高い順に確認してください）")
+    return candidates
+
+def merge_youtube_data(yutura_csv, talent_csv, output_csv, alias_csv=None,
+                       match_columns=('main_youtube_url', 'sub_youtube_url'),
+                       candidates_csv=None, name_columns=('main_youtube_name', 'sub_youtube_name'),
+                       min_score=0.6, top_k=3, talent_cache_dir=DEFAULT_CACHE_DIR):
     """
     2つのCSVファイルを突合してマージ
     
     Parameters:
-    - yutura_csv: スクレイピングしたデータ (YouTube URL列あり)
-    - talent_csv: タレントデータ (sub_youtube_url列あり)
-    - output_csv: 出力ファイル名
+    - yutura_csv: スクレイピングしたデータ (YouTube URL列あり)。CSVのパス または DataFrame
+    - talent_csv: タレントデータ (sub_youtube_url列あり)。CSVのパス または DataFrame
+    - output_csv: 出力ファイル名（None=保存しない）
+    - alias_csv: @ハンドル → チャンネルID の対応表（任意。load_alias_table 参照）
+    - match_columns: 突合するタレントデータのURL列（存在しない列は無視）
+    - candidates_csv: URLで一致しなかった行の、チャンネル名による候補の出力先（None=出力しない）
+    - name_columns: チャンネル名と突合するタレントデータの名前列
+    - min_score: 候補として出力する一致度の下限（0〜1）
+    - top_k: 1件あたりの最大候補数
+    - talent_cache_dir: タレントデータのキャッシュの保存先（None=使わない。talent_loader.py 参照）
     """
     
     print("=" * 60)
@@ -29,43 +199,42 @@ def merge_youtube_data(yutura_csv, talent_csv, output_csv):
     print("=" * 60)
     print()
     
-    # ユーチュラのデータを読み込み
-    print(f"📂 読み込み中: {yutura_csv}")
-    df_yutura = pd.read_csv(yutura_csv, encoding='utf-8-sig')
-    print(f"✓ {len(df_yutura)}件のデータを読み込みました")
+    # ユーチュラのデータを読み込み（DataFrameが渡された場合はそのまま使う）
+    if isinstance(yutura_csv, pd.DataFrame):
+        df_yutura = yutura_csv
+        print(f"✓ スクレイピングデータ: {len(df_yutura)}件（前の処理から受け取り）")
+    else:
+        print(f"📂 読み込み中: {yutura_csv}")
+        # 登録者数（数値）は空欄があっても整数のまま扱う（古いCSVで列がなければ無視される）
+        df_yutura = pd.read_csv(yutura_csv, encoding='utf-8-sig', dtype={'チャンネル登録者数_数値': 'Int64'})
+        print(f"✓ {len(df_yutura)}件のデータを読み込みました")
     print()
     
-    # タレントデータを読み込み
-    print(f"📂 読み込み中: {talent_csv}")
-    try:
-        # まず通常の方法で試す
-        df_talent = pd.read_csv(talent_csv, encoding='utf-8-sig')
-    except Exception as e:
-        print(f"⚠ 通常の読み込みでエラー: {e}")
-        print(f"💡 エラー行をスキップして再読み込みします...")
-        
-        # エラー行をスキップして読み込み
-        df_talent = pd.read_csv(
-            talent_csv, 
-            encoding='utf-8-sig',
-            on_bad_lines='skip',  # 問題のある行をスキップ
-            engine='python'       # Pythonエンジンを使用
-        )
-        print(f"⚠ 一部の行をスキップしました")
-    
-    print(f"✓ {len(df_talent)}件のデータを読み込みました")
+    # タレントデータを読み込み（突合に使う列だけ。問題のある行は読み飛ばして記録）
+    if isinstance(talent_csv, pd.DataFrame):
+        df_talent = talent_csv
+        print(f"✓ タレントデータ: {len(df_talent)}件（前の処理から受け取り）")
+    else:
+        print(f"📂 読み込み中: {talent_csv}")
+        columns = list(dict.fromkeys([*TALENT_COLUMNS, *match_columns, *name_columns]))
+        df_talent = load_talent_data(talent_csv, columns, talent_cache_dir)
+        print(f"✓ {len(df_talent)}件のデータを読み込みました")
     print()
     
-    # YouTube URLで突合（内部結合 - 両方に存在するもののみ）
+    # 突合するURL列を確認
+    match_columns = [col for col in match_columns if col in df_talent.columns]
+    if not match_columns:
+        raise KeyError("タレントデータに突合できるURL列がありません")
+    
+    # URLの表記ゆれを吸収した正規化キーを作成
+    aliases = load_alias_table(alias_csv)
+    if aliases:
+        print(f"📖 エイリアス表を読み込みました: {len(aliases)}件")
+    
+    # すべてのURL列をまとめた索引で1回だけ突合
     print("🔗 データを突合中...")
-    print("   突合キー: YouTube URL ⇔ sub_youtube_url")
-    df_merged = pd.merge(
-        df_yutura,
-        df_talent,
-        left_on='YouTube URL',
-        right_on='sub_youtube_url',
-        how='inner'  # 両方に存在するもののみ
-    )
+    print(f"   突合キー: YouTube URL ⇔ {' / '.join(match_columns)}（正規化済み）")
+    df_merged = match_talent_urls(df_yutura, df_talent, match_columns, aliases)
     
     print(f"✓ {len(df_merged)}件が一致しました")
     print()
@@ -77,15 +246,18 @@ def merge_youtube_data(yutura_csv, talent_csv, output_csv):
     print(f"   タレントデータ: {len(df_talent)}件")
     print(f"   一致したデータ: {len(df_merged)}件")
     print(f"   一致率: {match_rate:.2f}%")
+    for column, count in df_merged['matched_column'].value_counts().items():
+        print(f"   {column} で一致: {count}件")
     print()
     
     # 結果を保存
     if len(df_merged) > 0:
-        # 出力ディレクトリが存在しない場合は作成
-        os.makedirs(os.path.dirname(output_csv), exist_ok=True)
-        
-        df_merged.to_csv(output_csv, index=False, encoding='utf-8-sig')
-        print(f"✓ {output_csv} に保存しました")
+        if output_csv:
+            # 出力ディレクトリが存在しない場合は作成
+            os.makedirs(os.path.dirname(output_csv), exist_ok=True)
+            
+            df_merged.to_csv(output_csv, index=False, encoding='utf-8-sig')
+            print(f"✓ {output_csv} に保存しました")
         
         # 列名を表示
         print()
@@ -113,9 +285,16 @@ def merge_youtube_data(yutura_csv, talent_csv, output_csv):
                 print(f"  sub_youtube_name: {row['sub_youtube_name']}")
             if 'sub_youtube_followers' in row:
                 print(f"  sub_youtube_followers: {row['sub_youtube_followers']}")
+            print(f"  一致した列: {row['matched_column']}")
     else:
         print("⚠ 一致するデータがありませんでした")
     
+    # URLで一致しなかった行は、チャンネル名の候補を出力（自動では連結しない）
+    name_columns = [col for col in name_columns if col in df_talent.columns]
+    if candidates_csv and name_columns:
+        print()
+        save_name_candidates(df_yutura, df_merged, df_talent, candidates_csv, name_columns, top_k, min_score)
+    
     print()
     print("=" * 60)
     print("処理完了")
@@ -131,6 +310,13 @@ def main():
     yutura_csv = '../data/output/yutura_with_youtube_urls.csv'  # スクレイピングデータ
     talent_csv = '../data/input/talent_data.csv'                # タレントデータ
     output_csv = '../data/output/merged_youtube_data.csv'       # 出力ファイル
+    alias_csv = '../data/input/youtube_aliases.csv'             # @ハンドル → チャンネルID の対応表（任意）
+    match_columns = ['main_youtube_url', 'sub_youtube_url']     # 突合するタレントデータのURL列
+    candidates_csv = '../data/output/name_match_candidates.csv' # URLで一致しなかった行の名前突合候補（None=出力しない）
+    name_columns = ['main_youtube_name', 'sub_youtube_name']    # チャンネル名と突合するタレントデータの列
+    min_score = 0.6                                             # 候補とする一致度の下限（0〜1）
+    top_k = 3                                                   # 1件あたりの最大候補数
+    talent_cache_dir = '../data/cache'                          # タレントデータのキャッシュ（None=使わない）
     # ========================================
     
     print("\n📌 設定:")
@@ -140,7 +326,8 @@ def main():
     print()
     
     try:
-        df_merged = merge_youtube_data(yutura_csv, talent_csv, output_csv)
+        df_merged = merge_youtube_data(yutura_csv, talent_csv, output_csv, alias_csv, match_columns,
+                                       candidates_csv, name_columns, min_score, top_k, talent_cache_dir)
     except FileNotFoundError as e:
         print(f"\n✗ エラー: ファイルが見つかりません")
         print(f"  {e}")
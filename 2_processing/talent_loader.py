@@ -0,0 +1,267 @@
+"""
+タレントデータ（talent_data.csv）の読み込み
+
+- 型を指定して分割読み込みし（chunksize 行ずつ）、突合に使う列だけを残す
+- 列数の合わない行は1回の読み込みの中で読み飛ばし、行番号と理由を
+  別ファイル（talent_data.bad_lines.csv）に記録する（全体を読み直さない）
+- 閉じていない引用符などで pandas が読めない塊は、その塊の中で壊れた行を探して読み飛ばし、
+  後ろの行から読み続ける（1行のせいで全体が読めなくならないように。ファイルは読み直さない）
+- 読み込んだ表はキャッシュに保存し、talent_data.csv の更新日時・サイズと
+  読み込む列が同じ間はキャッシュから読む（pyarrow があれば Feather、なければ pickle）
+
+merge_youtube_data.py から使われます。
+"""
+
+import csv
+import io
+import itertools
+import json
+import os
+import re
+import time
+import warnings
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  （Feather形式のキャッシュに使用）
+    CACHE_FORMAT = 'feather'
+except ImportError:
+    CACHE_FORMAT = 'pickle'
+
+# 読み込み処理を変えたら上げる（古いキャッシュは使われなくなる）
+TALENT_LOADER_VERSION = 2
+
+DEFAULT_CACHE_DIR = '../data/cache'
+
+# 突合・紹介文作成で使う列（存在しない列は無視）
+TALENT_COLUMNS = [
+    'talent_id',
+    'talent_name',
+    'main_youtube_url',
+    'main_youtube_name',
+    'sub_youtube_url',
+    'sub_youtube_name',
+    'sub_youtube_followers',
+]
+
+# pandas の C エンジンが列数の合わない行を読み飛ばしたときの警告
+BAD_LINE_RE = re.compile(r'Skipping line (\d+): (.+)')
+
+def bad_lines_path(talent_csv):
+    """読み飛ばした行の記録先（例: talent_data.bad_lines.csv）"""
+    return os.path.splitext(talent_csv)[0] + '.bad_lines.csv'
+
+def _cache_paths(talent_csv, cache_dir):
+    """キャッシュ本体と、その条件を記録したファイルのパス"""
+    stem = os.path.splitext(os.path.basename(talent_csv))[0]
+    base = os.path.join(cache_dir, stem)
+    return f'{base}.{CACHE_FORMAT}', f'{base}.cache.json'
+
+def _cache_key(talent_csv, columns):
+    """キャッシュを使ってよいかの判定に使う情報（更新日時・サイズ・読み込む列）"""
+    stat = os.stat(talent_csv)
+    return {
+        'source': os.path.abspath(talent_csv),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'columns': list(columns) if columns else None,
+        'format': CACHE_FORMAT,
+        'version': TALENT_LOADER_VERSION,
+    }
+
+def _read_cache(cache_file, meta_file, key):
+    """条件が一致すればキャッシュを読み込む（使えなければ None）"""
+    if not (os.path.exists(cache_file) and os.path.exists(meta_file)):
+        return None, None
+    try:
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('key') != key:
+            return None, None
+        if CACHE_FORMAT == 'feather':
+            df = pd.read_feather(cache_file)
+        else:
+            df = pd.read_pickle(cache_file)
+    except Exception as e:
+        print(f"⚠ キャッシュを読み込めませんでした（CSVから読み込みます）: {e}")
+        return None, None
+    return df, meta
+
+def _write_cache(df, cache_file, meta_file, key, bad_line_count):
+    """キャッシュを保存（失敗しても処理は続ける）"""
+    try:
+        os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+        if CACHE_FORMAT == 'feather':
+            df.reset_index(drop=True).to_feather(cache_file)
+        else:
+            df.to_pickle(cache_file)
+        # 本体を書き終えてから条件を書く（途中で止まっても壊れたキャッシュは使われない）
+        with open(meta_file, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'rows': len(df), 'bad_lines': bad_line_count}, f, ensure_ascii=False)
+    except Exception as e:
+        print(f"⚠ キャッシュを保存できませんでした: {e}")
+
+def read_talent_csv(talent_csv, columns=None, chunksize=50000):
+    """talent_data.csv を分割読み込み（すべて文字列型）
+
+    ファイルは1回だけ先頭から読み、chunksize 行ずつの塊を pandas の C エンジンで読む
+    - 列数の合わない行は読み飛ばす
+    - 引用符が閉じておらず pandas が読めない塊は、csv モジュールで壊れたレコードを探して
+      その行だけを読み飛ばし、後ろの行は次の塊として読み直す（後ろの行は失わない）
+    (表, [(行番号, 理由), ...]) を返す（行番号はヘッダーを1行目とするファイルの行）
+    """
+    wanted = set(columns) if columns else None
+    bad_lines = []
+    chunks = []
+    with open(talent_csv, 'r', encoding='utf-8-sig', newline='') as f:
+        header_line = f.readline()
+        if not header_line:
+            return pd.DataFrame(columns=list(columns or [])), []
+        if not header_line.endswith('\n'):
+            header_line += '\n'
+        header = next(csv.reader([header_line]))
+        lines = iter(f)
+        first_line = 2  # 次の塊の先頭の行番号
+        while True:
+            block, starts = _next_block(lines, chunksize)
+            if not block:
+                break
+            try:
+                chunk, chunk_bad = _parse_block(header, header_line, block, starts, first_line)
+            except pd.errors.ParserError as e:
+                broken, reason = _find_broken_record(header, block, first_line)
+                if broken is None:
+                    raise
+                print(f"⚠ {first_line + broken}行目を読み込めないため読み飛ばします: {e}")
+                chunk, chunk_bad = _parse_block(header, header_line, block[:broken],
+                                                 [start for start in starts if start < broken], first_line)
+                chunk_bad.append((first_line + broken, reason))
+                # 壊れた行の後ろは、飲み込まれていた行も含めて次の塊から読み直す
+                lines = itertools.chain(block[broken + 1:], lines)
+                block = block[:broken + 1]
+            # usecols を指定すると列数の多い行が黙って切り詰められるため、
+            # 全列を読んでから塊ごとに必要な列だけ残す
+            if wanted is not None:
+                chunk = chunk[[col for col in chunk.columns if col in wanted]]
+            chunks.append(chunk)
+            bad_lines.extend(chunk_bad)
+            first_line += len(block)
+
+    df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=list(columns or []))
+    return df, bad_lines
+
+def _next_block(lines, chunksize):
+    """lines から chunksize 行ほど取り出す（引用符の中の改行では切らない）
+
+    (行のリスト, 各レコードが始まる行の位置のリスト) を返す
+    """
+    block = []
+    starts = []
+    in_quote = False
+    for line in lines:
+        if not in_quote:
+            starts.append(len(block))
+        block.append(line)
+        # 引用符の数が奇数の行で、引用符の中に入る・出る（"" は2個なので変わらない）
+        if line.count('"') % 2:
+            in_quote = not in_quote
+        if len(block) >= chunksize and not in_quote:
+            break
+    return block, starts
+
+def _parse_block(header, header_line, block, starts, first_line):
+    """1つの塊を pandas の C エンジンで読む（列数の合わない行は警告から行番号を拾う）
+
+    pandas の警告の行番号はレコードの番号なので、starts でファイルの行番号に直す
+    """
+    bad_lines = []
+    # 先頭のレコードの列が多いと、pandas は余った列を行の名前（インデックス）とみなして
+    # 読み飛ばさないため、塊の先頭にある列の多いレコードはここで読み飛ばす
+    skip = 0
+    for n, start in enumerate(starts):
+        end = starts[n + 1] if n + 1 < len(starts) else len(block)
+        row = next(csv.reader(block[start:end]), [])
+        if len(row) > len(header):
+            bad_lines.append((first_line + start, f'expected {len(header)} fields, saw {len(row)}'))
+        elif row:
+            break
+        skip = n + 1
+    starts = starts[skip:]
+    text = header_line + ''.join(block[starts[0]:]) if starts else header_line
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always', pd.errors.ParserWarning)
+        chunk = pd.read_csv(
+            io.StringIO(text),
+            dtype='string',
+            on_bad_lines='warn',  # 問題のある行は警告を出して読み飛ばす
+        )
+
+    for warning in caught:
+        if issubclass(warning.category, pd.errors.ParserWarning):
+            bad_lines.extend((first_line + starts[int(record) - 2], reason.strip())
+                             for record, reason in BAD_LINE_RE.findall(str(warning.message)))
+        else:
+            warnings.warn_explicit(warning.message, warning.category, warning.filename, warning.lineno)
+    return chunk, bad_lines
+
+def _find_broken_record(header, block, first_line):
+    """pandas が読めなかった塊から、壊れたレコードを csv モジュールで探す
+
+    - 引用符が閉じておらず後ろの行を飲み込んで列数が合わなくなったレコード
+    - csv モジュールでも読めないレコード
+    (塊の中の位置, 理由) を返す（見つからなければ (None, None)）
+    """
+    reader = csv.reader(block)
+    record_start = 0
+    try:
+        for row in reader:
+            span = reader.line_num - record_start  # このレコードが使った行数
+            if span > 1 and len(row) != len(header):
+                return record_start, f'Unclosed quote in line {first_line + record_start}'
+            record_start = reader.line_num
+    except csv.Error as e:
+        return record_start, f'{e} in line {first_line + record_start}'
+    return None, None
+
+def save_bad_lines(bad_lines, path):
+    """読み飛ばした行の行番号と理由を保存"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    pd.DataFrame(bad_lines, columns=['line', 'reason']).to_csv(path, index=False, encoding='utf-8-sig')
+
+def load_talent_data(talent_csv, columns=TALENT_COLUMNS, cache_dir=DEFAULT_CACHE_DIR, chunksize=50000):
+    """タレントデータを読み込む（キャッシュがあればキャッシュから）
+
+    columns:   読み込む列（None=すべて。存在しない列は無視）
+    cache_dir: キャッシュの保存先（None=キャッシュを使わない）
+    """
+    start = time.perf_counter()
+    key = _cache_key(talent_csv, columns)
+
+    if cache_dir:
+        cache_file, meta_file = _cache_paths(talent_csv, cache_dir)
+        df, meta = _read_cache(cache_file, meta_file, key)
+        if df is not None:
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"✓ キャッシュから読み込みました（{elapsed:.0f}ms）: {cache_file}")
+            if meta.get('bad_lines'):
+                print(f"⚠ 読み飛ばした行: {meta['bad_lines']}件（{bad_lines_path(talent_csv)}）")
+            return df
+
+    df, bad_lines = read_talent_csv(talent_csv, columns, chunksize)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"✓ CSVから読み込みました（{elapsed:.0f}ms）")
+
+    path = bad_lines_path(talent_csv)
+    if bad_lines:
+        save_bad_lines(bad_lines, path)
+        print(f"⚠ 列数の合わない・壊れた{len(bad_lines)}行を読み飛ばしました（行番号と理由: {path}）")
+    elif os.path.exists(path):
+        # 前回の記録が残っていると紛らわしいので消す
+        os.remove(path)
+
+    if cache_dir:
+        _write_cache(df, cache_file, meta_file, key, len(bad_lines))
+
+    return df
@@ -7,185 +7,264 @@ merged_youtube_data.csvから紹介文用のテキストを生成します。
 1. merged_youtube_data.csv を用意（merge_youtube_data.pyで生成）
 2. bio_data.tsv を data/input/ に配置
 3. python update_bio_channels.py を実行
+
+前回の実行から紹介文が変わったタレントの行だけを updated_biography.delta.tsv にも出力します
+（タレントごとの紹介文のハッシュ値を data/cache/bio_fingerprints.tsv に記録して比較）。
+アップロードはこの差分ファイルだけで済みます。
+
+他のスクリプトから使う場合:
+    from update_bio_channels import update_bio_channels
+    df_channels, df_bio = update_bio_channels(df_merged, df_bio)
+（ファイルを介さず、DataFrameを受け取ってDataFrameを返します）
 """
 
+import hashlib
+import numpy as np
 import pandas as pd
 import os
-
-print("=" * 80)
-print("紹介文に「その他Youtubeチャンネル」を追加するスクリプト")
-print("=" * 80)
-
-# ========================================
-# 設定：ファイルパスを指定してください
-# ========================================
-
-# 1. マージ済みデータファイル
-MERGED_FILE = '../data/output/merged_youtube_data.csv'
-
-# 2. 紹介文データファイル（TSVファイル）
-BIO_FILE = '../data/input/bio_data.tsv'
-
-# 3. 出力ファイル
-OUTPUT_FILE = '../data/output/updated_biography.tsv'
-
-# 4. チャンネル情報付きCSV（中間ファイル）
-CHANNEL_TEXT_FILE = '../data/output/channels_with_text.csv'
-
-# ========================================
-# 処理開始
-# ========================================
-
-print("\nStep 1: マージ済みデータを読み込み中...")
-try:
-    df_merged = pd.read_csv(MERGED_FILE, encoding='utf-8-sig')
+import sys
+
+DEFAULT_FINGERPRINT_FILE = '../data/cache/bio_fingerprints.tsv'
+
+def as_text(values):
+    """各値を str() した文字列の列に変換（欠損値は、CSVから読んだ場合と同じ 'nan'）
+
+    'string' 型の欠損値（pd.NA）や None も str() すると '<NA>'・'None' になるため 'nan' にそろえる
+    """
+    return values.astype(object).map(str).mask(values.isna(), 'nan')
+
+def talent_id_keys(ids):
+    """talent_id を突き合わせ用の文字列にそろえる
+
+    数値として読めるものは整数にそろえ（123・123.0・'123' はどれも '123'）、
+    数値でないものだけを文字列のまま使う
+    """
+    numeric = pd.to_numeric(ids, errors='coerce')
+    whole = numeric.notna() & (numeric % 1 == 0)
+    integers = numeric.where(whole).astype('Int64').astype(object).map(str)
+    return as_text(ids).mask(whole, integers)
+
+def join_by_key(lines, keys, sep='\n'):
+    """同じキーの行を sep で連結（キーは最初に出てきた順、各キー内の行の順序は保つ）
+
+    groupby().agg(sep.join) はグループごとにSeriesを作るため遅いので、
+    キーの番号で安定ソートしてから区切り位置ごとに連結する
+    """
+    codes, uniques = pd.factorize(keys)
+    order = np.argsort(codes, kind='stable')
+    sorted_lines = lines.to_numpy()[order].tolist()
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    joined = [sep.join(sorted_lines[start:end]) for start, end in zip(bounds[:-1], bounds[1:])]
+    return pd.Series(joined, index=uniques, dtype=object)
+
+def load_merged_data(merged_file):
+    """マージ済みデータを読み込む"""
+    print("\nStep 1: マージ済みデータを読み込み中...")
+    try:
+        df_merged = pd.read_csv(merged_file, encoding='utf-8-sig')
+    except Exception as e:
+        print(f"✗ エラー: マージデータが読み込めませんでした")
+        print(f"  ファイルパス: {merged_file}")
+        print(f"  エラー内容: {e}")
+        raise
     print(f"✓ マージデータ読み込み成功: {len(df_merged)}行")
-except Exception as e:
-    print(f"✗ エラー: マージデータが読み込めませんでした")
-    print(f"  ファイルパス: {MERGED_FILE}")
-    print(f"  エラー内容: {e}")
-    exit(1)
-
-print("\nStep 2: チャンネル情報を整形中...")
-
-# talent_idごとにチャンネル情報を集約
-channel_groups = {}
-
-for idx, row in df_merged.iterrows():
-    talent_id = row['talent_id']
-    channel_name = row['チャンネル名']
-    youtube_url = row['YouTube URL']
-    
-    if talent_id not in channel_groups:
-        channel_groups[talent_id] = []
-    
-    channel_groups[talent_id].append({
-        'channel_name': channel_name,
-        'youtube_url': youtube_url
-    })
-
-print(f"✓ {len(channel_groups)}人のタレントのチャンネル情報を整形しました")
-
-# 「その他Youtubeチャンネル」テキストを生成
-channel_texts = {}
-
-for talent_id, channels in channel_groups.items():
-    # ユニークなチャンネルのみ取得（重複排除）
-    unique_channels = []
-    seen_urls = set()
-    
-    for ch in channels:
-        if ch['youtube_url'] not in seen_urls:
-            unique_channels.append(ch)
-            seen_urls.add(ch['youtube_url'])
-    
-    # テキスト生成
-    text_lines = ["その他Youtubeチャンネル"]
-    for ch in unique_channels:
-        text_lines.append(f"・{ch['channel_name']}：__{ch['youtube_url']}__")
-    
-    channel_texts[talent_id] = "\n".join(text_lines)
-
-print(f"✓ 「その他Youtubeチャンネル」テキストを生成しました")
-
-# 中間ファイルとして保存（channels_with_text.csv）
-print("\nStep 3: 中間ファイルを保存中...")
-
-channel_data_for_csv = []
-for talent_id, text in channel_texts.items():
-    # 最初のチャンネル情報を取得
-    first_channel = channel_groups[talent_id][0]
-    
-    # talent_nameを取得（merged_dataから）
-    talent_name = df_merged[df_merged['talent_id'] == talent_id]['talent_name'].iloc[0]
-    
-    channel_data_for_csv.append({
-        'talent_id': talent_id,
-        'talent_name': talent_name,
-        'サブチャンネル名': first_channel['channel_name'],
-        'YouTube URL': first_channel['youtube_url'],
-        'その他Youtubeチャンネル': text
-    })
-
-df_channels = pd.DataFrame(channel_data_for_csv)
-
-# 出力ディレクトリが存在しない場合は作成
-os.makedirs(os.path.dirname(CHANNEL_TEXT_FILE), exist_ok=True)
+    return df_merged
 
-df_channels.to_csv(CHANNEL_TEXT_FILE, index=False, encoding='utf-8-sig')
-print(f"✓ 中間ファイル保存成功: {CHANNEL_TEXT_FILE}")
-
-# bio_dataがある場合は紹介文を更新
-if os.path.exists(BIO_FILE):
+def load_bio_data(bio_file):
+    """紹介文データ（TSV）を読み込む"""
     print("\nStep 4: 紹介文データを読み込み中...")
     try:
-        df_bio = pd.read_csv(BIO_FILE, sep='\t', encoding='utf-8')
-        print(f"✓ 紹介文データ読み込み成功: {len(df_bio)}行")
-        print(f"  カラム: {df_bio.columns.tolist()}")
+        df_bio = pd.read_csv(bio_file, sep='\t', encoding='utf-8')
     except Exception as e:
         print(f"✗ エラー: 紹介文データファイルが読み込めませんでした")
-        print(f"  ファイルパス: {BIO_FILE}")
+        print(f"  ファイルパス: {bio_file}")
         print(f"  エラー内容: {e}")
         print("\n【ヒント】")
         print("  - ファイルパスが正しいか確認してください")
         print("  - ファイルがTSV形式（タブ区切り）か確認してください")
-        exit(1)
+        raise
+    print(f"✓ 紹介文データ読み込み成功: {len(df_bio)}行")
+    print(f"  カラム: {df_bio.columns.tolist()}")
+    return df_bio
+
+def exclude_main_channels(df_merged):
+    """メインチャンネルとして一致した行は「その他Youtubeチャンネル」に含めない"""
+    if 'matched_column' not in df_merged.columns:
+        return df_merged
+    is_main = df_merged['matched_column'] == 'main_youtube_url'
+    if is_main.any():
+        df_merged = df_merged[~is_main]
+        print(f"  メインチャンネルとして一致した{is_main.sum()}行を除外しました")
+    return df_merged
+
+def build_channel_texts(df_merged):
+    """タレントごとの「その他Youtubeチャンネル」テキストを生成
+
+    (channels_with_text.csv の内容の表, {talent_id: テキスト} のSeries) を返す
+    """
+    print("\nStep 2: チャンネル情報を整形中...")
+
+    # talent_idごとにチャンネル情報を集約（talent_idは最初に出てきた順）
+    channels = df_merged[['talent_id', 'talent_name', 'チャンネル名', 'YouTube URL']]
+    first_channels = channels.drop_duplicates(subset='talent_id')
+
+    print(f"✓ {len(first_channels)}人のタレントのチャンネル情報を整形しました")
+
+    # 「その他Youtubeチャンネル」テキストを生成
+    # ユニークなチャンネルのみ取得（同じタレントの同じURLは最初の1件だけ）
+    unique_channels = channels.drop_duplicates(subset=['talent_id', 'YouTube URL'])
+    channel_lines = '・' + as_text(unique_channels['チャンネル名']) + '：__' + as_text(unique_channels['YouTube URL']) + '__'
+    channel_texts = 'その他Youtubeチャンネル\n' + join_by_key(channel_lines, unique_channels['talent_id'])
+
+    print(f"✓ 「その他Youtubeチャンネル」テキストを生成しました")
+
+    # チャンネル名・URLは各タレントの最初のチャンネルのもの
+    df_channels = pd.DataFrame({
+        'talent_id': first_channels['talent_id'],
+        'talent_name': first_channels['talent_name'],
+        'サブチャンネル名': first_channels['チャンネル名'],
+        'YouTube URL': first_channels['YouTube URL'],
+        'その他Youtubeチャンネル': first_channels['talent_id'].map(channel_texts),
+    })
+    return df_channels, channel_texts
 
+def update_biographies(df_bio, channel_texts):
+    """紹介文の最後に「その他Youtubeチャンネル」を追加した表を返す（df_bio は変更しない）"""
     print("\nStep 5: 紹介文を更新中...")
 
-    # 紹介文を更新する関数
-    def update_biography(row):
-        talent_id = row['talent_id']
-        bio = str(row['紹介文']) if '紹介文' in row else ''
-        
-        # talent_idに対応するチャンネル情報があれば追加
-        if talent_id in channel_texts:
-            channel_text = channel_texts[talent_id]
-            
-            # URLの前後の__を削除
-            channel_text = channel_text.replace('__', '')
-            
-            # 元の紹介文がnanや空の場合は、チャンネル情報のみを入れる
-            if bio == 'nan' or bio.strip() == '':
-                return channel_text
-            else:
-                # 紹介文がある場合は、最後に空行+チャンネル情報を追加
-                return f"{bio}\n\n{channel_text}"
-        else:
-            # チャンネル情報がない場合
-            if bio == 'nan' or bio.strip() == '':
-                return ''  # 空文字を返す
-            else:
-                return bio
-
-    # 各行の紹介文を更新
-    df_bio['紹介文'] = df_bio.apply(update_biography, axis=1)
+    # 元の紹介文（nanや空の場合は空として扱う）
+    if '紹介文' in df_bio.columns:
+        bio = as_text(df_bio['紹介文'])
+    else:
+        bio = pd.Series('', index=df_bio.index, dtype=object)
+    bio_empty = (bio == 'nan') | (bio.str.strip() == '')
+    bio = bio.mask(bio_empty, '')
+
+    # talent_idに対応するチャンネル情報（URLの前後の__は削除）
+    channel_texts = channel_texts.str.replace('__', '', regex=False)
+    talent_ids = df_bio['talent_id']
+    if channel_texts.index.dtype != talent_ids.dtype:
+        # ファイルを介さずに渡された場合や欠損値のある列では、talent_id の型が
+        # 文字列・整数・小数で食い違うことがあるので、同じ値が同じキーになるようそろえて突き合わせる
+        channel_texts.index = talent_id_keys(channel_texts.index.to_series())
+        talent_ids = talent_id_keys(talent_ids)
+    channel_text = talent_ids.map(channel_texts)
+    has_channels = channel_text.notna()
+
+    # 紹介文がある場合は、最後に空行+チャンネル情報を追加
+    # 元の紹介文が空の場合は、チャンネル情報のみを入れる
+    updated = bio.mask(has_channels, bio + '\n\n' + channel_text)
+    updated = updated.mask(has_channels & bio_empty, channel_text)
+    df_bio = df_bio.copy()
+    df_bio['紹介文'] = updated.astype(object)
 
     # 更新された件数を確認
-    updated_count = sum(1 for tid in df_bio['talent_id'] if tid in channel_texts)
+    updated_count = int(has_channels.sum())
     print(f"✓ 更新完了: {updated_count}件の紹介文にチャンネル情報を追加しました")
     print(f"  未更新: {len(df_bio) - updated_count}件（該当するチャンネル情報なし）")
+    return df_bio
+
+def update_bio_channels(df_merged, df_bio=None):
+    """マージ済みデータから「その他Youtubeチャンネル」を作り、紹介文に追加
+
+    df_bio が None の場合はチャンネル情報の表だけを作る
+    (channels_with_text.csv の内容の表, 更新後の紹介文の表 または None) を返す
+    """
+    df_merged = exclude_main_channels(df_merged)
+    df_channels, channel_texts = build_channel_texts(df_merged)
+    if df_bio is None:
+        return df_channels, None
+    return df_channels, update_biographies(df_bio, channel_texts)
 
+def save_channel_texts(df_channels, channel_text_file):
+    """中間ファイルとして保存（channels_with_text.csv）"""
+    print("\nStep 3: 中間ファイルを保存中...")
+
+    # 出力ディレクトリが存在しない場合は作成
+    os.makedirs(os.path.dirname(channel_text_file), exist_ok=True)
+
+    df_channels.to_csv(channel_text_file, index=False, encoding='utf-8-sig')
+    print(f"✓ 中間ファイル保存成功: {channel_text_file}")
+
+def save_biographies(df_bio, output_file):
+    """更新後の紹介文をTSVで保存"""
     print("\nStep 6: ファイルを保存中...")
     try:
         # 出力ディレクトリが存在しない場合は作成
-        os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-        
-        df_bio.to_csv(OUTPUT_FILE, sep='\t', index=False, encoding='utf-8')
-        print(f"✓ 保存成功: {OUTPUT_FILE}")
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+        df_bio.to_csv(output_file, sep='\t', index=False, encoding='utf-8')
+        print(f"✓ 保存成功: {output_file}")
     except Exception as e:
         print(f"✗ エラー: ファイルの保存に失敗しました")
         print(f"  エラー内容: {e}")
-        exit(1)
-
-    print("\n" + "=" * 80)
-    print("処理完了！")
-    print("=" * 80)
-
-    # サンプル表示
-    print("\n【処理結果のサンプル】最初の2件を表示:")
+        raise
+
+def delta_path(output_file):
+    """差分ファイルのパス（例: updated_biography.delta.tsv）"""
+    root, ext = os.path.splitext(output_file)
+    return f'{root}.delta{ext}'
+
+def bio_fingerprints(df_bio):
+    """行ごとの内容のハッシュ値（talent_id・紹介文など全列の値から計算）"""
+    row_text = as_text(df_bio.iloc[:, 0])
+    for column in df_bio.columns[1:]:
+        row_text = row_text + '\x1f' + as_text(df_bio[column])
+    return row_text.map(lambda text: hashlib.sha1(text.encode('utf-8')).hexdigest())
+
+def load_fingerprints(fingerprint_file):
+    """前回書き出した紹介文のハッシュ値を読み込む（なければ None）"""
+    if not fingerprint_file or not os.path.exists(fingerprint_file):
+        return None
+    return pd.read_csv(fingerprint_file, sep='\t', dtype=str, keep_default_na=False)
+
+def save_bio_delta(df_bio, output_file, fingerprint_file=DEFAULT_FINGERPRINT_FILE):
+    """前回から変わった（または新しく増えた）行だけを差分ファイルに保存
+
+    チャンネル情報・元の紹介文のどちらが変わった場合も差分に含まれる
+    前回の記録がなければすべての行が差分になる
+    差分の件数を返す
+    """
+    fingerprints = pd.DataFrame({
+        'talent_id': as_text(df_bio['talent_id']),
+        'fingerprint': bio_fingerprints(df_bio),
+    })
+    keys = fingerprints['talent_id'] + '\t' + fingerprints['fingerprint']
+
+    previous = load_fingerprints(fingerprint_file)
+    if previous is None:
+        changed = pd.Series(True, index=df_bio.index)
+        print(f"💡 前回の記録がないため、すべての行を差分として出力します")
+    else:
+        changed = ~keys.isin(previous['talent_id'] + '\t' + previous['fingerprint'])
+        removed = ~previous['talent_id'].isin(fingerprints['talent_id'])
+        if removed.any():
+            print(f"  紹介文データからなくなったタレント: {removed.sum()}件")
+
+    delta_file = delta_path(output_file)
+    os.makedirs(os.path.dirname(delta_file), exist_ok=True)
+    df_bio[changed].to_csv(delta_file, sep='\t', index=False, encoding='utf-8')
+    print(f"✓ 差分保存成功: {delta_file}（{int(changed.sum())}件 / 全{len(df_bio)}件）")
+
+    # 差分を書き出してから記録を更新（途中で止まった場合は次回も同じ行が差分になる）
+    if fingerprint_file:
+        os.makedirs(os.path.dirname(fingerprint_file), exist_ok=True)
+        fingerprints.to_csv(fingerprint_file, sep='\t', index=False, encoding='utf-8')
+    return int(changed.sum())
+
+def clear_bio_delta(output_file):
+    """差分ファイルを空（ヘッダーのみ）にする（紹介文を作り直さなかった実行で、前回の差分を残さないため）"""
+    delta_file = delta_path(output_file)
+    if os.path.exists(output_file):
+        columns = pd.read_csv(output_file, sep='\t', encoding='utf-8', nrows=0)
+        columns.to_csv(delta_file, sep='\t', index=False, encoding='utf-8')
+        print(f"✓ 変更がないため差分ファイルを空にしました: {delta_file}")
+
+def print_bio_samples(df_bio, n=2):
+    """更新後の紹介文のサンプルを表示"""
+    print(f"\n【処理結果のサンプル】最初の{n}件を表示:")
     print("-" * 80)
-    for i in range(min(2, len(df_bio))):
+    for i in range(min(n, len(df_bio))):
         print(f"\n{i+1}件目:")
         print(f"  talent_id: {df_bio.iloc[i]['talent_id']}")
         print(f"  talent_name: {df_bio.iloc[i]['talent_name']}")
@@ -198,11 +277,52 @@ if os.path.exists(BIO_FILE):
             print(f"  {bio_preview}")
         print("-" * 80)
 
+def main():
+    """メイン処理"""
+    print("=" * 80)
+    print("紹介文に「その他Youtubeチャンネル」を追加するスクリプト")
+    print("=" * 80)
+
+    # ========================================
+    # 設定：ファイルパスを指定してください
+    # ========================================
+    merged_file = '../data/output/merged_youtube_data.csv'        # マージ済みデータファイル
+    bio_file = '../data/input/bio_data.tsv'                       # 紹介文データファイル（TSVファイル）
+    output_file = '../data/output/updated_biography.tsv'          # 出力ファイル
+    channel_text_file = '../data/output/channels_with_text.csv'   # チャンネル情報付きCSV（中間ファイル）
+    fingerprint_file = '../data/cache/bio_fingerprints.tsv'       # 前回書き出した紹介文の記録（差分の判定用）
+    # ========================================
+
+    try:
+        df_merged = exclude_main_channels(load_merged_data(merged_file))
+        df_channels, channel_texts = build_channel_texts(df_merged)
+        save_channel_texts(df_channels, channel_text_file)
+
+        # bio_dataがない場合は中間ファイルのみ
+        if not os.path.exists(bio_file):
+            print(f"\n⚠ 紹介文データファイル ({bio_file}) が見つかりません")
+            print(f"✓ 中間ファイル ({channel_text_file}) のみ生成されました")
+            print("\n処理が完了しました！")
+            return
+
+        df_bio = update_biographies(load_bio_data(bio_file), channel_texts)
+        save_biographies(df_bio, output_file)
+        save_bio_delta(df_bio, output_file, fingerprint_file)
+    except Exception:
+        # エラー内容は各関数で表示済み
+        sys.exit(1)
+
+    print("\n" + "=" * 80)
+    print("処理完了！")
+    print("=" * 80)
+
+    # サンプル表示
+    print_bio_samples(df_bio)
+
     print(f"\n✓ 総レコード数: {len(df_bio)}件")
-    print(f"✓ 出力ファイル: {OUTPUT_FILE}")
+    print(f"✓ 出力ファイル: {output_file}")
+    print(f"✓ 差分ファイル: {delta_path(output_file)}")
     print("\n処理が完了しました！")
 
-else:
-    print(f"\n⚠ 紹介文データファイル ({BIO_FILE}) が見つかりません")
-    print(f"✓ 中間ファイル ({CHANNEL_TEXT_FILE}) のみ生成されました")
-    print("\n処理が完了しました！")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,368 @@
+"""
+ベンチマークスクリプト（合成データ）
+
+保存済みのページや実データがなくても処理速度を計測できるよう、
+- ユーチュラの一覧ページ（ul.channel-list）とチャンネルページ
+- タレントデータ（talent_data.csv）と紹介文データ（bio_data.tsv）
+を乱数から生成し、次の処理の時間を 1倍・10倍・100倍 の規模で計測します。
+
+- extract_channels     一覧ページからのチャンネル情報の抽出
+- extract_youtube_url  チャンネルページからのYouTube URLの抽出
+- merge_youtube_data   タレントデータとの突合（URL・チャンネル名）
+- update_bio_channels  紹介文の更新
+
+結果は data/benchmarks/benchmark_results.jsonl に1回の実行につき1行追記し（コミット・日時つき）、
+前回の結果より遅くなった処理を表示します。
+
+使い方:
+python benchmark_suite.py                   # 1倍・10倍・100倍
+python benchmark_suite.py --scales 1 10     # 規模を指定
+python benchmark_suite.py --repeat 1        # 計測回数（最速の値を採用）
+"""
+
+from contextlib import redirect_stdout
+from datetime import datetime
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(ROOT, '1_scraping'), os.path.join(ROOT, '2_processing')]
+
+import merge_youtube_data  # noqa: E402
+import parser_backends  # noqa: E402
+import undetected_scraper  # noqa: E402
+import update_bio_channels  # noqa: E402
+
+BENCHMARKS = ['extract_channels', 'extract_youtube_url', 'merge_youtube_data', 'update_bio_channels']
+
+# チャンネル名の材料（表記ゆれの突合が実データに近い負荷になるよう、かな・カナ・英字を混ぜる）
+NAME_PARTS = ['ゆっくり', 'ゲーム', '実況', 'チャンネル', 'ちゃんねる', 'Vtuber', 'ラジオ', '料理',
+              'Games', 'TV', 'Official', '切り抜き', 'ASMR', '歌ってみた', 'ちゃん', 'の日常']
+YOUTUBE_STYLES = ['channel/UC{:022d}', '@handle{}', 'c/custom{}', 'user/user{}']
+
+# ========================================
+# 合成データの生成
+# ========================================
+
+def generate_channels(count, seed=0, missing_rate=0.1):
+    """チャンネル一覧（名前・ID・登録者数・YouTube URL）を生成"""
+    rng = random.Random(seed)
+    channels = []
+    for i in range(1, count + 1):
+        name = ''.join(rng.sample(NAME_PARTS, rng.randint(2, 3))) + str(i)
+        if rng.random() < missing_rate:
+            youtube_url = 'N/A'
+        else:
+            youtube_url = 'https://www.youtube.com/' + rng.choice(YOUTUBE_STYLES).format(i)
+        channels.append({
+            'id': i,
+            'name': name,
+            'subscribers': f'{rng.randint(1, 9999) / 10:.1f}万人',
+            'youtube_url': youtube_url,
+        })
+    return channels
+
+def listing_page_html(channels, nav_links=100):
+    """一覧ページ（ul.channel-list）のHTML"""
+    nav = ''.join(f'<li><a href="/tag/{i}/">タグ{i}</a></li>' for i in range(nav_links))
+    items = ''.join(
+        f'<li><a href="/channel/{ch["id"]}/"><img src="/img/{ch["id"]}.png">'
+        f'<p class="title"> {ch["name"]} </p></a>'
+        f'<div class="info"><p><i class="icon" title="チャンネル登録者数"></i> {ch["subscribers"]}</p>'
+        f'<p><i title="動画本数"></i>{ch["id"] % 500}本</p></div></li>\n'
+        for ch in channels
+    )
+    return (
+        f'<html><head><title>タグ | ユーチュラ</title></head><body>'
+        f'<header><ul class="nav">{nav}</ul></header>'
+        f'<main><ul class="channel-list">{items}</ul></main>'
+        f'<footer><p>ユーチュラ</p></footer></body></html>'
+    )
+
+def channel_page_html(channel, filler=50):
+    """チャンネルページのHTML（YouTube URLがないチャンネルはリンクなし）"""
+    text = ''.join(f'<p>説明文 {channel["id"]}-{j}</p>' for j in range(filler))
+    link = ''
+    if channel['youtube_url'] != 'N/A':
+        link = f'<a href="{channel["youtube_url"]}" target="_blank">YouTube</a>'
+    return (
+        f'<html><head><title>{channel["name"]} | ユーチュラ</title></head><body>'
+        f'<h1>{channel["name"]}</h1><div class="channel-data">{text}{link}</div>'
+        f'<div class="related"><a href="https://twitter.com/x{channel["id"]}">X</a></div>'
+        f'</body></html>'
+    )
+
+def vary_url(url, rng):
+    """タレントデータ側のURLの表記ゆれ（http・m.・末尾スラッシュ・クエリ）"""
+    variants = [
+        url,
+        url + '/',
+        url.replace('https://www.', 'http://'),
+        url.replace('https://www.', 'https://m.') + '?si=abc',
+        url + '/videos',
+    ]
+    return rng.choice(variants)
+
+def vary_name(name, rng):
+    """タレントデータ側のチャンネル名の表記ゆれ"""
+    variants = [name, name.upper(), name.replace('チャンネル', 'ch'), name + '【公式】', name.replace('ちゃん', 'チャン')]
+    return rng.choice(variants)
+
+def generate_tables(channels, talent_count, seed=0, match_rate=0.5):
+    """ユーチュラの取得結果・タレントデータ・紹介文データの表を生成
+
+    チャンネルの match_rate の割合はタレントデータの sub_youtube_url と（表記ゆれつきで）一致する
+    """
+    rng = random.Random(seed)
+    df_yutura = pd.DataFrame({
+        'チャンネル名': [ch['name'] for ch in channels],
+        'チャンネルURL': [f'https://yutura.net/channel/{ch["id"]}/' for ch in channels],
+        'チャンネル登録者数': [ch['subscribers'] for ch in channels],
+        'YouTube URL': [ch['youtube_url'] for ch in channels],
+    })
+
+    rows = []
+    for talent_id in range(1, talent_count + 1):
+        main_url = f'https://www.youtube.com/@talent{talent_id}'
+        row = {
+            'talent_id': talent_id,
+            'talent_name': f'タレント{talent_id}',
+            'main_youtube_url': main_url,
+            'main_youtube_name': f'タレント{talent_id}チャンネル',
+            'sub_youtube_url': '',
+            'sub_youtube_name': '',
+            'sub_youtube_followers': rng.randint(0, 1000000),
+        }
+        rows.append(row)
+
+    # 一部のチャンネルをタレントのサブチャンネルとして登録（複数チャンネルを持つタレントもいる）
+    for ch in channels:
+        if ch['youtube_url'] == 'N/A' or rng.random() >= match_rate:
+            continue
+        row = rows[rng.randrange(talent_count)]
+        if row['sub_youtube_url']:
+            row = dict(row, sub_youtube_url='', sub_youtube_name='')
+            rows.append(row)
+        row['sub_youtube_url'] = vary_url(ch['youtube_url'], rng)
+        row['sub_youtube_name'] = vary_name(ch['name'], rng)
+    df_talent = pd.DataFrame(rows)
+
+    bios = ['', 'nan', '紹介文です', '複数\n行の紹介文']
+    df_bio = pd.DataFrame({
+        'talent_id': range(1, talent_count + 1),
+        'talent_name': [f'タレント{i}' for i in range(1, talent_count + 1)],
+        '紹介文': [rng.choice(bios) for _ in range(talent_count)],
+    })
+    return df_yutura, df_talent, df_bio
+
+def generate_dataset(scale, base, seed=0):
+    """規模 scale 倍の合成データ一式を生成"""
+    channel_count = base['listing_pages'] * base['channels_per_page'] * scale
+    channels = generate_channels(channel_count, seed)
+    per_page = base['channels_per_page']
+    listing_pages = [listing_page_html(channels[i:i + per_page])
+                     for i in range(0, len(channels), per_page)]
+    channel_pages = [channel_page_html(ch) for ch in channels[:base['channel_pages'] * scale]]
+    df_yutura, df_talent, df_bio = generate_tables(channels, base['talents'] * scale, seed)
+    return {
+        'channel_count': channel_count,
+        'listing_pages': listing_pages,
+        'channel_pages': channel_pages,
+        'df_yutura': df_yutura,
+        'df_talent': df_talent,
+        'df_bio': df_bio,
+    }
+
+# ========================================
+# 計測
+# ========================================
+
+def best_time(func, repeat):
+    """func を repeat 回実行し、(最速の秒数, 最後の戻り値) を返す（処理中の表示は出さない）"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        with redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def run_benchmarks(dataset, repeat, backend, work_dir):
+    """1つの規模のデータで全ベンチマークを実行し、結果の一覧を返す"""
+    results = []
+
+    # check: 抽出・一致・更新の件数（処理速度を変えたときに結果まで変わっていないかの目安）
+    def record(name, items, seconds, check):
+        results.append({
+            'name': name,
+            'items': items,
+            'seconds': round(seconds, 6),
+            'per_item_ms': round(seconds / items * 1000, 4) if items else None,
+            'items_per_sec': round(items / seconds, 1) if seconds else None,
+            'check': check,
+        })
+
+    pages = dataset['listing_pages']
+    seconds, parsed = best_time(
+        lambda: [parser_backends.extract_channels(html, backend) for html in pages], repeat)
+    record('extract_channels', len(pages), seconds, sum(len(channels) for channels in parsed))
+
+    pages = dataset['channel_pages']
+    seconds, urls = best_time(
+        lambda: [undetected_scraper.extract_youtube_url(html, backend) for html in pages], repeat)
+    record('extract_youtube_url', len(pages), seconds, sum(1 for url in urls if url))
+
+    # タレントデータはCSVから読み込む（キャッシュなし＝初回実行と同じ条件）
+    talent_csv = os.path.join(work_dir, 'talent_data.csv')
+    dataset['df_talent'].to_csv(talent_csv, index=False, encoding='utf-8-sig')
+    candidates_csv = os.path.join(work_dir, 'name_match_candidates.csv')
+    df_yutura = dataset['df_yutura']
+    seconds, df_merged = best_time(
+        lambda: merge_youtube_data.merge_youtube_data(df_yutura, talent_csv, None,
+                                                      candidates_csv=candidates_csv, talent_cache_dir=None),
+        repeat)
+    record('merge_youtube_data', len(df_yutura), seconds, len(df_merged))
+
+    df_bio = dataset['df_bio']
+    seconds, (_, df_updated) = best_time(
+        lambda: update_bio_channels.update_bio_channels(df_merged, df_bio), repeat)
+    record('update_bio_channels', len(df_bio), seconds, int((df_updated['紹介文'] != df_bio['紹介文']).sum()))
+
+    return results
+
+def git_commit():
+    """現在のコミット（取得できなければ None）"""
+    try:
+        output = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True)
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip() + ('-dirty' if dirty.stdout.strip() else '')
+
+def load_previous_run(results_file):
+    """前回の実行結果（{(名前, 規模): 秒数}）。なければ空の辞書"""
+    if not os.path.exists(results_file):
+        return {}, None
+    last = None
+    with open(results_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                try:
+                    last = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+    if last is None:
+        return {}, None
+    return {(r['name'], r['scale']): r['seconds'] for r in last['results']}, last
+
+def save_run(run, results_file):
+    """実行結果を1行のJSONとして追記"""
+    os.makedirs(os.path.dirname(results_file) or '.', exist_ok=True)
+    with open(results_file, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(run, ensure_ascii=False) + '\n')
+
+def print_results(results, previous, slower_ratio):
+    """結果の表を表示（前回より slower_ratio 倍以上遅い処理には印をつける）"""
+    print(f"{'処理':<22}{'規模':>6}{'件数':>9}{'合計(秒)':>11}{'1件(ms)':>11}{'件/秒':>11}  前回比")
+    print("-" * 84)
+    slower = []
+    for r in results:
+        ratio = ''
+        before = previous.get((r['name'], r['scale']))
+        if before:
+            change = r['seconds'] / before
+            ratio = f"x{change:.2f}"
+            if change >= slower_ratio:
+                ratio += ' ⚠'
+                slower.append(r)
+        per_item = f"{r['per_item_ms']:.3f}" if r['per_item_ms'] is not None else '-'
+        per_sec = f"{r['items_per_sec']:.0f}" if r['items_per_sec'] is not None else '-'
+        print(f"{r['name']:<22}{str(r['scale']) + 'x':>6}{r['items']:>9}{r['seconds']:>11.3f}"
+              f"{per_item:>11}{per_sec:>11}  {ratio}")
+    return slower
+
+def main():
+    """メイン処理"""
+    # ========================================
+    # 設定
+    # ========================================
+    base = {
+        'listing_pages': 10,        # 1倍のときの一覧ページ数
+        'channels_per_page': 30,    # 一覧ページ1枚あたりのチャンネル数
+        'channel_pages': 100,       # 1倍のときのチャンネルページ数
+        'talents': 1000,            # 1倍のときのタレント数（紹介文データも同じ件数）
+    }
+    backend = 'auto'                                                            # HTMLパーサー（auto / selectolax / lxml / bs4）
+    results_file = os.path.join(ROOT, 'data', 'benchmarks', 'benchmark_results.jsonl')  # 結果の記録先（1回の実行につき1行）
+    slower_ratio = 1.2                                                          # 前回よりこの倍率以上遅ければ警告
+    seed = 0                                                                    # 合成データの乱数シード
+    # ========================================
+
+    parser = argparse.ArgumentParser(description='合成データで各処理の速度を計測')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100], help='計測する規模（倍率）')
+    parser.add_argument('--repeat', type=int, default=3, help='計測回数（最速の値を採用）')
+    parser.add_argument('--no-save', action='store_true', help='結果を記録しない')
+    args = parser.parse_args()
+
+    backend = parser_backends.resolve_backend(backend)
+    previous, last_run = load_previous_run(results_file)
+
+    print("=" * 60)
+    print("ベンチマーク（合成データ）")
+    print("=" * 60)
+    print(f"規模: {' / '.join(f'{scale}倍' for scale in args.scales)} / 計測{args.repeat}回")
+    print(f"パーサー: {backend}")
+    if last_run:
+        print(f"前回: {last_run['finished_at']}（{last_run['commit'] or 'コミット不明'}）")
+    print("=" * 60)
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for scale in args.scales:
+            print(f"\n▶ {scale}倍: データを生成中...")
+            start = time.perf_counter()
+            dataset = generate_dataset(scale, base, seed)
+            print(f"✓ 一覧ページ{len(dataset['listing_pages'])}件 / チャンネルページ{len(dataset['channel_pages'])}件 / "
+                  f"チャンネル{dataset['channel_count']}件 / タレント{len(dataset['df_talent'])}件"
+                  f"（{time.perf_counter() - start:.1f}秒）")
+            for r in run_benchmarks(dataset, args.repeat, backend, work_dir):
+                results.append({'scale': scale, **r})
+                print(f"  ⏱ {r['name']}: {r['seconds']:.3f}秒")
+
+    print()
+    slower = print_results(results, previous, slower_ratio)
+
+    run = {
+        'finished_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'backend': backend,
+        'repeat': args.repeat,
+        'base': base,
+        'results': results,
+    }
+    if not args.no_save:
+        save_run(run, results_file)
+        print(f"\n💾 結果を記録しました: {results_file}")
+
+    if slower:
+        print(f"\n⚠ 前回より{slower_ratio}倍以上遅くなった処理: {len(slower)}件")
+    print("=" * 60)
+
+if __name__ == '__main__':
+    main()
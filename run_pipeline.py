@@ -0,0 +1,441 @@
+"""
+パイプライン一括実行スクリプト
+
+HTML解析 → YouTube URL取得 → データ突合 → 紹介文作成 の4つの処理を
+1つのプロセスで続けて実行します。処理間のデータはCSVを介さずメモリ上で受け渡します。
+
+- 各処理の結果は、これまでと同じCSVにチェックポイントとして保存します（--no-checkpoints で保存しない）
+- 前回の実行から入力が変わっていない処理は、保存済みのチェックポイントを使って省略します
+  （入力の状態は data/cache/pipeline_manifest.json に記録。--force で省略しない）
+  YouTube URL取得は、入力が同じでも有効期限切れ・失敗の再試行の時期が来たチャンネルがあれば実行します
+- 各処理の時間と件数を data/metrics/pipeline.json（と pipeline.prom）に保存します
+
+使い方:
+python run_pipeline.py                         # すべての処理
+python run_pipeline.py --from merge            # データ突合から（それより前はチェックポイントを使用）
+python run_pipeline.py --from parse --to resolve
+python run_pipeline.py --force                 # 入力が同じでもすべて実行し直す
+python run_pipeline.py --max-minutes 30        # YouTube URL取得は30分まで（優先度の高いチャンネルから）
+
+処理の名前: parse（HTML解析） / resolve（YouTube URL取得） / merge（データ突合） / bio（紹介文作成）
+"""
+
+from datetime import datetime
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(ROOT, '1_scraping'), os.path.join(ROOT, '2_processing')]
+
+import batch_html_parser  # noqa: E402
+import fetch_scheduler  # noqa: E402
+import merge_youtube_data  # noqa: E402
+import metrics  # noqa: E402
+import parse_cache  # noqa: E402
+import undetected_scraper  # noqa: E402
+import update_bio_channels  # noqa: E402
+import url_cache  # noqa: E402
+
+STAGES = ['parse', 'resolve', 'merge', 'bio']
+
+STAGE_LABELS = {
+    'parse': 'HTML解析',
+    'resolve': 'YouTube URL取得',
+    'merge': 'データ突合',
+    'bio': '紹介文作成',
+}
+
+# ========================================
+# マニフェスト（各処理の入力と出力の状態）
+# ========================================
+
+def file_state(path):
+    """ファイルの [サイズ, 更新日時] （なければ None）"""
+    if not path or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def fingerprint(*parts):
+    """入力の状態をまとめたハッシュ値"""
+    text = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def records_digest(records):
+    """チャンネル一覧（辞書のリスト）のハッシュ値"""
+    return fingerprint(records)
+
+def frame_digest(df):
+    """DataFrame のハッシュ値"""
+    if df is None:
+        return None
+    digest = hashlib.sha256(json.dumps(list(map(str, df.columns)), ensure_ascii=False).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def load_manifest(path):
+    """マニフェストを読み込む（なければ空）"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except ValueError:
+        print(f"⚠ マニフェストが壊れているため使いません: {path}")
+        return {}
+
+def save_manifest(manifest, path):
+    """マニフェストを保存（書き込み途中で止まっても壊れないよう、一時ファイルから置き換える）"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+def outputs_unchanged(entry):
+    """前回記録したチェックポイントが、そのまま残っているか"""
+    outputs = entry.get('outputs') or {}
+    return bool(outputs) and all(file_state(path) == state for path, state in outputs.items())
+
+# ========================================
+# 各処理
+# ========================================
+# inputs:  前の処理の結果以外の入力（ファイルの状態・設定）。変わったら処理をやり直す
+# run:     前の処理の結果を受け取って実行し、結果を返す
+# load:    チェックポイントから結果を読み込む
+# outputs: チェックポイントなど、この処理が書き出すファイル
+# pending: （任意）入力が同じでも残っている作業の件数。1件以上なら省略しない
+
+def _read_records(path):
+    """チェックポイントのCSVを辞書のリストとして読み込む"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return list(csv.DictReader(f))
+
+def parse_inputs(config):
+    entries = batch_html_parser.find_crawl_entries(config['html_dir'])
+    return {
+        # マニフェストのタグ・ページ・取得元URL・取得日時も各行に記録されるため入力に含める
+        'pages': [
+            (entry['tag_id'], entry['page'], entry['source_url'], entry['fetched_at'],
+             os.path.relpath(entry['file'], config['html_dir']), file_state(entry['file']))
+            for entry in entries
+        ],
+        'version': parse_cache.PARSE_CACHE_VERSION,
+        'backend': config['backend'],  # 入れ子の壊れたページではバックエンドによって結果が変わる
+        'dedupe_by': 'チャンネルURL',  # 重複の除き方が変わったら結果も変わる
+        'columns': batch_html_parser.CSV_FIELDNAMES,
+    }
+
+def run_parse(config, _):
+    provenance = {}
+    channels = batch_html_parser.process_html_files(config['html_dir'], config['workers'],
+                                                    config['backend'], config['parse_cache'],
+                                                    provenance=provenance)
+    if config['checkpoints']:
+        batch_html_parser.save_to_csv(channels, config['parsed_csv'])
+        if channels:
+            batch_html_parser.save_provenance(provenance, batch_html_parser.provenance_path(config['parsed_csv']))
+        if channels and config['parsed_parquet']:
+            batch_html_parser.save_to_parquet(config['parsed_csv'], config['parsed_parquet'])
+    return channels
+
+def resolve_inputs(config):
+    return {}
+
+def resolve_pending(config):
+    """前回の取得結果のうち、今取得し直す時期のチャンネル数（有効期限切れ・失敗の再試行）
+
+    入力が変わらなくても、時間が経てば取得し直すチャンネルが出てくるため、
+    1件でもあれば YouTube URL取得は省略しない
+    """
+    if not os.path.exists(config['resolved_csv']) or not config['url_cache']:
+        return 0
+    channels = _read_records(config['resolved_csv'])
+    cache = url_cache.open_url_cache(config['url_cache'])
+    try:
+        scheduled, _ = fetch_scheduler.plan(channels, cache, config['ttl_days'], config['negative_ttl_days'],
+                                            config['max_fetch_attempts'])
+    finally:
+        cache.close()
+    return len(scheduled)
+
+def run_resolve(config, channels):
+    return undetected_scraper.resolve_youtube_urls(
+        channels, config['resolved_csv'], config['wait_time'], config['cool_time'], config['backend'],
+        workers=config['browser_workers'], max_rate=config['max_rate'], cache_path=config['url_cache'],
+        ttl_days=config['ttl_days'], negative_ttl_days=config['negative_ttl_days'],
+        save_csv=config['checkpoints'], max_minutes=config['max_minutes'],
+        max_fetch_attempts=config['max_fetch_attempts'], archive_dir=config['page_archive']
+    )
+
+def merge_inputs(config):
+    return {
+        'talent_csv': file_state(config['talent_csv']),
+        'alias_csv': file_state(config['alias_csv']),
+        'match_columns': config['match_columns'],
+        'name_columns': config['name_columns'],
+        'min_score': config['min_score'],
+        'top_k': config['top_k'],
+        'match_key_version': merge_youtube_data.MATCH_KEY_VERSION,
+    }
+
+def run_merge(config, channels):
+    df_yutura = pd.DataFrame(channels, columns=undetected_scraper.OUTPUT_FIELDNAMES)
+    return merge_youtube_data.merge_youtube_data(
+        df_yutura, config['talent_csv'], config['merged_csv'] if config['checkpoints'] else None,
+        config['alias_csv'], config['match_columns'], config['candidates_csv'],
+        config['name_columns'], config['min_score'], config['top_k'], config['talent_cache_dir']
+    )
+
+def load_merge(config):
+    return pd.read_csv(config['merged_csv'], encoding='utf-8-sig')
+
+def bio_inputs(config):
+    return {'bio_file': file_state(config['bio_file'])}
+
+def run_bio(config, df_merged):
+    df_bio = None
+    if os.path.exists(config['bio_file']):
+        df_bio = update_bio_channels.load_bio_data(config['bio_file'])
+    else:
+        print(f"\n⚠ 紹介文データファイル ({config['bio_file']}) が見つかりません（チャンネル情報のみ作成します）")
+
+    df_channels, df_bio = update_bio_channels.update_bio_channels(df_merged, df_bio)
+    if config['checkpoints'] or df_bio is None:
+        update_bio_channels.save_channel_texts(df_channels, config['channel_text_file'])
+    # 紹介文は最終的な出力なので常に保存（前回から変わった行は差分ファイルにも保存）
+    if df_bio is not None:
+        update_bio_channels.save_biographies(df_bio, config['bio_output'])
+        update_bio_channels.save_bio_delta(df_bio, config['bio_output'], config['bio_fingerprints'])
+    return df_bio if df_bio is not None else df_channels
+
+STAGE_FUNCS = {
+    'parse': {
+        'inputs': parse_inputs,
+        'run': run_parse,
+        'load': lambda config: _read_records(config['parsed_csv']),
+        'outputs': lambda config: [config['parsed_csv']],
+        'digest': records_digest,
+    },
+    'resolve': {
+        'inputs': resolve_inputs,
+        'pending': resolve_pending,
+        'run': run_resolve,
+        'load': lambda config: _read_records(config['resolved_csv']),
+        'outputs': lambda config: [config['resolved_csv']],
+        'digest': records_digest,
+    },
+    'merge': {
+        'inputs': merge_inputs,
+        'run': run_merge,
+        'load': load_merge,
+        'outputs': lambda config: [config['merged_csv']],
+        'digest': frame_digest,
+    },
+    'bio': {
+        'inputs': bio_inputs,
+        'run': run_bio,
+        'load': lambda config: None,
+        'outputs': lambda config: [config['channel_text_file'], config['bio_output']],
+        'digest': frame_digest,
+        # 省略した場合も、前回の差分が再アップロードされないよう差分ファイルを空にする
+        'on_skip': lambda config: update_bio_channels.clear_bio_delta(config['bio_output']),
+    },
+}
+
+def is_empty(data):
+    """処理結果が空か（次の処理に進めない）"""
+    return data is None or len(data) == 0
+
+def is_complete(stage, data):
+    """処理が最後まで終わったか（YouTube URL取得を途中で中断した場合は未完了）"""
+    if stage == 'resolve':
+        # 'N/A'（見つからなかった・再取得を待っている）と、取得に失敗した（次回また取得する）チャンネルは
+        # 取得を試みたものとみなす。URLが空のまま試してもいないチャンネルが残っていれば中断
+        return not any(not channel.get('YouTube URL') and not channel.get(undetected_scraper.FETCH_ERROR_FIELD)
+                       for channel in data)
+    return True
+
+# ========================================
+# 実行
+# ========================================
+
+def load_upstream(stage, config, manifest):
+    """--from で途中から始める場合に、前の処理の結果をチェックポイントから読み込む"""
+    path = STAGE_FUNCS[stage]['outputs'](config)[0]
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{STAGE_LABELS[stage]}の結果がありません: {path}"
+                                f"（先に --from {stage} で実行してください）")
+    print(f"📂 {STAGE_LABELS[stage]}の結果を読み込み中: {path}")
+    data = STAGE_FUNCS[stage]['load'](config)
+
+    # チェックポイントが前回の実行のままなら、記録済みのハッシュ値を使う
+    entry = manifest.get(stage)
+    if entry and outputs_unchanged(entry):
+        return data, entry['output_digest']
+    return data, STAGE_FUNCS[stage]['digest'](data)
+
+def run_pipeline(config, from_stage='parse', to_stage='bio', force=False):
+    """from_stage から to_stage までの処理を続けて実行
+
+    最後に実行（または省略）した処理の結果を返す
+    """
+    start = STAGES.index(from_stage)
+    end = STAGES.index(to_stage)
+    if start > end:
+        raise ValueError(f"--from {from_stage} は --to {to_stage} より後の処理です")
+
+    manifest_path = config['manifest']
+    manifest = load_manifest(manifest_path)
+
+    # 前の処理の結果（省略した処理の結果は、次の処理を実行するときに初めて読み込む）
+    upstream, upstream_digest = None, None
+    pending_load = None
+    if start > 0:
+        upstream, upstream_digest = load_upstream(STAGES[start - 1], config, manifest)
+
+    for number, stage in enumerate(STAGES[start:end + 1], start + 1):
+        funcs = STAGE_FUNCS[stage]
+        print("\n" + "=" * 60)
+        print(f"▶ [{number}/{len(STAGES)}] {STAGE_LABELS[stage]}")
+        print("=" * 60)
+
+        input_key = fingerprint(stage, funcs['inputs'](config), upstream_digest)
+        entry = manifest.get(stage)
+        unchanged = not force and entry and entry.get('input_key') == input_key and outputs_unchanged(entry)
+        pending = funcs['pending'](config) if unchanged and 'pending' in funcs else 0
+        if pending:
+            print(f"🔁 入力は前回と同じですが、取得し直す時期の{pending}件があるため実行します")
+        elif unchanged:
+            print(f"⏭ 前回（{entry['finished_at']}）から入力が変わっていないため省略します")
+            metrics.incr('stages_skipped')
+            if 'on_skip' in funcs:
+                funcs['on_skip'](config)
+            upstream, upstream_digest = None, entry['output_digest']
+            pending_load = stage
+            continue
+
+        if pending_load:
+            print(f"📂 {STAGE_LABELS[pending_load]}の結果を読み込み中...")
+            with metrics.timer('checkpoint_read'):
+                upstream = STAGE_FUNCS[pending_load]['load'](config)
+            pending_load = None
+
+        with metrics.timer(f'stage_{stage}') as stage_timer:
+            data = funcs['run'](config, upstream)
+        metrics.incr('stages_run')
+        print(f"\n⏱ {STAGE_LABELS[stage]}: {time.perf_counter() - stage_timer.start:.1f}秒")
+
+        if not is_complete(stage, data):
+            # 中断した結果は記録しない（次回はジャーナルから続きを取得する）
+            manifest.pop(stage, None)
+            save_manifest(manifest, manifest_path)
+            print(f"\n⚠ {STAGE_LABELS[stage]}が最後まで終わらなかったため、ここで止めます")
+            return data
+        if is_empty(data) and stage != STAGES[end]:
+            print(f"\n⚠ {STAGE_LABELS[stage]}の結果が空のため、ここで止めます")
+            return data
+
+        upstream_digest = funcs['digest'](data)
+        manifest[stage] = {
+            'input_key': input_key,
+            'output_digest': upstream_digest,
+            'outputs': {path: file_state(path) for path in funcs['outputs'](config) if file_state(path)},
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        save_manifest(manifest, manifest_path)
+        upstream = data
+
+    if pending_load and upstream is None:
+        upstream = STAGE_FUNCS[pending_load]['load'](config)
+    return upstream
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description='HTML解析から紹介文作成までをまとめて実行')
+    parser.add_argument('--from', dest='from_stage', choices=STAGES, default='parse', help='最初に実行する処理')
+    parser.add_argument('--to', dest='to_stage', choices=STAGES, default='bio', help='最後に実行する処理')
+    parser.add_argument('--force', action='store_true', help='入力が変わっていなくても実行し直す')
+    parser.add_argument('--no-checkpoints', action='store_true', help='途中結果のCSVを保存しない')
+    parser.add_argument('--max-minutes', type=float, default=None,
+                        help='YouTube URL取得に使う時間の上限（分）。優先度の高いチャンネルから取得し、残りは次回に回す')
+    args = parser.parse_args()
+
+    # ========================================
+    # 設定（パスはこのファイルのあるフォルダからの相対パス）
+    # ========================================
+    data_dir = os.path.join(ROOT, 'data')
+    config = {
+        'html_dir': os.path.join(ROOT, 'html_files'),                                   # HTMLファイルのフォルダ
+        'parsed_csv': os.path.join(data_dir, 'output', 'yutura_batch_channels.csv'),     # HTML解析の結果
+        'parsed_parquet': None,                                                          # HTML解析の結果を Parquet でも保存する場合のパス（pyarrow が必要）
+        'resolved_csv': os.path.join(data_dir, 'output', 'yutura_with_youtube_urls.csv'),  # YouTube URL取得の結果
+        'talent_csv': os.path.join(data_dir, 'input', 'talent_data.csv'),                # タレントデータ
+        'alias_csv': os.path.join(data_dir, 'input', 'youtube_aliases.csv'),             # @ハンドル → チャンネルID の対応表（任意）
+        'merged_csv': os.path.join(data_dir, 'output', 'merged_youtube_data.csv'),       # データ突合の結果
+        'candidates_csv': os.path.join(data_dir, 'output', 'name_match_candidates.csv'), # 名前突合の候補
+        'bio_file': os.path.join(data_dir, 'input', 'bio_data.tsv'),                     # 紹介文データ
+        'channel_text_file': os.path.join(data_dir, 'output', 'channels_with_text.csv'), # チャンネル情報付きCSV
+        'bio_output': os.path.join(data_dir, 'output', 'updated_biography.tsv'),         # 更新後の紹介文
+        'bio_fingerprints': os.path.join(data_dir, 'cache', 'bio_fingerprints.tsv'),     # 前回書き出した紹介文の記録
+        'parse_cache': os.path.join(data_dir, 'cache', 'parse_cache.sqlite'),            # HTML解析キャッシュ
+        'url_cache': os.path.join(data_dir, 'cache', 'youtube_url_cache.sqlite'),        # YouTube URLキャッシュ
+        'page_archive': os.path.join(data_dir, 'archive'),                               # 開いたチャンネルページの保存先（None=保存しない）
+        'talent_cache_dir': os.path.join(data_dir, 'cache'),                             # タレントデータのキャッシュ
+        'manifest': os.path.join(data_dir, 'cache', 'pipeline_manifest.json'),           # 各処理の入力の記録
+        'metrics_file': os.path.join(data_dir, 'metrics', 'pipeline.json'),              # 処理時間・件数の記録（.prom も出力）
+        'workers': None,                                 # HTML解析の並列プロセス数（None=CPUコア数）
+        'backend': 'bs4',                                # HTMLパーサー（bs4=従来と同じ結果 / selectolax / lxml は高速だが入れ子の壊れたページで結果が変わる）
+        'wait_time': 5,                                  # ページ読み込み待機の上限（秒）
+        'cool_time': 3,                                  # リクエスト間のクールタイム（秒）
+        'browser_workers': 1,                            # 同時に動かすブラウザ数
+        'max_rate': 0.5,                                 # 並行処理時の全体の秒間リクエスト数の上限
+        'ttl_days': 90,                                  # キャッシュしたYouTube URLの有効日数
+        'negative_ttl_days': 7,                          # 見つからなかったチャンネルを再取得しない日数（失敗するたびに倍）
+        'max_fetch_attempts': 5,                         # この回数見つからなかったチャンネルは取得しない
+        'max_minutes': args.max_minutes,                 # YouTube URL取得に使う時間の上限（分。None=制限なし）
+        'match_columns': ['main_youtube_url', 'sub_youtube_url'],   # 突合するタレントデータのURL列
+        'name_columns': ['main_youtube_name', 'sub_youtube_name'],  # チャンネル名と突合する列
+        'min_score': 0.6,                                # 名前突合の候補とする一致度の下限
+        'top_k': 3,                                      # 名前突合の最大候補数
+        'checkpoints': not args.no_checkpoints,          # 途中結果のCSVを保存するか
+    }
+    # ========================================
+
+    print("=" * 60)
+    print("パイプライン一括実行")
+    print("=" * 60)
+    print(f"処理: {STAGE_LABELS[args.from_stage]} → {STAGE_LABELS[args.to_stage]}")
+    if args.force:
+        print("💡 --force: 入力が変わっていない処理も実行し直します")
+    if config['max_minutes']:
+        print(f"💡 --max-minutes: YouTube URL取得は{config['max_minutes']:g}分までにします")
+    if not config['checkpoints']:
+        print("💡 --no-checkpoints: 途中結果を保存しません（次回は処理を省略できません）")
+
+    try:
+        run_pipeline(config, args.from_stage, args.to_stage, args.force)
+    except KeyboardInterrupt:
+        print("\n⚠ ユーザーによって中断されました")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ エラーが発生しました: {e}")
+        sys.exit(1)
+    finally:
+        # 中断・エラー時も、そこまでの計測結果を残す
+        metrics.write_metrics(config['metrics_file'])
+
+    print("\n" + "=" * 60)
+    print("パイプライン完了")
+    print(metrics.summary_line('fetched_pages'))
+    print("=" * 60)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import shutil
+
+import pytest
+
+import batch_html_parser
+import metrics
+from conftest import FIXTURES
+
+
+def test_parallel_parse_counts_each_file_once(tmp_path):
+    html_files = []
+    for n in range(6):
+        path = tmp_path / f'page{n + 1}.html'
+        shutil.copy(f'{FIXTURES}/malformed_listing.html', path)
+        html_files.append(str(path))
+
+    metrics.reset()
+    # 親プロセスに計測値が残っている状態でワーカーを起動しても、二重に数えない
+    metrics.observe('parse', 0.1)
+    metrics.incr('parse_errors')
+    results = list(batch_html_parser.iter_parsed_files(html_files, workers=2, backend='auto'))
+
+    counts = metrics.snapshot()
+    assert len(results) == len(html_files)
+    assert counts['counters']['parsed_pages'] == len(html_files)
+    assert counts['counters']['parse_errors'] == 1
+    assert counts['timers']['file_read']['count'] == len(html_files)
+    assert counts['timers']['parse']['count'] == len(html_files) + 1
+    metrics.reset()
+
+
+def write_csv(html_dir, csv_path, **kwargs):
+    channels = batch_html_parser.iter_html_channels(str(html_dir), **kwargs)
+    batch_html_parser.save_to_csv(channels, str(csv_path))
+    return csv_path.read_bytes()
+
+
+def test_parallel_csv_is_byte_identical_to_serial_bs4(tmp_path):
+    html_dir = tmp_path / 'html_files'
+    html_dir.mkdir()
+    shutil.copy(f'{FIXTURES}/malformed_listing.html', html_dir / 'page1.html')
+    for page in range(2, 13):
+        items = ''.join(
+            f'<li><a href="/channel/{page}{n}/"><p class="title">ch{page}-{n}</p></a>'
+            f'<p><i title="チャンネル登録者数"></i>{page}.{n}万人</p></li>'
+            for n in range(3)
+        )
+        (html_dir / f'page{page}.html').write_text(
+            f'<html><body><ul class="channel-list">{items}</ul></body></html>', encoding='utf-8')
+
+    serial = write_csv(html_dir, tmp_path / 'serial.csv', workers=1, backend='bs4', cache_path=None)
+    assert 'Din'.encode() in serial
+
+    # 既定（'auto'）の並列処理でも、キャッシュからの再利用でも同じバイト列
+    cache_path = str(tmp_path / 'parse_cache.sqlite')
+    assert write_csv(html_dir, tmp_path / 'parallel.csv', workers=3, cache_path=None) == serial
+    assert write_csv(html_dir, tmp_path / 'first.csv', workers=3, cache_path=cache_path) == serial
+    assert write_csv(html_dir, tmp_path / 'cached.csv', workers=3, cache_path=cache_path) == serial
+
+    # 別のバックエンドで作ったキャッシュの結果は使わない
+    pytest.importorskip('lxml.html')
+    other_cache = str(tmp_path / 'lxml_cache.sqlite')
+    assert write_csv(html_dir, tmp_path / 'lxml.csv', workers=3, backend='lxml', cache_path=other_cache) != serial
+    assert write_csv(html_dir, tmp_path / 'after_lxml.csv', workers=3, backend='bs4', cache_path=other_cache) == serial
@@ -0,0 +1,49 @@
+import pandas as pd
+
+import update_bio_channels
+
+
+def merged(sub_urls):
+    return pd.DataFrame({
+        'talent_id': [1, 2, 3],
+        'talent_name': ['A', 'B', 'C'],
+        'チャンネル名': ['A sub', 'B sub', 'C sub'],
+        'YouTube URL': sub_urls,
+        'matched_column': ['sub_youtube_url'] * 3,
+    })
+
+
+def write_delta(tmp_path, sub_urls):
+    df_bio = pd.DataFrame({'talent_id': [1, 2, 3], 'talent_name': ['A', 'B', 'C'], '紹介文': ['a', 'b', 'c']})
+    _, df_updated = update_bio_channels.update_bio_channels(merged(sub_urls), df_bio)
+    output_file = str(tmp_path / 'out' / 'updated_biography.tsv')
+    update_bio_channels.save_biographies(df_updated, output_file)
+    count = update_bio_channels.save_bio_delta(df_updated, output_file, str(tmp_path / 'cache' / 'fingerprints.tsv'))
+    delta = pd.read_csv(update_bio_channels.delta_path(output_file), sep='\t', encoding='utf-8')
+    return count, delta, output_file
+
+
+def test_delta_contains_only_changed_talents(tmp_path):
+    urls = ['https://youtube.com/@a', 'https://youtube.com/@b', 'https://youtube.com/@c']
+
+    count, delta, _ = write_delta(tmp_path, urls)
+    assert count == 3 and delta['talent_id'].tolist() == [1, 2, 3]
+
+    count, delta, _ = write_delta(tmp_path, urls)
+    assert count == 0 and delta.empty
+
+    # talent 2 のチャンネルだけ変わった
+    count, delta, _ = write_delta(tmp_path, [urls[0], 'https://youtube.com/@b2', urls[2]])
+    assert count == 1
+    assert delta['talent_id'].tolist() == [2]
+    assert 'https://youtube.com/@b2' in delta['紹介文'].item()
+
+
+def test_clear_bio_delta_keeps_header_only(tmp_path):
+    _, _, output_file = write_delta(tmp_path, ['https://youtube.com/@a', 'https://youtube.com/@b', 'https://youtube.com/@c'])
+
+    update_bio_channels.clear_bio_delta(output_file)
+
+    delta = pd.read_csv(update_bio_channels.delta_path(output_file), sep='\t', encoding='utf-8')
+    assert delta.empty
+    assert delta.columns.tolist() == ['talent_id', 'talent_name', '紹介文']
@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('selenium')
+import browser_pool  # noqa: E402
+
+
+class FakeDriver:
+    """チャンネル番号から YouTube URL を返すブラウザ（crash_on のURLは1回目だけ落ちる）"""
+
+    crashed = set()
+    started = 0
+    lock = threading.Lock()
+
+    def __init__(self, crash_on=()):
+        self.crash_on = crash_on
+        with FakeDriver.lock:
+            FakeDriver.started += 1
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def get(self, url):
+        with FakeDriver.lock:
+            if url in self.crash_on and url not in FakeDriver.crashed:
+                FakeDriver.crashed.add(url)
+                raise RuntimeError('chrome not reachable')
+        self.url = url
+
+    def execute_script(self, script):
+        return 'link'
+
+    @property
+    def page_source(self):
+        number = self.url.rstrip('/').split('/')[-1]
+        return f'<a href="https://www.youtube.com/channel/UC{number}">YouTube</a>'
+
+    def quit(self):
+        pass
+
+
+def make_channels(count):
+    return [
+        {'チャンネル名': f'ch{n}', 'チャンネルURL': f'https://yutura.net/channel/{n}/', 'YouTube URL': ''}
+        for n in range(1, count + 1)
+    ]
+
+
+def test_crashed_browser_is_restarted_without_losing_its_channel(monkeypatch):
+    crash_url = 'https://yutura.net/channel/3/'
+    FakeDriver.crashed = set()
+    FakeDriver.started = 0
+    monkeypatch.setattr(browser_pool, 'setup_driver', lambda: FakeDriver(crash_on={crash_url}))
+    channels = make_channels(6)
+    results = []
+
+    browser_pool.run_browser_pool(channels, list(enumerate(channels, 1)), workers=2, max_rate=100,
+                                  wait_time=1, on_result=lambda channel, *rest: results.append(channel['チャンネルURL']))
+
+    assert [ch['YouTube URL'] for ch in channels] == [f'https://www.youtube.com/channel/UC{n}' for n in range(1, 7)]
+    assert sorted(results) == sorted(ch['チャンネルURL'] for ch in channels)
+    assert FakeDriver.crashed == {crash_url}
+    # 2つのブラウザ + 落ちたブラウザの起動し直し
+    assert FakeDriver.started == 3
+
+
+def test_request_rate_is_capped_across_workers(monkeypatch):
+    monkeypatch.setattr(browser_pool, 'setup_driver', lambda: FakeDriver())
+    channels = make_channels(9)
+
+    start = time.monotonic()
+    browser_pool.run_browser_pool(channels, list(enumerate(channels, 1)), workers=3, max_rate=20, wait_time=1)
+    elapsed = time.monotonic() - start
+
+    # 3つのブラウザで並行しても、合計 20件/秒（9件なら0.4秒以上）を超えない
+    assert elapsed >= 8 / 20
+    assert all(ch['YouTube URL'] for ch in channels)
@@ -0,0 +1,66 @@
+import batch_html_parser
+import crawl_manifest
+import parse_cache
+
+
+def listing_page(*channel_ids):
+    items = ''.join(
+        f'<li><a href="/channel/{n}/"><p class="title">ch{n}</p></a>'
+        f'<p><i title="チャンネル登録者数"></i>{n}人</p></li>'
+        for n in channel_ids
+    )
+    return f'<html><body><ul class="channel-list">{items}</ul></body></html>'
+
+
+def make_crawl(html_dir):
+    """タグ 20 は10ページ、タグ 3 は1ページ（page3 は取り直した新しいものがある）"""
+    entries = []
+    for tag_id, pages in (('20', range(1, 11)), ('3', [1])):
+        for page in pages:
+            path = html_dir / tag_id / f'page{page}.html'
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(listing_page(int(tag_id) * 100 + page), encoding='utf-8')
+            entries.append({'tag_id': tag_id, 'page': page, 'source_url': crawl_manifest.tag_page_url(tag_id, page),
+                            'file': str(path), 'fetched_at': '2024-05-01T00:00:00'})
+    newer = html_dir / '20' / 'page3.refetched.html'
+    newer.write_text(listing_page(9999), encoding='utf-8')
+    entries.append({'tag_id': '20', 'page': 3, 'source_url': crawl_manifest.tag_page_url('20', 3),
+                    'file': str(newer), 'fetched_at': '2024-06-01T00:00:00'})
+    crawl_manifest.append_entries(str(html_dir / crawl_manifest.MANIFEST_FILENAME), entries)
+
+
+def test_natural_order_and_latest_fetch_wins(tmp_path):
+    make_crawl(tmp_path)
+
+    entries = batch_html_parser.find_crawl_entries(str(tmp_path))
+
+    assert [(e['tag_id'], e['page']) for e in entries] == [('3', 1)] + [('20', page) for page in range(1, 11)]
+    assert entries[3]['file'].endswith('page3.refetched.html')
+    assert crawl_manifest.natural_key('page10') > crawl_manifest.natural_key('page2')
+
+
+def test_rows_carry_provenance_across_tags(tmp_path):
+    make_crawl(tmp_path)
+
+    channels = list(batch_html_parser.iter_html_channels(str(tmp_path), workers=1, backend='bs4', cache_path=None))
+
+    assert len(channels) == 11
+    first, tenth = channels[0], channels[-1]
+    assert (first['タグID'], first['ページ番号'], first['取得元URL']) == ('3', 1, 'https://yutura.net/tag/3/')
+    assert (tenth['タグID'], tenth['ページ番号'], tenth['取得元URL']) == ('20', 10, 'https://yutura.net/tag/20/?p=10')
+    assert channels[3]['チャンネル名'] == 'ch9999'
+    assert channels[3]['取得日時'] == '2024-06-01T00:00:00'
+
+
+def test_ingested_entries_are_not_read_again(tmp_path, monkeypatch):
+    make_crawl(tmp_path)
+    cache_path = str(tmp_path / 'cache.sqlite')
+    first = list(batch_html_parser.iter_html_channels(str(tmp_path), workers=1, backend='bs4', cache_path=cache_path))
+
+    def fail(path):
+        raise AssertionError(f'取り込み済みのページを読み直した: {path}')
+
+    monkeypatch.setattr(parse_cache, 'file_digest', fail)
+    second = list(batch_html_parser.iter_html_channels(str(tmp_path), workers=1, backend='bs4', cache_path=cache_path))
+
+    assert second == first
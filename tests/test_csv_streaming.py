@@ -0,0 +1,43 @@
+import csv
+
+import pytest
+
+import batch_html_parser
+
+
+def read_rows(path):
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def channel(n):
+    return {'チャンネル名': f'ch{n}', 'チャンネルURL': f'https://yutura.net/channel/{n}/', 'チャンネル登録者数': f'{n}人'}
+
+
+def test_rows_are_written_while_the_generator_runs(tmp_path):
+    output = str(tmp_path / 'out' / 'channels.csv')
+    seen_on_disk = []
+
+    def rows():
+        for n in range(1, 8):
+            if n == 6:
+                # flush_every=2 なので、この時点で4件はディスクに書かれている
+                seen_on_disk.append(len(read_rows(output)))
+            yield channel(n)
+
+    assert batch_html_parser.save_to_csv(rows(), output, flush_every=2) == 7
+    assert seen_on_disk == [4]
+    assert [row['チャンネル名'] for row in read_rows(output)] == [f'ch{n}' for n in range(1, 8)]
+
+
+def test_crash_leaves_a_valid_partial_csv(tmp_path):
+    output = str(tmp_path / 'channels.csv')
+
+    def rows():
+        yield from (channel(n) for n in range(1, 4))
+        raise RuntimeError('途中で停止')
+
+    with pytest.raises(RuntimeError):
+        batch_html_parser.save_to_csv(rows(), output, flush_every=100)
+
+    assert [row['チャンネル名'] for row in read_rows(output)] == ['ch1', 'ch2', 'ch3']
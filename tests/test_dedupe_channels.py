@@ -0,0 +1,47 @@
+import batch_html_parser
+from batch_html_parser import channel_key, dedupe_channels
+
+
+def listing_page(*channel_ids):
+    items = ''.join(
+        f'<li><a href="/channel/{n}/"><p class="title">ch{n}</p></a>'
+        f'<p><i title="チャンネル登録者数"></i>{n}人</p></li>'
+        for n in channel_ids
+    )
+    return f'<html><body><ul class="channel-list">{items}</ul></body></html>'
+
+
+def test_channel_key_ignores_url_variants():
+    assert len({
+        channel_key('https://yutura.net/channel/1/'),
+        channel_key('http://www.yutura.net/channel/1'),
+        channel_key('https://YUTURA.net/channel/1/?p=2'),
+    }) == 1
+    assert channel_key('https://yutura.net/channel/1/') != channel_key('https://yutura.net/channel/10/')
+    assert channel_key('N/A') is None
+
+
+def test_dedupe_records_every_source():
+    provenance = {}
+    page1 = [{'チャンネルURL': 'https://yutura.net/channel/1/'}, {'チャンネルURL': 'https://yutura.net/channel/2/'}]
+    page2 = [{'チャンネルURL': 'http://www.yutura.net/channel/1'}, {'チャンネルURL': 'N/A'}, {'チャンネルURL': 'N/A'}]
+
+    assert dedupe_channels(page1, 'page1.html', provenance) == page1
+    # URLのないチャンネルは重複とみなさない
+    assert dedupe_channels(page2, 'page2.html', provenance) == page2[1:]
+    assert provenance[channel_key('https://yutura.net/channel/1/')] == {
+        'チャンネルURL': 'https://yutura.net/channel/1/', 'sources': ['page1.html', 'page2.html'],
+    }
+
+
+def test_each_channel_is_yielded_once_across_pages(tmp_path):
+    (tmp_path / 'page1.html').write_text(listing_page(1, 2, 3), encoding='utf-8')
+    (tmp_path / 'page2.html').write_text(listing_page(3, 4, 1), encoding='utf-8')
+    provenance = {}
+
+    channels = list(batch_html_parser.iter_html_channels(str(tmp_path), workers=1, backend='bs4', cache_path=None,
+                                                          provenance=provenance))
+
+    assert [ch['チャンネル名'] for ch in channels] == ['ch1', 'ch2', 'ch3', 'ch4']
+    assert provenance[channel_key('https://yutura.net/channel/1/')]['sources'] == ['page1.html', 'page2.html']
+    assert provenance[channel_key('https://yutura.net/channel/2/')]['sources'] == ['page1.html']
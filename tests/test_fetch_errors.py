@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+import pytest
+
+import async_fetcher
+import undetected_scraper
+import url_cache
+
+CHANNEL_URL = 'https://yutura.net/channel/1/'
+
+
+class FakeDriver:
+    """ページを開いても準備ができない（Cloudflareの確認画面のまま）ブラウザ"""
+
+    title = 'Just a moment...'
+    page_source = '<html><head><title>Just a moment...</title></head><body></body></html>'
+
+    def get(self, url):
+        self.url = url
+
+    def execute_script(self, script):
+        return False
+
+
+def make_channel(youtube_url=''):
+    return {'チャンネル名': 'テスト', 'チャンネルURL': CHANNEL_URL, 'YouTube URL': youtube_url}
+
+
+@pytest.fixture
+def recorder(tmp_path):
+    cache = url_cache.open_url_cache(str(tmp_path / 'cache.sqlite'))
+    journal = open(tmp_path / 'journal.jsonl', 'a', encoding='utf-8')
+    yield undetected_scraper.make_result_recorder(journal, cache), cache
+    journal.close()
+    cache.close()
+
+
+def test_timeout_on_challenge_page_is_an_error():
+    with pytest.raises(TimeoutError):
+        undetected_scraper.fetch_youtube_url(FakeDriver(), CHANNEL_URL, wait_time=0.3)
+    result = undetected_scraper.get_youtube_url_from_yutura(FakeDriver(), CHANNEL_URL, wait_time=0.3)
+    assert result is undetected_scraper.FETCH_ERROR
+
+
+@pytest.mark.parametrize('previous', ['', 'https://www.youtube.com/channel/UCold'])
+def test_fetch_error_keeps_url_and_skips_cache(recorder, previous):
+    record, cache = recorder
+    channel = make_channel(previous)
+    undetected_scraper.apply_fetch_result(channel, undetected_scraper.FETCH_ERROR)
+    record(channel, undetected_scraper.FETCH_ERROR)
+
+    assert channel['YouTube URL'] == previous
+    assert url_cache.lookup(cache, CHANNEL_URL) is None
+
+
+def test_page_without_link_is_negative_cached(recorder):
+    record, cache = recorder
+    channel = make_channel()
+    undetected_scraper.apply_fetch_result(channel, None)
+    record(channel, None)
+
+    assert channel['YouTube URL'] == 'N/A'
+    assert url_cache.lookup(cache, CHANNEL_URL) is not None
+
+
+def test_async_http_error_is_reported_as_fetch_error(monkeypatch):
+    async def failing_fetch_page(session, url, buckets, retries=2):
+        return None  # HTTP 403・再試行の上限・時間切れ
+
+    monkeypatch.setattr(async_fetcher, 'fetch_page', failing_fetch_page)
+    results = []
+    channel = make_channel()
+    stats = asyncio.run(async_fetcher.resolve_channels(
+        [channel], on_result=lambda ch, youtube_url: results.append(youtube_url)
+    ))
+
+    assert results == [undetected_scraper.FETCH_ERROR]
+    assert channel['YouTube URL'] == ''
+    assert stats['errors'] == 1 and stats['done'] == 0
+
+
+def test_async_worker_survives_unexpected_errors(monkeypatch):
+    async def fetch_page(session, url, buckets, retries=2):
+        return f'<a href="https://www.youtube.com/@{url.rstrip("/").rsplit("/", 1)[1]}">YouTube</a>'
+
+    def extract(html, backend='auto'):
+        if '@2' in html:
+            raise ValueError('壊れたページ')
+        return undetected_scraper.extract_youtube_url(html, backend)
+
+    class Archive:
+        def __init__(self):
+            self.threads = []
+
+        def put(self, url, html):
+            self.threads.append(threading.get_ident())
+
+    monkeypatch.setattr(async_fetcher, 'fetch_page', fetch_page)
+    monkeypatch.setattr(async_fetcher, 'extract_youtube_url', extract)
+    channels = [
+        {'チャンネル名': f'ch{n}', 'チャンネルURL': f'https://yutura.net/channel/{n}/', 'YouTube URL': ''}
+        for n in range(1, 5)
+    ]
+    results = []
+    archive = Archive()
+
+    # 1件の例外でワーカーが止まると queue.join() が終わらない
+    stats = asyncio.run(asyncio.wait_for(async_fetcher.resolve_channels(
+        channels, concurrency=1, rate=1000, burst=1000, archive=archive,
+        on_result=lambda ch, youtube_url: results.append(youtube_url),
+    ), timeout=10))
+
+    assert stats['done'] == 3 and stats['errors'] == 1
+    assert results[1] is undetected_scraper.FETCH_ERROR
+    assert [ch['YouTube URL'] for ch in channels] == [
+        'https://www.youtube.com/@1', '', 'https://www.youtube.com/@3', 'https://www.youtube.com/@4',
+    ]
+    # ページの保存はイベントループのスレッドでは行わない
+    assert len(archive.threads) == 3 and threading.get_ident() not in archive.threads
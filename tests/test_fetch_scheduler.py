@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+from aiohttp import web  # noqa: E402
+
+import async_fetcher  # noqa: E402
+import fetch_scheduler  # noqa: E402
+import undetected_scraper  # noqa: E402
+import url_cache  # noqa: E402
+
+
+async def handle(request):
+    name = request.match_info['name']
+    if name == 'forbidden':
+        return web.Response(status=403)
+    if name == 'slow':
+        await asyncio.sleep(1)
+    return web.Response(text='<html><body><a href="https://example.com/">no link</a></body></html>',
+                        content_type='text/html')
+
+
+async def resolve(channels, on_result):
+    app = web.Application()
+    app.router.add_get('/channel/{name}/', handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        return await async_fetcher.resolve_channels(
+            channels, rate=100, burst=100, base_url=f'http://127.0.0.1:{port}',
+            retries=0, timeout=0.3, on_result=on_result
+        )
+    finally:
+        await runner.cleanup()
+
+
+def test_http_errors_do_not_count_as_failed_attempts(tmp_path):
+    cache = url_cache.open_url_cache(str(tmp_path / 'cache.sqlite'))
+    journal = open(tmp_path / 'journal.jsonl', 'a', encoding='utf-8')
+    record = undetected_scraper.make_result_recorder(journal, cache)
+    channels = [
+        {'チャンネル名': name, 'チャンネルURL': f'https://yutura.net/channel/{name}/', 'YouTube URL': ''}
+        for name in ('forbidden', 'slow', 'nolink')
+    ]
+    try:
+        stats = asyncio.run(resolve(channels, record))
+        attempts = fetch_scheduler.load_attempts(cache)
+        cached = url_cache.load_entries(cache)
+    finally:
+        journal.close()
+        cache.close()
+
+    assert stats['errors'] == 2
+    # HTTP 403・時間切れは失敗回数にもネガティブキャッシュにも入らない
+    assert [ch['YouTube URL'] for ch in channels] == ['', '', 'N/A']
+    assert set(attempts) == {'https://yutura.net/channel/nolink/'}
+    assert attempts['https://yutura.net/channel/nolink/'][0] == 1
+    assert set(cached) == {'https://yutura.net/channel/nolink/'}
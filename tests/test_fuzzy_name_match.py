@@ -0,0 +1,39 @@
+import pandas as pd
+
+from fuzzy_name_match import build_name_index, match_channel_names, normalize_name
+
+
+def test_normalize_name_unifies_width_kana_and_decorations():
+    assert normalize_name('ＡＢＣ チャンネル') == normalize_name('abc')
+    assert normalize_name('ﾎｹﾞ公式') == normalize_name('ほげ')
+    assert normalize_name('カタカナ ch') == 'かたかな'
+    assert normalize_name(None) == ''
+
+
+def test_candidates_are_ranked_by_score():
+    df_talent = pd.DataFrame({
+        'talent_id': [1, 2, 3],
+        'main_youtube_name': ['ホゲホゲちゃんねる', 'まったく別の名前', 'ホゲホゲ・フガ'],
+        'sub_youtube_name': [None, 'ホゲホゲ', None],
+    })
+    df_yutura = pd.DataFrame({'チャンネル名': ['ﾎｹﾞﾎｹﾞ Channel', '該当なし'], 'チャンネルURL': ['u1', 'u2']})
+
+    candidates = match_channel_names(df_yutura, df_talent, top_k=3, min_score=0.6)
+
+    # 完全一致（正規化後）の2人が上位、部分一致の1人がその次。該当なしの行は候補なし
+    assert candidates['チャンネルURL'].unique().tolist() == ['u1']
+    assert candidates['name_rank'].tolist() == [1, 2, 3]
+    assert set(candidates['talent_id'].head(2)) == {1, 2}
+    assert candidates['talent_id'].iloc[2] == 3
+    assert candidates['name_score'].is_monotonic_decreasing
+    assert candidates['name_score'].iloc[0] == 1.0
+    assert candidates.loc[candidates['talent_id'] == 2, 'name_column'].item() == 'sub_youtube_name'
+
+
+def test_index_blocks_candidates_without_shared_ngrams():
+    df_talent = pd.DataFrame({'main_youtube_name': ['あいうえお', 'かきくけこ', 'さしすせそ']})
+    index = build_name_index(df_talent, ['main_youtube_name'])
+
+    # 「あい」を含む名前だけが索引から引ける（全組み合わせは比較しない）
+    assert index['postings']['あい'].tolist() == [0]
+    assert 'かき' in index['postings'] and 'あか' not in index['postings']
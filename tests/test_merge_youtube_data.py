@@ -0,0 +1,58 @@
+import pandas as pd
+
+from merge_youtube_data import canonical_youtube_key, match_talent_urls
+
+
+def keys(*urls):
+    return canonical_youtube_key(pd.Series(urls, dtype='object')).tolist()
+
+
+def test_channel_url_variants_share_a_key():
+    assert keys(
+        'https://www.youtube.com/channel/UCabc/videos',
+        'http://m.youtube.com/channel/UCabc?si=x',
+        'youtube.com/channel/UCabc/',
+    ) == ['channel:UCabc'] * 3
+
+
+def test_non_channel_urls_keep_their_query():
+    a, z = keys('https://www.youtube.com/watch?v=aaa', 'https://www.youtube.com/watch?v=zzz')
+    assert a != z
+
+
+def test_tracking_params_are_ignored():
+    assert len(set(keys(
+        'https://www.youtube.com/watch?v=aaa',
+        'https://youtube.com/watch?si=share&v=aaa',
+        'https://m.youtube.com/watch/?v=aaa&feature=youtu.be#t=10',
+    ))) == 1
+
+
+def test_video_ids_are_case_sensitive():
+    a, b = keys('https://youtu.be/AbC', 'https://youtu.be/abc')
+    assert a != b
+
+
+def test_blank_and_na_have_no_key():
+    assert all(pd.isna(key) for key in keys('', 'N/A', None))
+
+
+def test_overlapping_columns_get_merge_suffixes():
+    df_yutura = pd.DataFrame({
+        'チャンネル名': ['A ch', 'B ch', 'C ch'],
+        'YouTube URL': ['https://www.youtube.com/channel/UCa', 'https://youtube.com/@b', ''],
+        'memo': ['yutura a', 'yutura b', 'yutura c'],
+    })
+    df_talent = pd.DataFrame({
+        'talent_id': [1, 2],
+        'sub_youtube_url': ['youtube.com/channel/UCa/', 'https://www.youtube.com/@b'],
+        'memo': ['talent 1', 'talent 2'],
+    })
+
+    df_merged = match_talent_urls(df_yutura, df_talent, ['sub_youtube_url'])
+
+    # 同じ列名が2つ並ぶのではなく、pd.merge と同じ列名・列順になる
+    expected = pd.merge(df_yutura.iloc[:2], df_talent, left_index=True, right_index=True)
+    assert df_merged.columns.is_unique
+    assert df_merged.columns.tolist() == [*expected.columns, 'matched_column']
+    pd.testing.assert_frame_equal(df_merged.drop(columns='matched_column'), expected.reset_index(drop=True))
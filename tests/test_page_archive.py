@@ -0,0 +1,39 @@
+import metrics
+import page_archive
+import undetected_scraper
+
+CHANNEL_URL = 'https://yutura.net/channel/1/'
+HTML = '<html><body><a href="https://www.youtube.com/channel/UCabc">YouTube</a></body></html>'
+
+
+class FakeDriver:
+    page_source = HTML
+
+    def get(self, url):
+        self.url = url
+
+    def execute_script(self, script):
+        return 'link'
+
+
+class BrokenArchive:
+    def put(self, url, html, fetched_at=None):
+        raise OSError(28, 'No space left on device')
+
+
+def test_archive_failure_is_not_a_fetch_failure():
+    metrics.reset()
+    youtube_url = undetected_scraper.get_youtube_url_from_yutura(FakeDriver(), CHANNEL_URL, archive=BrokenArchive())
+
+    assert youtube_url == 'https://www.youtube.com/channel/UCabc'
+    assert metrics.count('archive_errors') == 1
+    assert metrics.count('fetch_errors') == 0
+    metrics.reset()
+
+
+def test_fetched_page_is_archived(tmp_path):
+    with page_archive.open_archive(str(tmp_path)) as archive:
+        undetected_scraper.fetch_youtube_url(FakeDriver(), CHANNEL_URL, archive=archive)
+        undetected_scraper.fetch_youtube_url(FakeDriver(), CHANNEL_URL, archive=archive)
+        assert archive.get(CHANNEL_URL) == HTML
+        assert len(list(archive.entries())) == 1
@@ -0,0 +1,58 @@
+import batch_html_parser
+import parse_cache
+
+
+def listing_page(*names):
+    items = ''.join(
+        f'<li><a href="/channel/{n}/"><p class="title">{name}</p></a>'
+        f'<p><i title="チャンネル登録者数"></i>{n},000人</p></li>'
+        for n, name in enumerate(names, 1)
+    )
+    return f'<html><body><ul class="channel-list">{items}</ul></body></html>'
+
+
+def parse(html_files, cache):
+    return {
+        html_file: (rows, cached)
+        for html_file, rows, error, cached in batch_html_parser.iter_parsed_files(html_files, 1, 'bs4', cache)
+    }
+
+
+def test_unchanged_pages_come_from_cache(tmp_path):
+    page1, page2 = tmp_path / 'page1.html', tmp_path / 'page2.html'
+    page1.write_text(listing_page('A', 'B'), encoding='utf-8')
+    page2.write_text(listing_page('C'), encoding='utf-8')
+    html_files = [str(page1), str(page2)]
+    cache = parse_cache.open_cache(str(tmp_path / 'parse_cache.sqlite'))
+
+    first = parse(html_files, cache)
+    assert [cached for _, cached in first.values()] == [False, False]
+
+    second = parse(html_files, cache)
+    assert [cached for _, cached in second.values()] == [True, True]
+    assert [rows for rows, _ in second.values()] == [rows for rows, _ in first.values()]
+
+    # 内容が変わったページだけ解析し直す
+    page2.write_text(listing_page('C', 'D'), encoding='utf-8')
+    third = parse(html_files, cache)
+    assert [cached for _, cached in third.values()] == [True, False]
+    assert [row['チャンネル名'] for row in third[str(page2)][0]] == ['C', 'D']
+    cache.close()
+
+
+def test_rebuild_and_version_change_invalidate_cache(tmp_path, monkeypatch):
+    page = tmp_path / 'page1.html'
+    page.write_text(listing_page('A'), encoding='utf-8')
+    cache_path = str(tmp_path / 'parse_cache.sqlite')
+
+    cache = parse_cache.open_cache(cache_path)
+    parse([str(page)], cache)
+    assert [cached for _, cached in parse([str(page)], cache).values()] == [True]
+    cache.close()
+
+    cache = parse_cache.open_cache(cache_path, rebuild=True)
+    assert [cached for _, cached in parse([str(page)], cache).values()] == [False]
+
+    monkeypatch.setattr(parse_cache, 'PARSE_CACHE_VERSION', parse_cache.PARSE_CACHE_VERSION + 1)
+    assert [cached for _, cached in parse([str(page)], cache).values()] == [False]
+    cache.close()
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+import parser_backends
+from conftest import FIXTURES
+
+# 入れ子が壊れたページで、バックエンドごとに期待するチャンネル名
+# （selectolax・lxml は <div> で <p> が閉じる。bs4 は書かれたとおりに読む）
+EXPECTED_NAMES = {
+    'selectolax': ['D', 'Normal', 'Unclosed bold'],
+    'lxml': ['D', 'Normal', 'Unclosed bold'],
+    'bs4': ['Din', 'Normal', 'Unclosed bold'],
+}
+
+
+def _read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('backend', parser_backends.BACKENDS)
+def test_malformed_listing_is_pinned_per_backend(backend):
+    if backend not in parser_backends.available_backends():
+        pytest.skip(f'{backend} がインストールされていません')
+
+    channels = parser_backends.extract_channels(_read_fixture('malformed_listing.html'), backend)
+
+    assert [ch['チャンネル名'] for ch in channels] == EXPECTED_NAMES[backend]
+    # 名前以外の列はどのバックエンドでも同じ
+    assert [ch['チャンネルURL'] for ch in channels] == [
+        'https://yutura.net/channel/1/',
+        'https://yutura.net/channel/2/',
+        'https://yutura.net/channel/3/',
+    ]
+    assert [ch['チャンネル登録者数_数値'] for ch in channels] == [123000, 5432, 120000000]
+
+
+def test_auto_keeps_the_bs4_result():
+    # 既定の出力を従来（bs4）から変えない
+    assert parser_backends.resolve_backend('auto') == 'bs4'
+
+    channels = parser_backends.extract_channels(_read_fixture('malformed_listing.html'), 'auto')
+
+    assert [ch['チャンネル名'] for ch in channels] == EXPECTED_NAMES['bs4']
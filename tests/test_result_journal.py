@@ -0,0 +1,25 @@
+import csv
+
+import result_journal
+import undetected_scraper
+
+
+def test_save_results_truncates_journal(tmp_path):
+    output_csv = str(tmp_path / 'out.csv')
+    path = result_journal.journal_path(output_csv)
+    channels = [
+        {'チャンネルURL': f'https://yutura.net/channel/{i}/', 'YouTube URL': f'https://www.youtube.com/channel/UC{i}'}
+        for i in range(3)
+    ]
+    with result_journal.open_journal(path) as journal:
+        for channel in channels:
+            result_journal.append_record(journal, channel)
+
+    undetected_scraper.save_results(channels, output_csv)
+
+    assert result_journal.replay(path, {}) == 0
+    with open(output_csv, encoding='utf-8-sig') as f:
+        saved = {row['チャンネルURL']: row['YouTube URL'] for row in csv.DictReader(f)}
+    assert saved == {c['チャンネルURL']: c['YouTube URL'] for c in channels}
+    # CSVだけから再開しても取得結果は失われない
+    assert undetected_scraper.load_existing_results(output_csv) == saved
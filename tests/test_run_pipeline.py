@@ -0,0 +1,82 @@
+import csv
+import time
+
+import run_pipeline
+import undetected_scraper
+import url_cache
+
+
+def write_resolved(path, channels):
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['チャンネル名', 'チャンネルURL', 'YouTube URL'])
+        writer.writeheader()
+        writer.writerows(channels)
+
+
+def test_resolve_pending_counts_expired_cache_entries(tmp_path):
+    config = {
+        'resolved_csv': str(tmp_path / 'resolved.csv'),
+        'url_cache': str(tmp_path / 'cache.sqlite'),
+        'ttl_days': 90,
+        'negative_ttl_days': 7,
+        'max_fetch_attempts': 5,
+    }
+    write_resolved(config['resolved_csv'], [
+        {'チャンネル名': 'A', 'チャンネルURL': 'https://yutura.net/channel/1/', 'YouTube URL': 'https://www.youtube.com/@a'},
+        {'チャンネル名': 'B', 'チャンネルURL': 'https://yutura.net/channel/2/', 'YouTube URL': 'https://www.youtube.com/@b'},
+    ])
+    cache = url_cache.open_url_cache(config['url_cache'])
+    url_cache.store(cache, 'https://yutura.net/channel/1/', 'https://www.youtube.com/@a')
+    url_cache.store(cache, 'https://yutura.net/channel/2/', 'https://www.youtube.com/@b')
+    cache.close()
+    assert run_pipeline.resolve_pending(config) == 0
+
+    cache = url_cache.open_url_cache(config['url_cache'])
+    url_cache.store(cache, 'https://yutura.net/channel/2/', 'https://www.youtube.com/@b',
+                    fetched_at=time.time() - 100 * url_cache.DAY)
+    cache.close()
+    assert run_pipeline.resolve_pending(config) == 1
+
+
+def test_resolve_is_complete_unless_a_url_is_empty():
+    done = [{'YouTube URL': 'https://www.youtube.com/@a'}, {'YouTube URL': 'N/A'}]
+    assert run_pipeline.is_complete('resolve', done)
+    assert not run_pipeline.is_complete('resolve', done + [{'YouTube URL': ''}])
+
+
+def test_channel_that_always_errors_does_not_block_the_pipeline(tmp_path, monkeypatch):
+    class FakeDriver:
+        def quit(self):
+            pass
+
+    def fetch(driver, yutura_url, *args):
+        # チャンネル2 はいつ開いても取得に失敗する（HTTPエラー・時間切れなど）
+        if yutura_url.endswith('/2/'):
+            return undetected_scraper.FETCH_ERROR
+        return 'https://www.youtube.com/@a'
+
+    monkeypatch.setattr(undetected_scraper, 'setup_driver', FakeDriver)
+    monkeypatch.setattr(undetected_scraper, 'get_youtube_url_from_yutura', fetch)
+    config = {
+        'resolved_csv': str(tmp_path / 'resolved.csv'),
+        'url_cache': str(tmp_path / 'cache.sqlite'),
+        'page_archive': None,
+        'wait_time': 0, 'cool_time': 0, 'backend': 'bs4', 'browser_workers': 1, 'max_rate': 1,
+        'ttl_days': 90, 'negative_ttl_days': 7, 'max_fetch_attempts': 5,
+        'checkpoints': True, 'max_minutes': None,
+    }
+
+    for _ in range(3):
+        channels = [
+            {'チャンネル名': 'A', 'チャンネルURL': 'https://yutura.net/channel/1/', 'YouTube URL': ''},
+            {'チャンネル名': 'B', 'チャンネルURL': 'https://yutura.net/channel/2/', 'YouTube URL': ''},
+        ]
+        data = run_pipeline.run_resolve(config, channels)
+
+        assert [channel['YouTube URL'] for channel in data] == ['https://www.youtube.com/@a', '']
+        assert run_pipeline.is_complete('resolve', data)
+        # 失敗したチャンネルは次回また取得する
+        assert run_pipeline.resolve_pending(config) == 1
+
+    with open(config['resolved_csv'], encoding='utf-8-sig') as f:
+        assert undetected_scraper.FETCH_ERROR_FIELD not in f.readline()
@@ -0,0 +1,48 @@
+import pytest
+
+import batch_html_parser
+import parser_backends
+from parser_backends import parse_subscriber_count
+
+PAGE = '''<html><body><ul class="channel-list">
+<li><a href="/channel/1/"><p class="title">A</p></a><p><i title="チャンネル登録者数">人</i>12.3万人</p></li>
+<li><a href="/channel/2/"><p class="title">B</p></a><p><i title="チャンネル登録者数"></i>5,432人</p></li>
+<li><a href="/channel/3/"><p class="title">C</p></a><p><i title="チャンネル登録者数"></i>非公開</p></li>
+</ul></body></html>'''
+
+BACKENDS = [name for name in parser_backends.BACKENDS if name in parser_backends.available_backends()]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('12.3万人', 123000),
+    ('1.2億人', 120000000),
+    ('5,432人', 5432),
+    ('0.1万人', 1000),
+    ('非公開', None),
+    ('N/A', None),
+    ('', None),
+    (None, None),
+])
+def test_parse_subscriber_count(text, expected):
+    assert parse_subscriber_count(text) == expected
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_extract_channels_returns_raw_text_and_number(backend):
+    rows = parser_backends.extract_channels(PAGE, backend)
+
+    assert [row['チャンネル登録者数'] for row in rows] == ['12.3万人', '5,432人', '非公開']
+    assert [row['チャンネル登録者数_数値'] for row in rows] == [123000, 5432, None]
+
+
+def test_parquet_keeps_numeric_column_typed(tmp_path):
+    pd = pytest.importorskip('pandas')
+    pytest.importorskip('pyarrow')
+    csv_file = str(tmp_path / 'channels.csv')
+    parquet_file = str(tmp_path / 'channels.parquet')
+    batch_html_parser.save_to_csv(parser_backends.extract_channels(PAGE, 'bs4'), csv_file)
+
+    assert batch_html_parser.save_to_parquet(csv_file, parquet_file)
+    df = pd.read_parquet(parquet_file)
+    assert str(df['チャンネル登録者数_数値'].dtype) == 'Int64'
+    assert df['チャンネル登録者数_数値'].tolist()[:2] == [123000, 5432]
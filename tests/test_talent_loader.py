@@ -0,0 +1,68 @@
+import pandas as pd
+
+import talent_loader
+
+HEADER = 'talent_id,talent_name,main_youtube_url\n'
+
+
+def write_csv(tmp_path, body):
+    path = tmp_path / 'talent_data.csv'
+    path.write_text(HEADER + body, encoding='utf-8')
+    return str(path)
+
+
+def test_unclosed_quote_skips_only_that_line(tmp_path):
+    talent_csv = write_csv(tmp_path, (
+        '1,A,https://youtube.com/@a\n'
+        '2,"B,https://youtube.com/@b\n'
+        '3,C,https://youtube.com/@c\n'
+        '4,D,https://youtube.com/@d,extra\n'
+    ))
+
+    df = talent_loader.load_talent_data(talent_csv, cache_dir=None)
+
+    assert df['talent_id'].tolist() == ['1', '3']
+    bad = pd.read_csv(talent_loader.bad_lines_path(talent_csv), encoding='utf-8-sig')
+    assert bad['line'].tolist() == [3, 5]
+
+
+def test_quoted_multiline_field_is_kept_in_fallback(tmp_path):
+    talent_csv = write_csv(tmp_path, (
+        '1,"A\nB",https://youtube.com/@a\n'
+        '2,"C,https://youtube.com/@c\n'
+        '3,,https://youtube.com/@d\n'
+    ))
+
+    df, bad_lines = talent_loader.read_talent_csv(talent_csv)
+
+    assert df['talent_name'].tolist()[0] == 'A\nB'
+    assert df['talent_id'].tolist() == ['1', '3']
+    assert pd.isna(df['talent_name'].iloc[1])
+    assert [line for line, _ in bad_lines] == [4]
+
+
+def test_bad_records_are_handled_inside_the_chunked_read(tmp_path, monkeypatch):
+    talent_csv = write_csv(tmp_path, (
+        '1,"A\nB",https://youtube.com/@a\n'     # 2-3行目（引用符の中の改行）
+        '2,B,https://youtube.com/@b,extra\n'    # 4行目（列が多い）
+        '3,C,https://youtube.com/@c\n'
+        '4,"D,https://youtube.com/@d\n'         # 6行目（引用符が閉じていない）
+        '5,E,https://youtube.com/@e\n'
+        '6,F,https://youtube.com/@f,extra\n'    # 8行目
+        '7,G,https://youtube.com/@g\n'
+    ))
+    read_sizes = []
+    original_read_csv = pd.read_csv
+
+    def counting_read_csv(source, **kwargs):
+        read_sizes.append(len(source.getvalue().splitlines()) - 1)
+        return original_read_csv(source, **kwargs)
+
+    monkeypatch.setattr(talent_loader.pd, 'read_csv', counting_read_csv)
+    df, bad_lines = talent_loader.read_talent_csv(talent_csv, chunksize=2)
+
+    assert df['talent_id'].tolist() == ['1', '3', '5', '7']
+    assert df['talent_name'].tolist()[0] == 'A\nB'
+    assert [line for line, _ in bad_lines] == [4, 6, 8]
+    # ファイル全体を読み直さず、読めなかった塊の前後だけを読む
+    assert sum(read_sizes) < 2 * 8
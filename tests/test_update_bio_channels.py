@@ -0,0 +1,120 @@
+import importlib
+
+import pandas as pd
+import pytest
+
+import update_bio_channels
+
+MERGED = pd.DataFrame({
+    'talent_id': [1, 1, 1, 2],
+    'talent_name': ['A', 'A', 'A', 'B'],
+    'チャンネル名': ['A main', 'A sub', 'A sub', 'B sub'],
+    'YouTube URL': ['https://youtube.com/@amain', 'https://youtube.com/@asub', 'https://youtube.com/@asub',
+                    'https://youtube.com/@bsub'],
+    'matched_column': ['main_youtube_url', 'sub_youtube_url', 'sub_youtube_url', 'sub_youtube_url'],
+})
+
+
+def test_import_has_no_side_effects(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    importlib.reload(update_bio_channels)
+
+    assert capsys.readouterr().out == ''
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_dataframes_in_and_out():
+    df_bio = pd.DataFrame({'talent_id': [1, 2, 3], 'talent_name': ['A', 'B', 'C'], '紹介文': ['Aです', None, 'Cです']})
+    original = df_bio.copy()
+
+    df_channels, df_updated = update_bio_channels.update_bio_channels(MERGED, df_bio)
+
+    # メインチャンネルとして一致した行は含めず、同じURLは1回だけ
+    assert df_channels['talent_id'].tolist() == [1, 2]
+    assert df_channels['その他Youtubeチャンネル'].tolist() == [
+        'その他Youtubeチャンネル\n・A sub：__https://youtube.com/@asub__',
+        'その他Youtubeチャンネル\n・B sub：__https://youtube.com/@bsub__',
+    ]
+    assert df_updated['紹介文'].tolist() == [
+        'Aです\n\nその他Youtubeチャンネル\n・A sub：https://youtube.com/@asub',
+        'その他Youtubeチャンネル\n・B sub：https://youtube.com/@bsub',
+        'Cです',
+    ]
+    # 渡した表は変更しない
+    pd.testing.assert_frame_equal(df_bio, original)
+
+
+def test_channel_table_only_without_bio():
+    df_channels, df_updated = update_bio_channels.update_bio_channels(MERGED)
+
+    assert df_updated is None
+    assert len(df_channels) == 2
+
+
+def baseline_update(df_merged, df_bio):
+    """ベクトル化する前の update_bio_channels.py と同じ処理（1行ずつ辞書で集約）"""
+    channel_groups = {}
+    for _, row in df_merged.iterrows():
+        channel_groups.setdefault(row['talent_id'], []).append((row['チャンネル名'], row['YouTube URL']))
+    channel_texts = {}
+    rows = []
+    for talent_id, channels in channel_groups.items():
+        seen = set()
+        lines = ['その他Youtubeチャンネル']
+        for name, url in channels:
+            if url not in seen:
+                seen.add(url)
+                lines.append(f'・{name}：__{url}__')
+        channel_texts[talent_id] = '\n'.join(lines)
+        talent_name = df_merged[df_merged['talent_id'] == talent_id]['talent_name'].iloc[0]
+        rows.append({'talent_id': talent_id, 'talent_name': talent_name, 'サブチャンネル名': channels[0][0],
+                     'YouTube URL': channels[0][1], 'その他Youtubeチャンネル': channel_texts[talent_id]})
+
+    def update_biography(row):
+        bio = str(row['紹介文'])
+        empty = bio == 'nan' or bio.strip() == ''
+        if row['talent_id'] in channel_texts:
+            channel_text = channel_texts[row['talent_id']].replace('__', '')
+            return channel_text if empty else f'{bio}\n\n{channel_text}'
+        return '' if empty else bio
+
+    df_bio = df_bio.copy()
+    df_bio['紹介文'] = df_bio.apply(update_biography, axis=1)
+    return pd.DataFrame(rows), df_bio
+
+
+def write_outputs(tmp_path, name, df_channels, df_bio):
+    channel_file, bio_file = tmp_path / name / 'channels.csv', tmp_path / name / 'bio.tsv'
+    update_bio_channels.save_channel_texts(df_channels, str(channel_file))
+    update_bio_channels.save_biographies(df_bio, str(bio_file))
+    return channel_file.read_bytes(), bio_file.read_bytes()
+
+
+@pytest.mark.parametrize('string_dtype', [False, True])
+def test_output_is_byte_identical_to_baseline(tmp_path, string_dtype):
+    # 紹介文TSVに空行があると talent_id は小数（1.0）、マージ済みデータは整数（1）
+    merged_file = tmp_path / 'merged.csv'
+    pd.DataFrame({
+        'talent_id': [1, 1, 1, 2, 3, 4],
+        'talent_name': ['A', 'A', 'A', 'B', 'C', None],
+        'チャンネル名': ['A one', 'A two', 'A one again', None, 'C__x', 'D'],
+        'YouTube URL': ['https://youtube.com/@a1', 'https://youtube.com/@a2', 'https://youtube.com/@a1',
+                        'https://youtube.com/@b', None, 'https://youtube.com/@d'],
+    }).to_csv(merged_file, index=False, encoding='utf-8-sig')
+    bio_file = tmp_path / 'bio.tsv'
+    bio_file.write_text(
+        'talent_id\ttalent_name\t紹介文\n1\tA\tAです\n2\tB\t\n\t\t\n3\tC\tnan\n4\tD\t   \n5\tE\tEです\n',
+        encoding='utf-8'
+    )
+    df_merged = pd.read_csv(merged_file, encoding='utf-8-sig')
+    df_bio = pd.read_csv(bio_file, sep='\t', encoding='utf-8')
+    assert df_bio['talent_id'].dtype == 'float64' and df_merged['talent_id'].dtype == 'int64'
+
+    expected = write_outputs(tmp_path, 'baseline', *baseline_update(df_merged, df_bio))
+    if string_dtype:
+        # ファイルを介さずに渡された表（talent_loader などの 'string' 型。欠損値は pd.NA）
+        df_merged = df_merged.astype({'talent_name': 'string', 'チャンネル名': 'string', 'YouTube URL': 'string'})
+        df_bio = df_bio.astype({'talent_name': 'string', '紹介文': 'string'})
+    df_channels, df_updated = update_bio_channels.update_bio_channels(df_merged, df_bio)
+
+    assert write_outputs(tmp_path, 'vectorized', df_channels, df_updated) == expected
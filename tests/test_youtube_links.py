@@ -0,0 +1,56 @@
+import pytest
+
+import parser_backends
+
+
+PAGE = '''<html><body>
+<a href="https://www.youtube.com/@handle">handle</a>
+<a href="https://twitter.com/someone">twitter</a>
+<a href="https://www.youtube.com/user/olduser">user</a>
+<a href="https://www.youtube.com/channel/UCmain">main</a>
+<a href="https://www.youtube.com/@handle">handle again</a>
+<a href="https://www.youtube.com/watch?v=abc">video</a>
+</body></html>'''
+
+
+
+@pytest.fixture
+def undetected_scraper():
+    # undetected-chromedriver を import 時に読み込む版では、入っていなければスキップ
+    return pytest.importorskip('undetected_scraper')
+
+
+BACKENDS = [name for name in parser_backends.BACKENDS if name in parser_backends.available_backends()]
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_find_hrefs_filters_in_one_pass(backend):
+    assert parser_backends.find_hrefs(PAGE, 'youtube.com/', backend) == [
+        'https://www.youtube.com/@handle',
+        'https://www.youtube.com/user/olduser',
+        'https://www.youtube.com/channel/UCmain',
+        'https://www.youtube.com/@handle',
+        'https://www.youtube.com/watch?v=abc',
+    ]
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_candidates_in_page_order_and_winner_by_priority(undetected_scraper, backend):
+    youtube_url, candidates = undetected_scraper.extract_youtube_url(PAGE, backend, return_candidates=True)
+
+    assert youtube_url == 'https://www.youtube.com/channel/UCmain'
+    assert candidates == [
+        'https://www.youtube.com/@handle',
+        'https://www.youtube.com/user/olduser',
+        'https://www.youtube.com/channel/UCmain',
+    ]
+
+
+def test_page_without_youtube_link_is_not_parsed(undetected_scraper, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError('HTMLを解析してはいけない')
+
+    monkeypatch.setattr(parser_backends, 'find_hrefs', fail)
+    page = '<html><body><a href="https://twitter.com/someone">x</a></body></html>'
+    assert undetected_scraper.extract_youtube_url(page) is None
+    assert undetected_scraper.extract_youtube_candidates(page) == []